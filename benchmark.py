@@ -0,0 +1,388 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import string
+import sys
+import time
+import tracemalloc
+
+from compact_trie import CompactTrie
+from dictionary_build import format_timings
+from trie import Trie
+
+ENGINES = {"dict": Trie, "compact": CompactTrie}
+
+# operaciones medidas, en el orden en que se ejecutan (las que modifican la Trie van al final)
+OPERATIONS = (
+    "search",
+    "starts_with",
+    "autocomplete_prefix",
+    "get_similar_words",
+    "get_next_words",
+    "get_most_frequent_words",
+    "insert",
+    "process_text_optimized",
+)
+
+PERCENTILES = (50, 90, 99)
+
+# formas de buscar palabras similares: grupos por longitud de VocabularyIndex, recorrido de la
+# propia estructura, indice SymSpell o indice de NumPy (los mismos grupos con filtros y
+# distancias sobre arreglos)
+FUZZY_BACKENDS = ("scalar", "walk", "symspell", "numpy")
+
+
+def synthetic_words(size, seed=0):
+    """
+    Funcion para generar un vocabulario sintetico reproducible. Las longitudes siguen una
+    distribucion parecida a la de un diccionario real (la mayoria entre 4 y 10 letras) y las
+    palabras comparten prefijos frecuentes para que la Trie tenga ramas realistas.
+
+    Parametros:
+    size : int
+        numero de palabras a generar
+    seed : int
+        semilla del generador aleatorio
+    """
+    rng = random.Random(seed)
+    letters = string.ascii_lowercase
+    # prefijos y sufijos comunes para formar familias de palabras
+    prefixes = ["".join(rng.choices(letters, k=rng.randint(1, 3))) for _ in range(max(size // 50, 10))]
+    suffixes = ["", "s", "ed", "ing", "er", "ly", "tion"]
+
+    words = []
+    seen = set()
+    while len(words) < size:
+        stem = rng.choice(prefixes) + "".join(rng.choices(letters, k=max(1, int(rng.gauss(4, 2)))))
+        word = stem + rng.choice(suffixes)
+        if(word not in seen):
+            seen.add(word)
+            words.append(word)
+    return words
+
+
+def wordfreq_words(language, size):
+    """
+    Funcion para obtener las palabras mas frecuentes del idioma (datos locales de wordfreq).
+    """
+    from wordfreq import top_n_list
+    return top_n_list(language, size)
+
+
+def make_typo(word, rng):
+    """
+    Funcion para introducir un error de escritura (borrado, insercion, sustitucion o
+    intercambio de letras) en una palabra.
+    """
+    if(len(word) < 2):
+        return word + rng.choice(string.ascii_lowercase)
+    i = rng.randrange(len(word) - 1)
+    kind = rng.randrange(4)
+    if(kind == 0):
+        return word[:i] + word[i + 1:]
+    if(kind == 1):
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i:]
+    if(kind == 2):
+        return word[:i] + rng.choice(string.ascii_lowercase) + word[i + 1:]
+    return word[:i] + word[i + 1] + word[i] + word[i + 2:]
+
+
+def zipf_sample(words, count, rng):
+    """
+    Funcion para elegir palabras con frecuencias tipo Zipf: las primeras de la lista son las
+    mas usadas, como en un texto real.
+    """
+    weights = [1 / (i + 1) for i in range(len(words))]
+    return rng.choices(words, weights=weights, k=count)
+
+
+def percentile(sorted_values, p):
+    """
+    Funcion para obtener el percentil p de una lista ordenada (vecino mas cercano).
+    """
+    if(not sorted_values):
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(p / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def summarize(latencies_ns):
+    """
+    Funcion para resumir las latencias de una operacion: percentiles y promedio en
+    microsegundos y operaciones por segundo.
+    """
+    values = sorted(latencies_ns)
+    total = sum(values)
+    result = {"calls": len(values)}
+    for p in PERCENTILES:
+        result["p%d_us" % p] = percentile(values, p) / 1000
+    result["mean_us"] = total / len(values) / 1000 if values else 0.0
+    result["ops_per_second"] = len(values) / (total / 1e9) if total else 0.0
+    return result
+
+
+def time_calls(fn, inputs):
+    """
+    Funcion para medir la latencia de cada llamada de fn sobre las entradas dadas.
+    """
+    clock = time.perf_counter_ns
+    latencies = []
+    for args in inputs:
+        start = clock()
+        fn(*args)
+        latencies.append(clock() - start)
+    return summarize(latencies)
+
+
+def build_engine(engine, source, language, size, words):
+    """
+    Funcion para construir la Trie de un caso. Con wordfreq se usa el constructor completo
+    (incluye las conjugaciones de word_forms); con el vocabulario sintetico se insertan las
+    palabras generadas.
+    """
+    if(source == "wordfreq"):
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            return engine(language, size)
+    return engine.from_words(words, language)
+
+
+def measure_build(engine, source, language, size, words, memory):
+    """
+    Funcion para medir el tiempo de construccion y, opcionalmente, la memoria de la Trie.
+    La memoria se mide en una segunda construccion porque tracemalloc hace mas lenta la
+    ejecucion.
+    """
+    start = time.perf_counter()
+    trie = build_engine(engine, source, language, size, words)
+    result = {"seconds": time.perf_counter() - start, "words": trie.number_of_words}
+    if(trie.build_timings is not None):
+        # etapas de la construccion con wordfreq (ver Trie._build_dictionary)
+        result["stages"] = trie.build_timings
+
+    if(memory):
+        tracemalloc.start()
+        other = build_engine(engine, source, language, size, words)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del other
+        result["memory_mb"] = current / 2**20
+        result["peak_mb"] = peak / 2**20
+    return trie, result
+
+
+def enable_backend(trie, backend):
+    """
+    Funcion para activar la forma de buscar palabras similares que se va a medir.
+    """
+    if(backend == "walk"):
+        trie.enable_trie_walk()
+    elif(backend == "symspell"):
+        trie.enable_symspell()
+    elif(backend == "numpy"):
+        trie.enable_vectorized()
+
+
+def run_case(engine, source, language, size, queries, fuzzy_queries, seed, memory, backend="scalar",
+             query_cache=False):
+    """
+    Funcion para ejecutar todas las mediciones de un caso (motor, origen y tamaño del
+    diccionario). Las entradas se generan con la semilla dada, por lo que dos ejecuciones con
+    los mismos argumentos hacen exactamente las mismas consultas. Por defecto se apaga la
+    cache de resultados de consultas para medir el costo de cada operacion.
+    """
+    rng = random.Random(seed)
+    words = synthetic_words(size, seed) if source == "synthetic" else wordfreq_words(language, size)
+    trie, build = measure_build(engine, source, language, size, words, memory)
+    enable_backend(trie, backend)
+    if(not query_cache):
+        trie.disable_query_cache()
+    vocabulary = list(trie.all_words)
+    results = {"build": build}
+
+    # texto de entrenamiento para el modelo de palabras siguientes
+    corpus = zipf_sample(vocabulary, max(queries * 5, 10000), rng)
+    start = time.perf_counter()
+    for i in range(0, len(corpus), 50):
+        trie.save_next_words(corpus[i:i + 50])
+    results["save_next_words"] = {"seconds": time.perf_counter() - start, "words": len(corpus)}
+
+    hits = zipf_sample(vocabulary, queries, rng)
+    typos = [make_typo(w, rng) for w in zipf_sample(vocabulary, queries, rng)]
+    lookups = [(w,) for pair in zip(hits, typos) for w in pair][:queries]
+    prefixes = [(w[:rng.randint(1, min(4, len(w)))],) for w in hits]
+    texts = []
+    for _ in range(max(fuzzy_queries // 10, 1)):
+        text = zipf_sample(vocabulary, 50, rng)
+        # una de cada diez palabras tiene un error
+        texts.append(([make_typo(w, rng) if rng.random() < 0.1 else w for w in text],))
+
+    inputs = {
+        "search": lookups,
+        "starts_with": lookups,
+        "autocomplete_prefix": prefixes,
+        "get_similar_words": [(w,) for w in typos[:fuzzy_queries]],
+        "get_next_words": [(w,) for w in hits],
+        "get_most_frequent_words": [(10,)] * queries,
+        "insert": [(w,) for w in hits],
+        "process_text_optimized": texts,
+    }
+
+    for operation in OPERATIONS:
+        results[operation] = time_calls(getattr(trie, operation), inputs[operation])
+
+    return results
+
+
+def run(args):
+    """
+    Funcion para ejecutar todos los casos pedidos y regresar el reporte completo.
+    """
+    report = {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "args": vars(args),
+        },
+        "cases": {},
+    }
+
+    for engine_name in args.engines:
+        for source in args.sources:
+            for size in args.sizes:
+                for backend in args.fuzzy_backends:
+                    name = "%s-%s-%d" % (engine_name, source, size)
+                    if(backend != "scalar"):
+                        name += "-" + backend
+                    if(args.query_cache):
+                        name += "-cached"
+                    print("ejecutando %s..." % name, file=sys.stderr)
+                    report["cases"][name] = run_case(ENGINES[engine_name], source, args.language, size,
+                                                     args.queries, args.fuzzy_queries, args.seed, args.memory,
+                                                     backend, args.query_cache)
+
+    # memoria residente maxima del proceso (en Linux ru_maxrss esta en KB)
+    report["meta"]["max_rss_mb"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    return report
+
+
+def print_report(report):
+    """
+    Funcion para imprimir el reporte en forma de tabla.
+    """
+    for name, results in report["cases"].items():
+        build = results["build"]
+        line = "\n%s: construccion %.2f s, %d palabras" % (name, build["seconds"], build["words"])
+        if("peak_mb" in build):
+            line += ", memoria %.1f MB (pico %.1f MB)" % (build["memory_mb"], build["peak_mb"])
+        if("stages" in build):
+            line += "\n  etapas: %s" % format_timings(build["stages"])
+        print(line)
+        print("  %-26s %10s %10s %10s %12s" % ("operacion", "p50 us", "p90 us", "p99 us", "ops/s"))
+        for operation in OPERATIONS:
+            stats = results[operation]
+            print("  %-26s %10.2f %10.2f %10.2f %12.0f" %
+                  (operation, stats["p50_us"], stats["p90_us"], stats["p99_us"], stats["ops_per_second"]))
+
+
+def compare(base, new, threshold=0.10):
+    """
+    Funcion para comparar dos reportes. Una operacion se considera regresion si su p50 o su
+    promedio empeoran mas del umbral dado (por ejemplo 0.10 = 10%).
+
+    Parametros:
+    base : dict
+        reporte de referencia
+    new : dict
+        reporte a evaluar
+    threshold : float
+        cambio relativo permitido
+
+    Regresa la lista de regresiones encontradas como tuplas (caso, operacion, medida, cambio).
+    """
+    regressions = []
+    for name, results in new["cases"].items():
+        base_results = base["cases"].get(name)
+        if(base_results is None):
+            continue
+        print("\n%s" % name)
+        print("  %-26s %10s %10s %8s" % ("operacion", "base p50", "nuevo p50", "cambio"))
+
+        base_build = base_results["build"]["seconds"]
+        change = results["build"]["seconds"] / base_build - 1 if base_build else 0.0
+        print("  %-26s %9.2fs %9.2fs %+7.1f%%" % ("build", base_build, results["build"]["seconds"], change * 100))
+        if(change > threshold):
+            regressions.append((name, "build", "seconds", change))
+
+        for operation in OPERATIONS:
+            old_stats = base_results.get(operation)
+            stats = results.get(operation)
+            if(old_stats is None or stats is None):
+                continue
+            changes = {}
+            for measure in ("p50_us", "mean_us"):
+                changes[measure] = stats[measure] / old_stats[measure] - 1 if old_stats[measure] else 0.0
+            flag = ""
+            for measure, change in changes.items():
+                if(change > threshold):
+                    regressions.append((name, operation, measure, change))
+                    flag = "  <-- regresion"
+            print("  %-26s %10.2f %10.2f %+7.1f%%%s" %
+                  (operation, old_stats["p50_us"], stats["p50_us"], changes["p50_us"] * 100, flag))
+
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Pruebas de rendimiento de la Trie")
+    parser.add_argument("--engines", nargs="+", default=["dict"], choices=sorted(ENGINES),
+                        help="motores de almacenamiento a medir")
+    parser.add_argument("--sources", nargs="+", default=["synthetic"], choices=["synthetic", "wordfreq"],
+                        help="origen del vocabulario")
+    parser.add_argument("--sizes", nargs="+", type=int, default=[1000, 10000, 50000],
+                        help="tamaños del diccionario")
+    parser.add_argument("--fuzzy-backends", nargs="+", default=["scalar"], choices=FUZZY_BACKENDS,
+                        help="formas de buscar palabras similares a comparar")
+    parser.add_argument("--query-cache", action="store_true",
+                        help="mantener activa la cache de resultados de consultas de la Trie")
+    parser.add_argument("--language", default="en", help="idioma para wordfreq")
+    parser.add_argument("--queries", type=int, default=2000, help="consultas por operacion")
+    parser.add_argument("--fuzzy-queries", type=int, default=200,
+                        help="consultas para get_similar_words (y textos para process_text_optimized)")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de las entradas")
+    parser.add_argument("--no-memory", dest="memory", action="store_false",
+                        help="no medir la memoria de la construccion")
+    parser.add_argument("--output", help="archivo JSON donde guardar el reporte")
+    parser.add_argument("--compare", metavar="BASE", help="reporte JSON de referencia para detectar regresiones")
+    parser.add_argument("--against", metavar="NEW",
+                        help="con --compare, reporte JSON a evaluar en lugar de ejecutar las pruebas")
+    parser.add_argument("--threshold", type=float, default=0.10, help="cambio relativo permitido al comparar")
+    args = parser.parse_args()
+
+    if(args.against):
+        with open(args.against, encoding="utf-8") as f:
+            report = json.load(f)
+    else:
+        report = run(args)
+        print_report(report)
+        if(args.output):
+            with open(args.output, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+
+    if(args.compare):
+        with open(args.compare, encoding="utf-8") as f:
+            base = json.load(f)
+        regressions = compare(base, report, args.threshold)
+        if(regressions):
+            print("\n%d regresiones mayores a %.0f%%" % (len(regressions), args.threshold * 100))
+            sys.exit(1)
+        print("\nsin regresiones")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+from array import array
+import heapq
+import time
+import tracemalloc
+
+from phrase_index import PhraseIndex
+from trie import Trie
+
+# indice que indica que no existe un nodo (sin hijo o sin hermano)
+NO_NODE = -1
+
+
+class CompactTrie(Trie):
+    """
+    Motor de almacenamiento compacto para la Trie. En lugar de crear un objeto TrieNode
+    con su diccionario de hijos por cada caracter, los nodos son indices en arreglos planos
+    (representacion primer hijo / siguiente hermano):
+
+        labels[i]       : codigo del caracter del nodo i
+        first_child[i]  : indice del primer hijo del nodo i
+        next_sibling[i] : indice del siguiente hermano del nodo i
+        freqs[i]        : frecuencia de uso, 0 si el nodo no es final de palabra
+        word_ids[i]     : posicion en all_words de la palabra que termina en el nodo i
+
+    Mantiene la misma API publica que Trie (insert, search, starts_with,
+    get_node_freq y el recorrido de autocomplete_prefix) y el resto de operaciones se heredan.
+
+    No guarda las listas de palabras mas frecuentes de cada nodo (TrieNode.top): ocuparian
+    TOP_K_CACHE posiciones por nodo, mas que el resto de los arreglos juntos. Por eso
+    autocomplete_prefix recorre el subarbol del prefijo y su costo crece con el numero de
+    palabras que empiezan con el; el tiempo independiente del tamaño del subarbol solo se
+    cumple con el motor de diccionarios (ver compare_engines). get_most_frequent_words usa
+    siempre el heap de frecuencias.
+    """
+    ENGINE = "compact"
+
+    def _init_storage(self):
+        """
+        Inicializa los arreglos de nodos con la raiz en el indice 0.
+        """
+        self.labels = array("I", [0])
+        self.first_child = array("i", [NO_NODE])
+        self.next_sibling = array("i", [NO_NODE])
+        self.freqs = array("I", [0])
+        self.word_ids = array("i", [NO_NODE])
+        self.root = 0
+        # nodos liberados al descartar palabras, se reutilizan al insertar
+        self._free_nodes = []
+
+    def _walk(self, word):
+        """
+        Funcion para recorrer la estructura siguiendo los caracteres de la palabra.
+        Regresa el indice del ultimo nodo o NO_NODE si la palabra no coincide.
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        node = self.root
+        for ch in word:
+            code = ord(ch)
+            # buscamos entre los hermanos el nodo con el caracter
+            node = first_child[node]
+            while node != NO_NODE and labels[node] != code:
+                node = next_sibling[node]
+            if(node == NO_NODE):
+                break
+        return node
+
+    def insert(self, word, count=1):
+        """
+        Operacion para insertar una palabra en la estructura.
+
+        Parametros:
+            self: Instancia de la clase CompactTrie
+            word: palabra o frase a insertar
+            count: numero de veces que se agrega la palabra
+        """
+        if(self._loader is not None and self._loader.defer(self.insert, (word, count))):
+            return
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        node = self.root
+        word = word.lower()
+
+        for ch in word:
+            code = ord(ch)
+            # buscamos el hijo recordando el ultimo hermano para agregar al final
+            child = first_child[node]
+            last = NO_NODE
+            while child != NO_NODE and labels[child] != code:
+                last = child
+                child = next_sibling[child]
+
+            if(child == NO_NODE):
+                if(self._free_nodes):
+                    # reutilizamos un nodo liberado
+                    child = self._free_nodes.pop()
+                    labels[child] = code
+                    first_child[child] = NO_NODE
+                    next_sibling[child] = NO_NODE
+                    self.freqs[child] = 0
+                    self.word_ids[child] = NO_NODE
+                else:
+                    # agregamos un nodo nuevo al final de los arreglos
+                    child = len(labels)
+                    labels.append(code)
+                    first_child.append(NO_NODE)
+                    next_sibling.append(NO_NODE)
+                    self.freqs.append(0)
+                    self.word_ids.append(NO_NODE)
+                # se conserva el orden de insercion de los hijos
+                if(last == NO_NODE):
+                    first_child[node] = child
+                else:
+                    next_sibling[last] = child
+
+            node = child
+
+        if(self.freqs[node] == 0):
+            # agregamos la palabra a la lista de nuestras palabras usadas
+            self.word_ids[node] = self._new_word_id(word)
+
+        # incrementamos la frecuencia de uso de la palabra
+        self.freqs[node] += count
+
+        if(self._freq_heap is not None):
+            with self._heap_lock:
+                self._freq_dirty.add(node)
+
+        self._invalidate_prefixes(word)
+        if(self.learned is not None and self.word_ids[node] >= self.base_words):
+            self._learn(word, count)
+
+    def _load_words(self, words):
+        """
+        Carga una lista de palabras distintas en la estructura vacia, con frecuencia 1 y su
+        posicion de la lista como word_id. Al recorrerlas en orden alfabetico los nodos se
+        agregan en preorden y el ultimo hijo de cada nodo es el nodo del camino de la
+        palabra anterior, por lo que cada hermano se enlaza sin recorrer la lista de hijos.
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        freqs = self.freqs
+        word_ids = self.word_ids
+
+        path = [self.root]
+        previous = ""
+        for word_id in sorted(range(len(words)), key=words.__getitem__):
+            word = words[word_id]
+            common = 0
+            limit = min(len(word), len(previous))
+            while common < limit and word[common] == previous[common]:
+                common += 1
+            # el hijo de path[common] que sigue el camino anterior es el ultimo hermano
+            last = path[common + 1] if len(path) > common + 1 else NO_NODE
+            del path[common + 1:]
+
+            node = path[-1]
+            for char in word[common:]:
+                child = len(labels)
+                labels.append(ord(char))
+                first_child.append(NO_NODE)
+                next_sibling.append(NO_NODE)
+                freqs.append(0)
+                word_ids.append(NO_NODE)
+                if(last == NO_NODE):
+                    first_child[node] = child
+                else:
+                    next_sibling[last] = child
+                    last = NO_NODE
+                path.append(child)
+                node = child
+            freqs[node] = 1
+            word_ids[node] = word_id
+            previous = word
+
+        self.all_words = list(words)
+        self.all_words_set = set(words)
+        self.number_of_words = len(self.all_words_set)
+        self.base_words = len(self.all_words)
+        self.vocab_version += 1
+
+    def _remove_word(self, word):
+        """
+        Quita una palabra aprendida de los arreglos: su frecuencia pasa a 0 y los nodos que
+        quedan sin hijos se desconectan de su padre y se guardan para reutilizarlos. Las
+        palabras del diccionario base no se quitan.
+
+        Regresa la posicion que tenia la palabra en all_words, o None si no se quito.
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        node = self.root
+        path = [node]
+        for ch in word:
+            code = ord(ch)
+            node = first_child[node]
+            while node != NO_NODE and labels[node] != code:
+                node = next_sibling[node]
+            if(node == NO_NODE):
+                return None
+            path.append(node)
+        word_id = self.word_ids[node]
+        if(self.freqs[node] == 0 or word_id < self.base_words):
+            return None
+
+        self.freqs[node] = 0
+
+        # desconectamos los nodos sin hijos desde el final de la palabra
+        depth = len(word)
+        while depth > 0 and first_child[path[depth]] == NO_NODE and self.freqs[path[depth]] == 0:
+            node = path[depth]
+            parent = path[depth - 1]
+            if(first_child[parent] == node):
+                first_child[parent] = next_sibling[node]
+            else:
+                sibling = first_child[parent]
+                while next_sibling[sibling] != node:
+                    sibling = next_sibling[sibling]
+                next_sibling[sibling] = next_sibling[node]
+            self._free_nodes.append(node)
+            depth -= 1
+        return word_id
+
+    def search(self, word):
+        """
+        Operacion para buscar una palabra en la estructura.
+
+        Parametros:
+            self: Instancia de la clase CompactTrie
+            word: palabra a buscar
+        """
+        node = self._walk(word)
+        return node != NO_NODE and self.freqs[node] > 0
+
+    def get_node_freq(self, word):
+        """
+        Funcion para obtener la frecuencia de uso de la palabra almacenada en su ultimo nodo.
+
+        Parametros:
+            self: Instancia de la clase CompactTrie
+            word: palabra a buscar
+        """
+        node = self._walk(word)
+        if(node == NO_NODE):
+            return 0
+        return self.freqs[node]
+
+    def starts_with(self, word, len=4):
+        """
+        Funcion para verificar si existe una palabra que comience con las primeras
+        letras de la palabra dada.
+
+        Parametros:
+            self: Instancia de la clase CompactTrie
+            word: palabra a buscar
+            len: longitud de palabras iniciales a buscar
+        """
+        return self._walk(word[:len]) != NO_NODE
+
+    def _subtree_words(self, node):
+        """
+        Generador de los nodos finales de palabra dentro del subarbol de un nodo.
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if(self.freqs[node] > 0):
+                yield node
+            child = self.first_child[node]
+            while child != NO_NODE:
+                stack.append(child)
+                child = self.next_sibling[child]
+
+    def _autocomplete(self, prefix, k):
+        """
+        Funcion para obtener las k palabras mas frecuentes que comienzan con el prefijo dado.
+        Para no gastar memoria este motor no guarda listas por nodo y recorre el subarbol.
+
+        Parametros:
+            self: Instancia de la clase CompactTrie
+            prefix: prefijo a completar
+            k: numero de sugerencias a obtener
+        """
+        node = self._walk(prefix)
+        if(node == NO_NODE):
+            return []
+
+        freqs = self.freqs
+        word_ids = self.word_ids
+        top = heapq.nsmallest(k, self._subtree_words(node), key=lambda n: (-freqs[n], word_ids[n]))
+        return [self.all_words[word_ids[n]] for n in top]
+
+    def get_most_frequent_words(self, top_n=10):
+        """
+        Funcion para obtener las palabras utilizadas con mayor frecuencia. Este motor no
+        guarda listas por nodo, por lo que siempre se consulta el heap de frecuencias.
+
+        Parametros:
+            self: Instancia de la clase CompactTrie
+            top_n: numero de palabras a obtener
+        """
+        return self._most_frequent_from_heap(top_n)
+
+    def _node_rank(self, node):
+        """
+        Llave de ordenamiento (-frecuencia, posicion en all_words) de un nodo final de palabra.
+        """
+        return (-self.freqs[node], self.word_ids[node])
+
+    def _word_nodes(self):
+        """
+        Generador de todos los nodos finales de palabra de la estructura.
+        """
+        return self._subtree_words(self.root)
+
+    def _word_prefixes(self, word, start):
+        """
+        Generador de las palabras del diccionario que empiezan en la posicion start de word,
+        recorriendo los arreglos de nodos.
+
+        Regresa tuplas (posicion final, frecuencia, posicion en all_words).
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        node = self.root
+        for end in range(start + 1, len(word) + 1):
+            code = ord(word[end - 1])
+            node = first_child[node]
+            while node != NO_NODE and labels[node] != code:
+                node = next_sibling[node]
+            if(node == NO_NODE):
+                return
+            if(self.freqs[node] > 0):
+                yield end, self.freqs[node], self.word_ids[node]
+
+    def _fuzzy_matches(self, word, max_distance):
+        """
+        Funcion para obtener las palabras a distancia de edicion menor o igual a
+        max_distance recorriendo los arreglos de nodos, con una fila de la matriz dp
+        por nivel y poda de subarboles igual que en Trie.
+
+        Regresa una lista de tuplas (distancia, posicion en all_words, palabra).
+        """
+        labels = self.labels
+        first_child = self.first_child
+        next_sibling = self.next_sibling
+        matches = []
+        word_size = len(word)
+        columns = range(1, word_size + 1)
+
+        first_row = list(range(word_size + 1))
+        stack = []
+        child = first_child[self.root]
+        while child != NO_NODE:
+            stack.append((child, 1, first_row))
+            child = next_sibling[child]
+        visited = 0
+
+        while stack:
+            node, depth, prev_row = stack.pop()
+            visited += 1
+            ch = chr(labels[node])
+
+            row = [depth]
+            for j in columns:
+                delete_cost = prev_row[j] + 1
+                insert_cost = row[j - 1] + 1
+                if(word[j - 1] == ch):
+                    subst_cost = prev_row[j - 1]
+                else:
+                    subst_cost = prev_row[j - 1] + 1
+
+                min_cost = delete_cost
+                if(min_cost > insert_cost):
+                    min_cost = insert_cost
+                if(min_cost > subst_cost):
+                    min_cost = subst_cost
+                row.append(min_cost)
+
+            dist = row[word_size]
+            if(self.freqs[node] > 0 and dist <= max_distance):
+                word_id = self.word_ids[node]
+                matches.append((dist, word_id, self.all_words[word_id]))
+
+            # podamos el subarbol si ninguna palabra puede quedar dentro de la distancia
+            if(min(row) <= max_distance):
+                child = first_child[node]
+                while child != NO_NODE:
+                    stack.append((child, depth + 1, row))
+                    child = next_sibling[child]
+
+        if(self._stats is not None):
+            self._stats.record_fuzzy(visited, len(matches))
+        return matches
+
+    def _get_state(self):
+        """
+        Obtiene el estado serializable de la estructura. Los arreglos se guardan tal cual.
+        """
+        return {
+            "labels": self.labels,
+            "first_child": self.first_child,
+            "next_sibling": self.next_sibling,
+            "freqs": self.freqs,
+            "word_ids": self.word_ids,
+            "free_nodes": self._free_nodes,
+            "all_words": self.all_words,
+            "base_words": self.base_words,
+            "free_ids": self._free_ids,
+            "next_model": self.next_model,
+            "phrases": self.phrases.get_state(),
+        }
+
+    def _restore_state(self, state):
+        """
+        Reconstruye la estructura a partir de un estado obtenido con _get_state.
+        """
+        self.labels = state["labels"]
+        self.first_child = state["first_child"]
+        self.next_sibling = state["next_sibling"]
+        self.freqs = state["freqs"]
+        self.word_ids = state["word_ids"]
+        self.root = 0
+        self._free_nodes = state["free_nodes"]
+        self._restore_words(state)
+        self.next_model = state["next_model"]
+        self.phrases = PhraseIndex.from_state(self.language, state["phrases"])
+        self._rebuild_vocab_index(self.vocab_index.anchor)
+
+
+def compare_engines(language="en", dict_size=50000, lookups=100000):
+    """
+    Funcion para comparar la memoria y la latencia de busqueda de la Trie basada en
+    diccionarios contra CompactTrie con el mismo vocabulario.
+
+    El autocompletado se mide con prefijos de 3 caracteres y de 1 caracter (el peor caso:
+    los subarboles mas grandes). Con el motor de diccionarios ambos cuestan lo mismo
+    porque cada nodo guarda sus palabras mas frecuentes; CompactTrie no las guarda para
+    ahorrar memoria y recorre el subarbol, por lo que no cumple con un tiempo independiente
+    del tamaño del subarbol y su latencia crece con el vocabulario.
+
+    Parametros:
+    language : str
+        idioma del diccionario
+    dict_size : int
+        numero de palabras base del diccionario
+    lookups : int
+        numero de busquedas para medir la latencia
+    """
+    results = {}
+
+    # cargamos antes las listas de palabras para no medir la cache de las librerias
+    Trie(language, 1)
+
+    for engine in (Trie, CompactTrie):
+        tracemalloc.start()
+        trie = engine(language, dict_size)
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        # los prefijos se repiten, sin la cache de consultas se mide el recorrido de cada motor
+        trie.disable_query_cache()
+
+        words = trie.all_words
+        queries = [words[i % len(words)] for i in range(lookups)]
+
+        start = time.perf_counter()
+        for w in queries:
+            trie.search(w)
+        search_us = (time.perf_counter() - start) / lookups * 1e6
+
+        start = time.perf_counter()
+        for w in queries[:lookups // 10]:
+            trie.autocomplete_prefix(w[:3])
+        autocomplete_us = (time.perf_counter() - start) / (lookups // 10) * 1e6
+
+        start = time.perf_counter()
+        for w in queries[:lookups // 100]:
+            trie.autocomplete_prefix(w[:1])
+        autocomplete_short_us = (time.perf_counter() - start) / (lookups // 100) * 1e6
+
+        results[engine.ENGINE] = {
+            "memory_mb": current / 2**20,
+            "peak_mb": peak / 2**20,
+            "search_us": search_us,
+            "autocomplete_us": autocomplete_us,
+            "autocomplete_short_us": autocomplete_short_us,
+        }
+
+    for engine, stats in results.items():
+        print("%-8s memoria: %7.1f MB (pico %7.1f MB)  search: %5.2f us  autocomplete: %6.2f us (1 letra: %8.2f us)" %
+              (engine, stats["memory_mb"], stats["peak_mb"], stats["search_us"], stats["autocomplete_us"],
+               stats["autocomplete_short_us"]))
+
+    return results
@@ -0,0 +1,144 @@
+import collections
+import threading
+
+# numero de modificaciones pendientes con el que se aplican sin esperar a flush
+WRITE_BATCH_SIZE = 256
+
+
+class ConcurrentTrie:
+    """
+    Envoltura de una Trie (o CompactTrie) para compartirla entre varios hilos: muchos
+    lectores y un solo escritor.
+
+    Las consultas (search, autocomplete_prefix, get_similar_words, get_next_words, ...) se
+    delegan directamente a la Trie sin tomar ningun candado. La Trie publica cada cambio con
+    una sola asignacion (las listas de palabras mas frecuentes y de palabras siguientes se
+    reemplazan en lugar de modificarse y una palabra nueva se marca como final despues de
+    tener su posicion), por lo que una lectura ve el estado anterior o el nuevo de cada
+    palabra, nunca uno intermedio.
+
+    Las modificaciones (insert, save_next_words, insert_paragraph) se guardan en una cola y
+    se aplican por lotes, en el orden en que llegaron, con el candado de escritura: al
+    juntarse WRITE_BATCH_SIZE modificaciones o al llamar a flush. Despues de flush el
+    resultado es el mismo que si todas las operaciones se hubieran ejecutado en un solo hilo
+    en ese orden.
+    """
+
+    def __init__(self, trie, batch_size=WRITE_BATCH_SIZE):
+        self.trie = trie
+        self.batch_size = batch_size
+        # modificaciones pendientes: (funcion, argumentos)
+        self._updates = collections.deque()
+        self._write_lock = threading.Lock()
+
+    def __getattr__(self, name):
+        # las consultas que no se redefinen aqui se delegan a la Trie
+        return getattr(self.trie, name)
+
+    def _enqueue(self, fn, args):
+        """
+        Funcion para agregar una modificacion a la cola y aplicar el lote si esta lleno.
+        """
+        self._updates.append((fn, args))
+        if(len(self._updates) >= self.batch_size):
+            self.flush()
+
+    def flush(self):
+        """
+        Funcion para aplicar todas las modificaciones pendientes. Solo un hilo escribe a la
+        vez; las lecturas continuan mientras tanto.
+
+        Regresa el numero de modificaciones aplicadas.
+        """
+        applied = 0
+        with self._write_lock:
+            while self._updates:
+                fn, args = self._updates.popleft()
+                fn(*args)
+                applied += 1
+        return applied
+
+    def pending_updates(self):
+        """
+        Funcion para obtener el numero de modificaciones que todavia no se aplican.
+        """
+        return len(self._updates)
+
+    def insert(self, word, count=1):
+        """
+        Funcion para aumentar la frecuencia de una palabra (o agregarla). El cambio se aplica
+        con el siguiente lote.
+
+        Parametros:
+        self : objeto tipo ConcurrentTrie
+            Instancia de la clase ConcurrentTrie que llama a este método.
+        word : str
+            palabra a insertar
+        count : int
+            numero de veces que se agrega la palabra
+        """
+        self._enqueue(self.trie.insert, (word, count))
+
+    def save_next_words(self, words, start=1):
+        """
+        Funcion para aprender una secuencia de palabras. El cambio se aplica con el siguiente
+        lote.
+
+        Parametros:
+        self : objeto tipo ConcurrentTrie
+            Instancia de la clase ConcurrentTrie que llama a este método.
+        words : list
+            palabras en el orden en que fueron escritas
+        start : int
+            posicion de la primera palabra que se cuenta, las anteriores solo son contexto
+        """
+        self._enqueue(self.trie.save_next_words, (list(words), start))
+
+    def insert_paragraph(self, text):
+        """
+        Funcion para agregar las frases de un texto al indice de frases. Se aplica con el
+        siguiente lote.
+        """
+        self._enqueue(self.trie.insert_paragraph, (text,))
+
+    def get_phrase_suggestions(self, prefix, n_suggestions=5):
+        """
+        Funcion para obtener las frases mas frecuentes que empiezan con el prefijo. El indice
+        de frases reorganiza sus nodos al insertar, por lo que esta consulta usa el candado
+        de escritura.
+        """
+        with self._write_lock:
+            return self.trie.get_phrase_suggestions(prefix, n_suggestions)
+
+    def process_text_optimized(self, words_list, suggestion_size=3):
+        """
+        Funcion para clasificar las palabras de un texto igual que Trie.process_text_batch:
+        la clasificacion solo lee la Trie y el aumento de frecuencias y la secuencia de
+        palabras se agregan a la cola de modificaciones.
+
+        Parametros:
+        self : objeto tipo ConcurrentTrie
+            Instancia de la clase ConcurrentTrie que llama a este método.
+        words_list : list
+            lista de palabras a procesar.
+        suggestion_size : int
+            numero maximo de sugerencias por palabra
+
+        Regresa las listas (found, similar, unfound).
+        """
+        words_lower = [word.lower() for word in words_list]
+        # un solo proceso: el pool de procesos no se comparte entre hilos
+        verdicts = self.trie.classify_words(words_lower, suggestion_size, workers=1)
+        found_words, similar_words, unfound_words = self.trie.split_verdicts(words_lower, verdicts)
+
+        for word in found_words:
+            self.insert(word)
+        self.save_next_words(words_list)
+        return found_words, similar_words, unfound_words
+
+    def process_text_batch(self, words_list, suggestion_size=3, workers=None, min_parallel=64):
+        """
+        Igual que process_text_optimized; workers y min_parallel se ignoran porque el pool de
+        procesos no se comparte entre hilos.
+        """
+        return self.process_text_optimized(words_list, suggestion_size)
@@ -0,0 +1,166 @@
+import argparse
+import os
+import re
+import time
+from collections import Counter
+
+# mismas palabras que reconoce el editor
+WORD_PATTERN = re.compile(r"\b\w+\b")
+WORD_CHAR = re.compile(r"\w")
+
+# directorio donde el editor guarda los diccionarios precalculados
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
+
+# tamaño por defecto de cada parte leida (en caracteres)
+CHUNK_SIZE = 1 << 20
+
+
+def read_chunks(source, chunk_size=CHUNK_SIZE, encoding="utf-8"):
+    """
+    Generador de las partes de un texto sin cargarlo completo en memoria.
+
+    Parametros:
+    source : str, archivo o iterable
+        ruta de un archivo, archivo abierto en modo texto o iterable de cadenas (por ejemplo
+        una lista de textos o las lineas de otro generador)
+    chunk_size : int
+        numero de caracteres a leer en cada parte de un archivo
+    encoding : str
+        codificacion del archivo cuando se da su ruta
+    """
+    if(isinstance(source, (str, os.PathLike))):
+        with open(source, "r", encoding=encoding, errors="replace") as f:
+            yield from read_chunks(f, chunk_size)
+        return
+
+    if(hasattr(source, "read")):
+        while True:
+            chunk = source.read(chunk_size)
+            if(not chunk):
+                return
+            yield chunk
+        return
+
+    yield from source
+
+
+def tokenize_chunks(chunks):
+    """
+    Generador de las palabras (en minusculas) de cada parte del texto. Una palabra cortada
+    al final de una parte se completa con el inicio de la siguiente.
+
+    Parametros:
+    chunks : iterable
+        partes del texto en orden
+
+    Regresa tuplas (numero de caracteres de la parte, lista de palabras).
+    """
+    carry = ""
+    for chunk in chunks:
+        text = carry + chunk.lower()
+        words = WORD_PATTERN.findall(text)
+        carry = ""
+        if(words and WORD_CHAR.match(text[-1:])):
+            # la ultima palabra puede continuar en la siguiente parte
+            carry = words.pop()
+        yield len(chunk), words
+
+    if(carry):
+        yield 0, [carry]
+
+
+def ingest_corpus(trie, source, chunk_size=CHUNK_SIZE, learn_new_words=False, encoding="utf-8", progress=None):
+    """
+    Funcion para aprender las frecuencias de palabras y las secuencias de palabras siguientes
+    de un texto grande. El texto se lee por partes y solo se guarda en memoria una parte a la
+    vez; no se buscan palabras similares ni se hace ninguna revision ortografica.
+
+    Parametros:
+    trie : objeto tipo Trie
+        estructura que aprende el texto
+    source : str, archivo o iterable
+        ruta de un archivo, archivo abierto o iterable de cadenas (ver read_chunks)
+    chunk_size : int
+        numero de caracteres a leer en cada parte
+    learn_new_words : bool
+        si es True las palabras que no estan en el diccionario se agregan; si es False
+        (por defecto) solo se aumenta la frecuencia de las conocidas, para no agregar errores
+        de escritura al vocabulario
+    encoding : str
+        codificacion del archivo cuando se da su ruta
+    progress : function
+        funcion opcional que recibe las estadisticas despues de cada parte
+
+    Regresa un diccionario con el numero de caracteres, palabras leidas, palabras contadas,
+    palabras nuevas, segundos y velocidad de procesamiento.
+    """
+    stats = {
+        "chars": 0,
+        "tokens": 0,
+        "counted_tokens": 0,
+        "new_words": 0,
+        "seconds": 0.0,
+        "tokens_per_second": 0.0,
+        "mb_per_second": 0.0,
+    }
+    # ultimas palabras de la parte anterior, sirven de contexto para la siguiente
+    history = []
+    context_size = trie.next_model.order - 1
+    start = time.perf_counter()
+
+    for size, words in tokenize_chunks(read_chunks(source, chunk_size, encoding)):
+        # las frecuencias se acumulan por parte para actualizar cada palabra una sola vez
+        words_before = trie.number_of_words
+        for word, count in Counter(words).items():
+            if(learn_new_words or trie.search(word)):
+                trie.insert(word, count)
+                stats["counted_tokens"] += count
+        stats["new_words"] += trie.number_of_words - words_before
+
+        if(words):
+            trie.save_next_words(history + words, start=len(history))
+            history = words[-context_size:]
+
+        stats["chars"] += size
+        stats["tokens"] += len(words)
+        seconds = time.perf_counter() - start
+        stats["seconds"] = seconds
+        if(seconds > 0):
+            stats["tokens_per_second"] = stats["tokens"] / seconds
+            stats["mb_per_second"] = stats["chars"] / 2**20 / seconds
+        if(progress is not None):
+            progress(stats)
+
+    return stats
+
+
+def main():
+    """
+    Funcion para entrenar el diccionario de un idioma desde la linea de comandos. Lo aprendido
+    se guarda como estado del usuario en el directorio de snapshots, el mismo que usa el editor.
+    """
+    from dictionary_manager import DictionaryManager
+
+    parser = argparse.ArgumentParser(description="Aprende frecuencias y secuencias de palabras de archivos de texto")
+    parser.add_argument("files", nargs="+", help="archivos de texto a procesar")
+    parser.add_argument("--language", default="en", help="idioma del diccionario (en o es)")
+    parser.add_argument("--dict-size", type=int, default=50000, help="numero de palabras base del diccionario")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="directorio de snapshots")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="caracteres por parte")
+    parser.add_argument("--learn-new-words", action="store_true", help="agregar palabras que no estan en el diccionario")
+    args = parser.parse_args()
+
+    dictionaries = DictionaryManager(args.dict_size, args.snapshot_dir)
+    trie = dictionaries.get(args.language)
+
+    for path in args.files:
+        stats = ingest_corpus(trie, path, args.chunk_size, args.learn_new_words)
+        print("%s: %d palabras (%d contadas, %d nuevas) en %.1f s, %.0f palabras/s, %.2f MB/s" %
+              (path, stats["tokens"], stats["counted_tokens"], stats["new_words"], stats["seconds"],
+               stats["tokens_per_second"], stats["mb_per_second"]))
+
+    dictionaries.save_all()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,167 @@
+import multiprocessing
+import os
+import threading
+import time
+
+# numero de palabras base que procesa cada tarea del pool de procesos
+BUILD_CHUNK_SIZE = 2000
+# numero minimo de palabras base para usar el pool de procesos
+MIN_PARALLEL_BUILD = 5000
+
+
+def top_words(language, dict_size):
+    """
+    Funcion para obtener las dict_size palabras mas usadas de un idioma, de la mas a la
+    menos usada. wordfreq se importa hasta que se necesita porque cargarlo tarda.
+
+    Parametros:
+    language : str
+        idioma del diccionario
+    dict_size : int
+        numero de palabras base
+    """
+    from wordfreq import top_n_list
+
+    return top_n_list(language, dict_size)
+
+
+def word_forms(word):
+    """
+    Funcion para obtener las conjugaciones de una palabra en el orden en que se agregan al
+    diccionario: por categoria gramatical en el orden de get_word_forms y, dentro de cada
+    categoria, en orden alfabetico para que el resultado no dependa del orden de los
+    conjuntos (que cambia entre procesos). word_forms (y con el nltk) se importa con la
+    primera palabra.
+
+    Parametros:
+    word : str
+        palabra base
+    """
+    from word_forms.word_forms import get_word_forms
+
+    forms = get_word_forms(word)
+    return tuple(form for pos in forms for form in sorted(forms[pos]))
+
+
+def _word_forms_chunk(words):
+    """
+    Funcion que ejecuta cada proceso del pool: las conjugaciones de un bloque de palabras.
+    """
+    return [word_forms(word) for word in words]
+
+
+def expand_word_forms(words, workers=None, chunk_size=BUILD_CHUNK_SIZE, min_parallel=MIN_PARALLEL_BUILD):
+    """
+    Funcion para obtener las conjugaciones de una lista de palabras, repartiendo bloques
+    de chunk_size palabras entre un pool de procesos si la lista es suficientemente grande.
+
+    Los procesos solo se crean con fork si se llama desde el hilo principal sin otros hilos:
+    un proceso creado con fork hereda tomados los candados que otro hilo tenia en ese
+    momento. En otro caso se usa spawn y cada proceso carga word_forms por su cuenta; como
+    spawn vuelve a importar el programa principal, este debe protegerse con
+    if __name__ == "__main__".
+
+    Parametros:
+    words : list
+        palabras base
+    workers : int
+        numero de procesos, por defecto el numero de CPUs
+    chunk_size : int
+        palabras por tarea
+    min_parallel : int
+        numero minimo de palabras para usar el pool de procesos
+
+    Regresa una lista con las conjugaciones de cada palabra, en el mismo orden.
+    """
+    if(workers is None):
+        workers = os.cpu_count() or 1
+    if(workers <= 1 or len(words) < min_parallel):
+        return _word_forms_chunk(words)
+
+    chunks = [words[i:i + chunk_size] for i in range(0, len(words), chunk_size)]
+    only_thread = threading.current_thread() is threading.main_thread() and threading.active_count() == 1
+    if(only_thread and "fork" in multiprocessing.get_all_start_methods()):
+        # se cargan los datos de word_forms antes de crear los procesos para que los
+        # hereden en lugar de cargarlos cada uno
+        results = [_word_forms_chunk(chunks[0])]
+        with multiprocessing.get_context("fork").Pool(workers) as pool:
+            results.extend(pool.imap(_word_forms_chunk, chunks[1:]))
+    else:
+        with multiprocessing.get_context("spawn").Pool(workers) as pool:
+            results = list(pool.imap(_word_forms_chunk, chunks))
+    return [forms for chunk in results for forms in chunk]
+
+
+def merge_words(words, forms, seen=None):
+    """
+    Funcion para obtener el vocabulario sin repetidos, en el mismo orden en que lo
+    insertaba la construccion palabra por palabra: cada palabra base seguida de sus
+    conjugaciones. Las conjugaciones de una palabra base que ya estaba en el vocabulario
+    (por ser conjugacion de una anterior) no se agregan.
+
+    Parametros:
+    words : list
+        palabras base
+    forms : list
+        conjugaciones de cada palabra base
+    seen : set
+        palabras de los bloques anteriores, para procesar el vocabulario por bloques; se
+        le agregan las palabras nuevas
+
+    Regresa la lista de palabras en minusculas que no estaban en seen.
+    """
+    if(seen is None):
+        seen = set()
+    vocabulary = []
+    for word, extra in zip(words, forms):
+        word = word.lower()
+        if(word in seen):
+            continue
+        seen.add(word)
+        vocabulary.append(word)
+        for form in extra:
+            form = form.lower()
+            if(form not in seen):
+                seen.add(form)
+                vocabulary.append(form)
+    return vocabulary
+
+
+def build_vocabulary(language, dict_size, workers=None):
+    """
+    Funcion para obtener el vocabulario del diccionario base de un idioma: las dict_size
+    palabras mas usadas y sus conjugaciones.
+
+    Parametros:
+    language : str
+        idioma del diccionario
+    dict_size : int
+        numero de palabras base
+    workers : int
+        numero de procesos para calcular las conjugaciones
+
+    Regresa una tupla (palabras en orden, segundos de cada etapa).
+    """
+    timings = {}
+    start = time.perf_counter()
+    words = top_words(language, dict_size)
+    timings["download"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    forms = expand_word_forms(words, workers)
+    timings["forms"] = time.perf_counter() - start
+
+    start = time.perf_counter()
+    vocabulary = merge_words(words, forms)
+    timings["dedupe"] = time.perf_counter() - start
+    return vocabulary, timings
+
+
+def format_timings(timings):
+    """
+    Funcion para obtener un texto con los segundos de cada etapa de la construccion.
+    """
+    names = {"download": "palabras base", "forms": "conjugaciones", "dedupe": "repetidos",
+             "insert": "insercion", "indexes": "indices",
+             "background": "segundo plano"}
+    return ", ".join("%s %.2f s" % (names.get(stage, stage), seconds) for stage, seconds in timings.items())
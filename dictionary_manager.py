@@ -0,0 +1,110 @@
+from collections import OrderedDict
+
+import snapshot
+from trie import Trie
+
+
+class DictionaryManager:
+    """
+    Administra una Trie por idioma. Cada diccionario se carga la primera vez que se usa y
+    se conserva en memoria con sus frecuencias y secuencias aprendidas, por lo que cambiar
+    de idioma despues de la primera carga no reconstruye nada.
+
+    Opcionalmente se limita el numero de idiomas o de palabras en memoria; al superarse se
+    descarta el idioma usado hace mas tiempo (LRU). Si hay un directorio de snapshots, el
+    estado aprendido del idioma descartado se guarda en disco y se recupera al volver a usarlo.
+    Con learned_words cada idioma limita ademas sus palabras aprendidas (ver
+    Trie.enable_learned_vocabulary). Con progressive los diccionarios que se construyen
+    (sin snapshot) se pueden usar con sus palabras mas usadas mientras el resto se carga
+    en segundo plano (ver ProgressiveLoader).
+    """
+
+    def __init__(self, dict_size=50000, snapshot_dir=None, max_languages=None, max_words=None, engine=Trie,
+                 learned_words=None, progressive=False):
+        self.dict_size = dict_size
+        self.snapshot_dir = snapshot_dir
+        self.max_languages = max_languages
+        self.max_words = max_words
+        self.engine = engine
+        self.learned_words = learned_words
+        self.progressive = progressive
+        # idioma -> Trie, en orden de uso (el ultimo es el mas reciente)
+        self._tries = OrderedDict()
+
+    def get(self, language):
+        """
+        Funcion para obtener la Trie de un idioma, cargandola si no esta en memoria.
+
+        Parametros:
+        self : objeto tipo DictionaryManager
+            Instancia de la clase DictionaryManager que llama a este método.
+        language : str
+            idioma del diccionario
+        """
+        trie = self._tries.get(language)
+        if(trie is not None):
+            self._tries.move_to_end(language)
+            return trie
+
+        trie = self._load(language)
+        if(self.learned_words is not None):
+            trie.enable_learned_vocabulary(self.learned_words)
+        self._tries[language] = trie
+        self._evict()
+        return trie
+
+    def loaded_languages(self):
+        """
+        Funcion para obtener los idiomas en memoria, del menos al mas recientemente usado.
+        """
+        return list(self._tries)
+
+    def _user_path(self, language):
+        """
+        Funcion para obtener la ruta del snapshot con el estado aprendido de un idioma.
+        """
+        return snapshot.user_snapshot_path(self.snapshot_dir, language, self.dict_size, self.engine.ENGINE)
+
+    def _load(self, language):
+        """
+        Funcion para cargar la Trie de un idioma. Primero se intenta recuperar el estado
+        aprendido guardado y si no existe se carga el diccionario base.
+        """
+        if(self.snapshot_dir is not None):
+            state = snapshot.load_snapshot(self._user_path(language), language, self.dict_size, self.engine.ENGINE)
+            if(state is not None):
+                return self.engine.from_state(language, self.dict_size, state)
+
+        return self.engine(language, self.dict_size, self.snapshot_dir, progressive=self.progressive)
+
+    def _evict(self):
+        """
+        Funcion para descartar los idiomas usados hace mas tiempo mientras se superen los
+        limites. El idioma mas reciente nunca se descarta.
+        """
+        while len(self._tries) > 1:
+            over_languages = self.max_languages is not None and len(self._tries) > self.max_languages
+            total_words = sum(trie.number_of_words for trie in self._tries.values())
+            over_words = self.max_words is not None and total_words > self.max_words
+            if(not over_languages and not over_words):
+                break
+
+            language, trie = self._tries.popitem(last=False)
+            self._save_learned(language, trie)
+
+    def _save_learned(self, language, trie):
+        """
+        Funcion para guardar en disco el estado aprendido de un idioma. Si su diccionario
+        se sigue cargando se espera a que termine, para no guardarlo incompleto.
+        """
+        if(self.snapshot_dir is not None):
+            trie.wait_loaded()
+            trie.save_snapshot(self._user_path(language))
+
+    def save_all(self):
+        """
+        Funcion para guardar el estado aprendido de todos los idiomas en memoria, por
+        ejemplo al cerrar la aplicacion.
+        """
+        for language, trie in self._tries.items():
+            self._save_learned(language, trie)
@@ -1,7 +1,15 @@
 import tkinter as tk
 from tkinter import font, filedialog, messagebox
+import itertools
+import os
 import re
-from trie import Trie  # tu clase Trie
+from dictionary_manager import DictionaryManager
+from instrumentation import format_stats
+from learned_vocabulary import LEARNED_MAX_WORDS
+from spell_worker import SpellCheckWorker
+
+# directorio donde se guardan los diccionarios precalculados
+SNAPSHOT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "snapshots")
 
 # --- Ventana principal ---
 root = tk.Tk()
@@ -14,15 +22,99 @@ text_font = font.Font(family="Roboto", size=12)
 
 # --- Variables de idioma ---
 current_language = tk.StringVar(value="en")
-trie = Trie(current_language.get(), 50000)
+# medicion de rendimiento de la Trie (menu Metrics)
+stats_enabled = tk.BooleanVar(value=False)
+# se conservan en memoria los diccionarios de ambos idiomas con lo aprendido en cada uno,
+# con un limite de palabras aprendidas por idioma; sin snapshot el editor se puede usar con
+# las palabras mas usadas mientras el resto del diccionario se carga en segundo plano
+dictionaries = DictionaryManager(50000, SNAPSHOT_DIR, max_languages=2, learned_words=LEARNED_MAX_WORDS,
+                                 progressive=True)
+trie = dictionaries.get(current_language.get())
+
+# --- Hilo de trabajo para la revision ortografica ---
+# todas las operaciones sobre la Trie se ejecutan en este hilo para no bloquear la interfaz
+worker = SpellCheckWorker()
+# las inserciones usan llaves distintas para que ninguna reemplace a otra
+insert_ids = itertools.count()
+# segundos que espera una consulta lanzada por una tecla, si llega otra tecla antes solo se
+# ejecuta la mas reciente
+KEYSTROKE_DELAY = 0.05
+
+def poll_worker():
+    """Entrega a la interfaz los resultados terminados del hilo de trabajo"""
+    try:
+        worker.poll()
+    finally:
+        # un error en un callback no debe detener la entrega de los siguientes resultados
+        root.after(16, poll_worker)
+
+# --- Cache de clasificacion por palabra y lineas pendientes de revisar ---
+# palabra en minusculas -> "found", "similar" o "unfound", valida mientras no cambie el vocabulario
+word_verdicts = {}
+verdicts_version = [None, None]
+# sugerencias de la ultima palabra revisada: palabra -> (trie, vocab_version, sugerencias)
+last_corrections = {}
+# lineas modificadas que faltan por revisar y tarea programada para revisarlas
+dirty_lines = set()
+dirty_job = [None]
+word_count_job = [None]
+# numero de lineas que se revisan en cada tarea al procesar el documento completo
+LINES_PER_JOB = 200
 
 # --- Función para cambiar idioma ---
 def change_language(lang):
-    global trie
     current_language.set(lang)
-    trie = Trie(lang, 50000)
+    # los resultados pendientes corresponden al diccionario anterior
+    worker.cancel_all()
+    language_label.config(text="Cargando...")
+    # la primera carga de un idioma puede tardar, se hace en el hilo de trabajo
+    worker.submit("language", dictionaries.get, (lang,), callback=lambda new_trie: set_language(lang, new_trie),
+                  error_callback=lambda error: language_error(lang, error))
+
+def language_error(lang, error):
+    # se conserva el diccionario anterior
+    current_language.set(trie.language)
+    language_label.config(text="English" if trie.language == "en" else "Spanish")
+    messagebox.showerror("Idioma", f"No se pudo cargar el diccionario ({lang}): {error}")
+
+def set_language(lang, new_trie):
+    global trie
+    trie = new_trie
+    # la medicion de rendimiento sigue activa con el diccionario nuevo
+    if stats_enabled.get():
+        trie.enable_stats()
     language_label.config(text="English" if lang == "en" else "Spanish")
-    process_text()
+    # el diccionario del idioma conserva lo aprendido, el documento solo se marca de nuevo
+    process_text(learn=False)
+    if new_trie.is_provisional():
+        watch_loading(new_trie)
+
+def watch_loading(loading_trie):
+    """Indica que el diccionario se sigue cargando y revisa de nuevo el texto al terminar"""
+    if loading_trie is not trie:
+        return
+    name = "English" if current_language.get() == "en" else "Spanish"
+    if loading_trie.is_provisional():
+        language_label.config(text=f"{name} (cargando diccionario...)")
+        root.after(500, watch_loading, loading_trie)
+    else:
+        # las palabras marcadas con el diccionario incompleto pueden haber cambiado; lo que
+        # se escribio durante la carga ya se aprendio con las modificaciones en espera
+        language_label.config(text=name)
+        process_text(learn=False)
+
+def exit_app():
+    # se guarda lo aprendido en cada idioma antes de salir
+    def finish(error=None):
+        try:
+            if error is not None:
+                messagebox.showerror("Salir", f"No se pudo guardar lo aprendido: {error}")
+        finally:
+            # la ventana se cierra aunque no se haya podido guardar
+            root.quit()
+
+    worker.cancel_all()
+    worker.submit("exit", dictionaries.save_all, callback=lambda _: finish(), error_callback=finish)
 
 # --- Funciones de menú ---
 def new_file():
@@ -35,9 +127,13 @@ def open_file():
     file_path = filedialog.askopenfilename(filetypes=[("Text files", "*.txt"), ("All files", "*.*")])
     if file_path:
         with open(file_path, "r", encoding="utf-8") as f:
+            content = f.read()
             text_widget.delete("1.0", tk.END)
-            text_widget.insert("1.0", f.read())
-        process_text()
+            text_widget.insert("1.0", content)
+        # las frases del documento se agregan al indice de frases
+        worker.submit(("insert", next(insert_ids)), trie.insert_paragraph, (content,))
+        # el documento abierto es texto nuevo, se aprende de el
+        process_text(learn=True)
         update_suggestion_bar("")
 
 def save_file():
@@ -53,7 +149,9 @@ def show_metrics():
     messagebox.showinfo("Metrics", f"Número de palabras: {len(words)}")
 
 def show_word_frequency():
-    top_words = trie.get_most_frequent_words(10)
+    worker.submit("frequency", trie.get_most_frequent_words, (10,), callback=show_word_frequency_popup)
+
+def show_word_frequency_popup(top_words):
     if not top_words:
         messagebox.showinfo("Word Frequency", "No hay palabras frecuentes todavía.")
         return
@@ -68,34 +166,175 @@ def show_word_frequency():
     for w, freq in top_words:
         listbox.insert(tk.END, f"{w} ({freq})")
 
+def toggle_stats():
+    if stats_enabled.get():
+        trie.enable_stats()
+    else:
+        trie.disable_stats()
+
+def show_performance_stats():
+    if not stats_enabled.get():
+        messagebox.showinfo("Performance", "Activa primero la medición en Metrics > Enable Performance Stats.")
+        return
+    worker.submit("performance", trie.stats, callback=show_performance_popup)
+
+def show_performance_popup(stats):
+    if stats is None:
+        return
+    popup = tk.Toplevel(root)
+    popup.title("Performance")
+    popup.geometry("620x400")
+    popup.configure(bg="white")
+    listbox = tk.Listbox(popup, font=("Courier", 9), bg="white", fg="#333")
+    listbox.pack(fill="both", expand=True, padx=10, pady=10)
+    for line in format_stats(stats):
+        listbox.insert(tk.END, line)
+
+# --- Búsqueda de frases en tiempo real ---
+def show_phrase_search():
+    popup = tk.Toplevel(root)
+    popup.title("Search Phrases")
+    popup.geometry("500x300")
+    popup.configure(bg="white")
+    entry = tk.Entry(popup, font=("Roboto", 10))
+    entry.pack(fill="x", padx=10, pady=5)
+    listbox = tk.Listbox(popup, font=("Roboto", 10), bg="white", fg="#333")
+    listbox.pack(fill="both", expand=True, padx=10, pady=10)
+
+    def show_phrases(phrases):
+        if not popup.winfo_exists():
+            return
+        listbox.delete(0, tk.END)
+        for phrase in phrases:
+            listbox.insert(tk.END, phrase)
+
+    def search_phrases(event=None):
+        # con cada letra escrita se consultan las frases mas frecuentes con ese inicio; al
+        # escribir rapido solo se consulta el texto de la ultima tecla
+        worker.submit("phrases", trie.get_phrase_suggestions, (entry.get(), 10), callback=show_phrases,
+                      delay=KEYSTROKE_DELAY)
+
+    entry.bind("<KeyRelease>", search_phrases)
+    entry.focus_set()
+
+# --- Función para clasificar palabras usando la cache (hilo de trabajo) ---
+def get_verdicts(trie, words_lower):
+    """Clasifica las palabras, consultando la Trie solo para las que no estan en la cache"""
+    if verdicts_version[0] is not trie or verdicts_version[1] != trie.vocab_version:
+        # cambio el diccionario o se le agregaron palabras, las clasificaciones pueden cambiar
+        word_verdicts.clear()
+        verdicts_version[0] = trie
+        verdicts_version[1] = trie.vocab_version
+    unique_words = dict.fromkeys(words_lower)
+    pending = [w for w in unique_words if w not in word_verdicts]
+    trie.record_cache("word_verdicts", len(unique_words) - len(pending), len(pending))
+    if pending:
+        # un solo proceso: este hilo no es el principal y un pool copiaria los candados tomados
+        for w, (verdict, _) in trie.classify_words(pending, workers=1).items():
+            word_verdicts[w] = verdict
+    return {w: word_verdicts[w] for w in words_lower}
+
+def check_words_job(trie, words_list, learn):
+    """Tarea del hilo de trabajo: clasifica las palabras y, si learn, aprende su frecuencia y secuencia"""
+    words_lower = [w.lower() for w in words_list]
+    verdicts = get_verdicts(trie, words_lower)
+    if learn:
+        # aumentamos la frecuencia de las palabras encontradas y guardamos su secuencia
+        for word_lower in words_lower:
+            if verdicts[word_lower] == "found":
+                trie.insert(word_lower)
+        trie.save_next_words(words_list)
+    return verdicts
+
+# --- Función para revisar un rango de lineas ---
+def check_lines(first_line, last_line, learn=False):
+    """Envia al hilo de trabajo la revision de las lineas indicadas; solo se aprende de ellas
+    con learn=True, cuando su texto es nuevo para el diccionario"""
+    start = f"{first_line}.0"
+    end = f"{last_line}.end"
+    text = text_widget.get(start, end)
+
+    matches = list(re.finditer(r"\b\w+\b", text))
+    if not matches:
+        text_widget.tag_remove("similar", start, end)
+        text_widget.tag_remove("unfound", start, end)
+        return
+    words_list = [m.group() for m in matches]
+
+    def apply_tags(verdicts):
+        unchanged = text_widget.get(start, end) == text
+        if unchanged:
+            text_widget.tag_remove("similar", start, end)
+            text_widget.tag_remove("unfound", start, end)
+        for match in matches:
+            start_index = f"{start} + {match.start()}c"
+            end_index = f"{start} + {match.end()}c"
+            if not unchanged:
+                # el texto cambio mientras se revisaba, solo se marcan las palabras que siguen igual
+                if text_widget.get(start_index, end_index) != match.group():
+                    continue
+                text_widget.tag_remove("similar", start_index, end_index)
+                text_widget.tag_remove("unfound", start_index, end_index)
+            verdict = verdicts[match.group().lower()]
+            if verdict != "found":
+                text_widget.tag_add(verdict, start_index, end_index)
+
+    worker.submit(("lines", first_line, last_line), check_words_job, (trie, words_list, learn),
+                  callback=apply_tags)
+
 # --- Función para procesar texto completo ---
-def process_text():
-    """Procesa todo el texto y aplica tags, ignorando signos de puntuación"""
-    text = text_widget.get("1.0", tk.END)
-    text_widget.tag_remove("similar", "1.0", tk.END)
-    text_widget.tag_remove("unfound", "1.0", tk.END)
-
-    words_list = [w for w in re.findall(r"\b\w+\b", text)]
-    found_words, similar_words, unfound_words = trie.process_text_optimized(words_list)
-
-    for match in re.finditer(r"\b\w+\b", text):
-        word = match.group()
-        start_index = f"1.0 + {match.start()}c"
-        end_index = f"1.0 + {match.end()}c"
-        word_lower = word.lower()
-        if word_lower in found_words:
-            continue
-        elif any(word_lower == w for w, _ in similar_words):
-            text_widget.tag_add("similar", start_index, end_index)
-        elif word_lower in unfound_words:
-            text_widget.tag_add("unfound", start_index, end_index)
-
-    update_word_count()
+def process_text(learn=True):
+    """Procesa todo el texto por bloques de lineas y aplica tags, ignorando signos de puntuación.
+    Con learn=False solo se revisa de nuevo un texto del que ya se aprendio"""
+    dirty_lines.clear()
+    last_line = int(text_widget.index("end-1c").split(".")[0])
+    for first_line in range(1, last_line + 1, LINES_PER_JOB):
+        check_lines(first_line, min(first_line + LINES_PER_JOB - 1, last_line), learn)
+    schedule_word_count()
+
+# --- Función para revisar solo las lineas modificadas ---
+def mark_dirty(first_index, last_index):
+    """Marca como modificadas las lineas entre dos indices y programa su revision"""
+    first_line = int(text_widget.index(first_index).split(".")[0])
+    last_line = int(text_widget.index(last_index).split(".")[0])
+    dirty_lines.update(range(first_line, last_line + 1))
+    if dirty_job[0] is None:
+        dirty_job[0] = root.after(10, process_dirty)
+
+def process_dirty():
+    """Revisa las lineas modificadas agrupandolas en rangos continuos"""
+    dirty_job[0] = None
+    last_line = int(text_widget.index("end-1c").split(".")[0])
+    lines = sorted(l for l in dirty_lines if l <= last_line)
+    dirty_lines.clear()
+
+    range_start = None
+    previous = None
+    for line in lines:
+        if range_start is None:
+            range_start = line
+        elif line != previous + 1 or line - range_start >= LINES_PER_JOB:
+            check_lines(range_start, previous)
+            range_start = line
+        previous = line
+    if range_start is not None:
+        check_lines(range_start, previous)
+    schedule_word_count()
 
 # --- Función para pegar y procesar automáticamente ---
 def on_paste(event=None):
+    try:
+        # si hay texto seleccionado, el texto pegado lo reemplaza
+        paste_start = text_widget.index("sel.first")
+    except tk.TclError:
+        paste_start = text_widget.index("insert")
     text_widget.event_generate("<<Paste>>")
-    root.after(10, process_text)
+    # se aprende solo del texto pegado, no del resto de las lineas donde quedo
+    pasted_words = re.findall(r"\b\w+\b", text_widget.get(paste_start, "insert"))
+    if pasted_words:
+        worker.submit(("insert", next(insert_ids)), check_words_job, (trie, pasted_words, True))
+    # solo se revisan las lineas donde quedo el texto pegado
+    mark_dirty(paste_start, "insert")
     return "break"
 
 # --- Menú superior ---
@@ -105,16 +344,21 @@ file_menu.add_command(label="New", command=new_file)
 file_menu.add_command(label="Open", command=open_file)
 file_menu.add_command(label="Save", command=save_file)
 file_menu.add_separator()
-file_menu.add_command(label="Exit", command=root.quit)
+file_menu.add_command(label="Exit", command=exit_app)
 menu_bar.add_cascade(label="File", menu=file_menu)
 
 metrics_menu = tk.Menu(menu_bar, tearoff=0)
 metrics_menu.add_command(label="Show Metrics", command=show_metrics)
 metrics_menu.add_command(label="Word Frequency", command=show_word_frequency)
+metrics_menu.add_separator()
+metrics_menu.add_checkbutton(label="Enable Performance Stats", variable=stats_enabled, command=toggle_stats)
+metrics_menu.add_command(label="Performance Stats", command=show_performance_stats)
 menu_bar.add_cascade(label="Metrics", menu=metrics_menu)
 
 process_menu = tk.Menu(menu_bar, tearoff=0)
-process_menu.add_command(label="Process Text", command=process_text)
+# revisar de nuevo el documento no cambia lo aprendido de el
+process_menu.add_command(label="Process Text", command=lambda: process_text(learn=False))
+process_menu.add_command(label="Search Phrases", command=show_phrase_search)
 menu_bar.add_cascade(label="Process Text", menu=process_menu)
 
 settings_menu = tk.Menu(menu_bar, tearoff=0)
@@ -125,6 +369,7 @@ settings_menu.add_cascade(label="Change Language", menu=language_menu)
 menu_bar.add_cascade(label="Settings", menu=settings_menu)
 
 root.config(menu=menu_bar)
+root.protocol("WM_DELETE_WINDOW", exit_app)
 
 # --- Frame principal para texto ---
 main_frame = tk.Frame(root, bg="#f8f8f8")
@@ -156,7 +401,14 @@ suggestion_label = tk.Label(status_frame, text="Sugerencias: ", font=("Roboto",
 suggestion_label.pack(side="bottom", fill="x", pady=2)
 
 # --- Función para actualizar contador de palabras ---
+def schedule_word_count(event=None):
+    """Agrupa las actualizaciones del contador, que lee todo el documento"""
+    if word_count_job[0] is not None:
+        root.after_cancel(word_count_job[0])
+    word_count_job[0] = root.after(300, update_word_count)
+
 def update_word_count(event=None):
+    word_count_job[0] = None
     text = text_widget.get("1.0", tk.END)
     words = [w for w in re.findall(r"\b\w+\b", text)]
     word_count_label.config(text=f"{len(words)} palabra{'s' if len(words)!=1 else ''}")
@@ -165,9 +417,13 @@ def update_word_count(event=None):
 def update_suggestion_bar(word):
     """Actualiza la barra inferior con sugerencias de palabras siguientes"""
     if not word.strip():
+        worker.cancel("suggestion_bar")
         suggestion_label.config(text="Sugerencias: ")
         return
-    next_words = trie.get_next_words(word.lower())  # obtenemos palabras que siguen
+    # obtenemos palabras que siguen en el hilo de trabajo
+    worker.submit("suggestion_bar", trie.get_next_words, (word.lower(),), callback=show_next_words)
+
+def show_next_words(next_words):
     if next_words:
         suggestion_label.config(text="Sugerencias: " + ", ".join(next_words))
     else:
@@ -184,22 +440,39 @@ def show_suggestions(event):
     word_start = text_widget.index(f"{index} wordstart")
     word_end = text_widget.index(f"{index} wordend")
     word = text_widget.get(word_start, word_end)
+    x_root = event.x_root
+    y_root = event.y_root
+
+    def open_popup(suggestions):
+        open_suggestion_popup(x_root, y_root, word, word_start, word_end, suggestions)
+
+    cached = last_corrections.get(word.lower())
+    if "similar" in tags and cached and cached[0] is trie and cached[1] == trie.vocab_version:
+        # la ultima palabra revisada ya tiene sus sugerencias calculadas
+        worker.cancel("popup")
+        open_popup(list(cached[2]))
+    elif "similar" in tags:
+        # la busqueda de palabras similares se hace en el hilo de trabajo
+        worker.submit("popup", trie.get_corrections, (word,), callback=open_popup)
+    else:
+        worker.cancel("popup")
+        open_popup([])
 
-    suggestions = []
-    if "similar" in tags:
-        suggestions = trie.get_similar_words(word, max_distance=2)
-    elif "unfound" in tags:
-        suggestions = []
+def open_suggestion_popup(x_root, y_root, word, word_start, word_end, suggestions):
+    global suggestion_popup
+    if suggestion_popup and suggestion_popup.winfo_exists():
+        suggestion_popup.destroy()
+    # la palabra pudo cambiar mientras se buscaban las sugerencias
+    if text_widget.get(word_start, word_end) != word:
+        return
 
+    suggestions = list(suggestions)
     suggestions.append("---")
     suggestions.append("Agregar al diccionario")
 
-    if not suggestions:
-        return
-
     suggestion_popup = tk.Toplevel(root)
     suggestion_popup.wm_overrideredirect(True)
-    suggestion_popup.geometry(f"+{event.x_root+10}+{event.y_root+10}")
+    suggestion_popup.geometry(f"+{x_root+10}+{y_root+10}")
     suggestion_popup.configure(bg="#2c2c2c")
 
     def close_popup(event_inner):
@@ -224,7 +497,7 @@ def show_suggestions(event):
     def replace_word(e):
         selection = listbox.get(listbox.curselection())
         if selection == "Agregar al diccionario":
-            trie.insert(word.lower())
+            worker.submit(("insert", next(insert_ids)), trie.insert, (word.lower(),))
             text_widget.tag_remove("unfound", word_start, word_end)
             text_widget.tag_remove("similar", word_start, word_end)
             text_widget.tag_add("black", word_start, word_end)
@@ -236,7 +509,9 @@ def show_suggestions(event):
             text_widget.tag_remove("unfound", word_start, word_end)
             text_widget.tag_remove("similar", word_start, word_end)
             text_widget.tag_add("black", word_start, word_start + f"+{len(selection)}c")
-            trie.insert(selection.lower())
+            # una separacion de palabras pegadas se agrega palabra por palabra
+            for part in selection.lower().split():
+                worker.submit(("insert", next(insert_ids)), trie.insert, (part,))
 
         if suggestion_popup and suggestion_popup.winfo_exists():
             suggestion_popup.destroy()
@@ -247,44 +522,70 @@ def show_suggestions(event):
     listbox.bind("<Double-Button-1>", replace_word)
 
 # --- Revisar última palabra ---
+def check_last_word_job(trie, last_word, previous_word):
+    """Tarea del hilo de trabajo: clasifica la ultima palabra y obtiene las siguientes"""
+    verdict = None
+    if trie.search(last_word):
+        trie.insert(last_word)
+    else:
+        similar_words = trie.get_corrections(last_word, max_distance=2)
+        # se guardan para que el popup de sugerencias no las vuelva a calcular
+        last_corrections.clear()
+        last_corrections[last_word] = (trie, trie.vocab_version, similar_words)
+        if similar_words:
+            verdict = "similar"
+        else:
+            verdict = "unfound"
+
+    # Guardar secuencia de palabras
+    if previous_word is not None:
+        trie.save_next_words([previous_word, last_word])
+
+    # con la palabra anterior se usa el contexto de dos palabras
+    context = [previous_word, last_word] if previous_word is not None else [last_word]
+    return verdict, trie.get_next_words(context)
+
 def check_last_word(event=None):
     if event and event.keysym not in ("space", "Return", "period", "comma", "exclam", "question"):
         return
 
-    cursor_index = text_widget.index("insert")
-    text_up_to_cursor = text_widget.get("1.0", cursor_index)
-    words = [w for w in re.findall(r"\b\w+\b", text_up_to_cursor)]
-    if not words:
+    # solo se lee la linea actual y la anterior, no todo el documento
+    line_start = text_widget.index("insert linestart")
+    text_up_to_cursor = text_widget.get(line_start, "insert")
+    match_iter = list(re.finditer(r"\b\w+\b", text_up_to_cursor))
+    if not match_iter:
         update_suggestion_bar("")
         return
 
-    last_word = words[-1].lower()
-    match_iter = list(re.finditer(r"\b\w+\b", text_up_to_cursor))
     last_match = match_iter[-1]
-    start_index = f"1.0 + {last_match.start()}c"
-    end_index = f"1.0 + {last_match.end()}c"
-
-    text_widget.tag_remove("similar", start_index, end_index)
-    text_widget.tag_remove("unfound", start_index, end_index)
+    last_word = last_match.group().lower()
+    start_index = text_widget.index(f"{line_start} + {last_match.start()}c")
+    end_index = text_widget.index(f"{line_start} + {last_match.end()}c")
 
-    if trie.search(last_word):
-        trie.insert(last_word)
+    if len(match_iter) > 1:
+        previous_word = match_iter[-2].group()
     else:
-        similar_words = trie.get_similar_words(last_word, max_distance=2)
-        if similar_words:
-            text_widget.tag_add("similar", start_index, end_index)
-        else:
-            text_widget.tag_add("unfound", start_index, end_index)
+        previous_words = re.findall(r"\b\w+\b", text_widget.get(f"{line_start} - 1 lines linestart", line_start))
+        previous_word = previous_words[-1] if previous_words else None
 
-    # Guardar secuencia de palabras
-    if len(words) > 1:
-        trie.save_next_words([words[-2], words[-1]])
+    def apply_verdict(result):
+        verdict, next_words = result
+        # si la palabra cambio mientras se revisaba, el resultado ya no corresponde
+        if text_widget.get(start_index, end_index).lower() != last_word:
+            return
+        text_widget.tag_remove("similar", start_index, end_index)
+        text_widget.tag_remove("unfound", start_index, end_index)
+        if verdict is not None:
+            text_widget.tag_add(verdict, start_index, end_index)
+        # Actualizar barra de sugerencias
+        show_next_words(next_words)
 
-    # Actualizar barra de sugerencias
-    update_suggestion_bar(last_word)
+    worker.cancel("suggestion_bar")
+    worker.submit(("word", start_index), check_last_word_job, (trie, last_word, previous_word),
+                  callback=apply_verdict, delay=KEYSTROKE_DELAY)
 
 # --- Eventos ---
-text_widget.bind("<KeyRelease>", lambda event: [check_last_word(event), update_word_count(event)])
+text_widget.bind("<KeyRelease>", lambda event: [check_last_word(event), schedule_word_count(event)])
 text_widget.bind("<Double-Button-1>", show_suggestions)
 text_widget.bind("<ButtonRelease-1>", lambda event: update_suggestion_bar(
     text_widget.get("insert wordstart", "insert wordend")))
@@ -292,4 +593,7 @@ text_widget.bind("<Control-v>", lambda e: on_paste())
 text_widget.bind("<Shift-Insert>", lambda e: on_paste())
 
 # --- Ejecutar aplicación ---
+root.after(16, poll_worker)
+if trie.is_provisional():
+    watch_loading(trie)
 root.mainloop()
@@ -0,0 +1,189 @@
+import functools
+import time
+
+# numero de intervalos del histograma de latencias: el intervalo i contiene las llamadas de
+# menos de 2**i microsegundos (y al menos 2**(i - 1)), el ultimo acumula las mas lentas
+LATENCY_BUCKETS = 24
+
+
+class TrieStats:
+    """
+    Contadores de rendimiento de una Trie: numero de llamadas e histograma de latencias por
+    operacion, candidatos revisados en cada busqueda de palabras similares y aciertos de las
+    caches.
+
+    Las operaciones se miden envolviendo los metodos de la instancia (ver wrap), por lo que
+    cuando la medicion esta apagada no queda ningun costo en esos metodos. Para que medir
+    sea barato los contadores se actualizan sin candado: con varios hilos llamando a la vez se
+    puede perder algun conteo, lo que no afecta a las estadisticas.
+    """
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        """
+        Funcion para reiniciar todos los contadores.
+        """
+        # operacion -> [llamadas, nanosegundos totales, conteos por intervalo]
+        self.operations = {}
+        self.fuzzy_queries = 0
+        self.fuzzy_candidates = 0
+        self.fuzzy_matches = 0
+        # cache -> [aciertos, fallos]
+        self.caches = {}
+
+    def record(self, operation, elapsed_ns):
+        """
+        Funcion para registrar la duracion de una llamada.
+
+        Parametros:
+        self : objeto tipo TrieStats
+            Instancia de la clase TrieStats que llama a este método.
+        operation : str
+            nombre de la operacion
+        elapsed_ns : int
+            duracion de la llamada en nanosegundos
+        """
+        entry = self.operations.get(operation)
+        if(entry is None):
+            entry = self.operations.setdefault(operation, [0, 0, [0] * LATENCY_BUCKETS])
+        entry[0] += 1
+        entry[1] += elapsed_ns
+        entry[2][min((elapsed_ns // 1000).bit_length(), LATENCY_BUCKETS - 1)] += 1
+
+    def record_fuzzy(self, candidates, matches):
+        """
+        Funcion para registrar una busqueda de palabras similares.
+
+        Parametros:
+        self : objeto tipo TrieStats
+            Instancia de la clase TrieStats que llama a este método.
+        candidates : int
+            nodos o palabras revisados con la distancia de edicion
+        matches : int
+            palabras encontradas dentro de la distancia maxima
+        """
+        self.fuzzy_queries += 1
+        self.fuzzy_candidates += candidates
+        self.fuzzy_matches += matches
+
+    def record_cache(self, cache, hits, misses=0):
+        """
+        Funcion para registrar aciertos y fallos de una cache.
+
+        Parametros:
+        self : objeto tipo TrieStats
+            Instancia de la clase TrieStats que llama a este método.
+        cache : str
+            nombre de la cache
+        hits : int
+            consultas resueltas por la cache
+        misses : int
+            consultas que la cache no pudo resolver
+        """
+        entry = self.caches.get(cache)
+        if(entry is None):
+            entry = self.caches.setdefault(cache, [0, 0])
+        entry[0] += hits
+        entry[1] += misses
+
+    def wrap(self, operation, method):
+        """
+        Funcion para obtener una version de method que registra la duracion de cada llamada.
+
+        Parametros:
+        self : objeto tipo TrieStats
+            Instancia de la clase TrieStats que llama a este método.
+        operation : str
+            nombre con el que se registra la operacion
+        method : function
+            metodo a medir
+        """
+        clock = time.perf_counter_ns
+        record = self.record
+
+        @functools.wraps(method)
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return method(*args, **kwargs)
+            finally:
+                record(operation, clock() - start)
+
+        return timed
+
+    def snapshot(self):
+        """
+        Funcion para obtener una copia de los contadores con los valores derivados (promedio,
+        percentiles aproximados y tasas de acierto).
+
+        Los percentiles se estiman con el limite superior del intervalo del histograma en que
+        caen, por lo que son cotas superiores.
+        """
+        operations = {}
+        for operation, (calls, total_ns, buckets) in list(self.operations.items()):
+            histogram = {}
+            for i, count in enumerate(buckets):
+                if(count):
+                    histogram["<%dus" % (1 << i)] = count
+            operations[operation] = {
+                "calls": calls,
+                "total_ms": total_ns / 1e6,
+                "mean_us": total_ns / calls / 1000,
+                "p50_us": self._percentile(buckets, calls, 0.50),
+                "p99_us": self._percentile(buckets, calls, 0.99),
+                "histogram": histogram,
+            }
+
+        caches = {}
+        for cache, (hits, misses) in list(self.caches.items()):
+            total = hits + misses
+            caches[cache] = {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+
+        return {
+            "operations": operations,
+            "fuzzy": {
+                "queries": self.fuzzy_queries,
+                "candidates": self.fuzzy_candidates,
+                "matches": self.fuzzy_matches,
+                "candidates_per_query": self.fuzzy_candidates / self.fuzzy_queries if self.fuzzy_queries else 0.0,
+            },
+            "caches": caches,
+        }
+
+    def _percentile(self, buckets, calls, fraction):
+        """
+        Funcion para estimar un percentil a partir del histograma de una operacion.
+        """
+        target = calls * fraction
+        seen = 0
+        for i, count in enumerate(buckets):
+            seen += count
+            if(seen >= target and count):
+                return 1 << i
+        return 0
+
+
+def format_stats(stats):
+    """
+    Funcion para convertir el resultado de TrieStats.snapshot en lineas de texto legibles.
+
+    Parametros:
+    stats : dict
+        contadores obtenidos con Trie.stats()
+    """
+    lines = ["%-24s %8s %10s %9s %9s" % ("operacion", "llamadas", "prom. us", "p50 us", "p99 us")]
+    for operation, op in sorted(stats["operations"].items(), key=lambda item: -item[1]["total_ms"]):
+        lines.append("%-24s %8d %10.1f %9s %9s" % (operation, op["calls"], op["mean_us"],
+                                                     "<%d" % op["p50_us"], "<%d" % op["p99_us"]))
+
+    fuzzy = stats["fuzzy"]
+    lines.append("")
+    lines.append("palabras similares: %d busquedas, %.1f candidatos por busqueda, %d resultados" %
+                 (fuzzy["queries"], fuzzy["candidates_per_query"], fuzzy["matches"]))
+
+    for cache, entry in sorted(stats["caches"].items()):
+        lines.append("cache %s: %.1f%% aciertos (%d de %d)" %
+                     (cache, entry["hit_rate"] * 100, entry["hits"], entry["hits"] + entry["misses"]))
+    return lines
@@ -0,0 +1,125 @@
+import time
+
+# numero maximo de palabras aprendidas por defecto (las palabras base no cuentan)
+LEARNED_MAX_WORDS = 20000
+# factor por el que se multiplican los usos de las palabras aprendidas en cada decaimiento
+LEARNED_DECAY_FACTOR = 0.5
+# numero de usos de palabras aprendidas entre dos decaimientos
+LEARNED_DECAY_EVERY = 50000
+
+
+class LearnedVocabulary:
+    """
+    Politica de memoria para las palabras que el usuario agrega al diccionario base.
+
+    Cada palabra aprendida tiene un puntaje con sus usos recientes: cada insercion suma su
+    conteo y cada decaimiento multiplica todos los puntajes por decay_factor, de modo que
+    una palabra que se dejo de usar pierde puntaje aunque haya sido frecuente. El
+    decaimiento ocurre cada decay_every usos de palabras aprendidas o, si se da
+    decay_seconds, cuando pasa ese tiempo desde el anterior.
+
+    Al superar max_words palabras aprendidas, victims elige las de menor puntaje (en
+    empate, las usadas hace mas tiempo) hasta quedar en 3/4 de max_words, como
+    NextWordModel al descartar contextos. La Trie se encarga de quitarlas; las palabras
+    del diccionario base nunca se registran aqui y por lo tanto nunca se descartan.
+    """
+
+    def __init__(self, max_words=LEARNED_MAX_WORDS, decay_factor=LEARNED_DECAY_FACTOR,
+                 decay_every=LEARNED_DECAY_EVERY, decay_seconds=None):
+        self.max_words = max_words
+        self.decay_factor = decay_factor
+        self.decay_every = decay_every
+        self.decay_seconds = decay_seconds
+        # palabra -> [puntaje, orden del ultimo uso]
+        self.scores = {}
+        self._seq = 0
+        # usos desde el ultimo decaimiento y momento en que ocurrio
+        self._uses = 0
+        self._last_decay = time.monotonic()
+        self.decays = 0
+        self.evictions = 0
+
+    def record(self, word, count=1):
+        """
+        Funcion para registrar el uso de una palabra aprendida.
+
+        Parametros:
+        self : objeto tipo LearnedVocabulary
+            Instancia de la clase LearnedVocabulary que llama a este método.
+        word : str
+            palabra aprendida en minusculas
+        count : int
+            numero de usos
+
+        Regresa True si toca aplicar un decaimiento (ver decay).
+        """
+        self._seq += 1
+        entry = self.scores.get(word)
+        if(entry is None):
+            self.scores[word] = [count, self._seq]
+        else:
+            entry[0] += count
+            entry[1] = self._seq
+
+        self._uses += count
+        if(self.decay_seconds is not None):
+            return time.monotonic() - self._last_decay >= self.decay_seconds
+        return self._uses >= self.decay_every
+
+    def decay(self):
+        """
+        Funcion para multiplicar los puntajes por decay_factor. Con decaimiento por tiempo
+        se aplica una vez por cada periodo transcurrido.
+
+        Regresa el factor aplicado, para decaer tambien las secuencias de palabras.
+        """
+        factor = self.decay_factor
+        now = time.monotonic()
+        if(self.decay_seconds is not None and self.decay_seconds > 0):
+            factor **= max(int((now - self._last_decay) // self.decay_seconds), 1)
+        for entry in self.scores.values():
+            entry[0] *= factor
+        self._uses = 0
+        self._last_decay = now
+        self.decays += 1
+        return factor
+
+    def over_budget(self):
+        """
+        Funcion para saber si hay mas palabras aprendidas que las permitidas.
+        """
+        return len(self.scores) > self.max_words
+
+    def victims(self, keep=None):
+        """
+        Funcion para elegir las palabras que se descartan: las de menor puntaje hasta quedar
+        en 3/4 de max_words. Se quitan de los puntajes.
+
+        Parametros:
+        self : objeto tipo LearnedVocabulary
+            Instancia de la clase LearnedVocabulary que llama a este método.
+        keep : str
+            palabra que no se descarta, por ejemplo la que se acaba de insertar
+        """
+        target = self.max_words * 3 // 4
+        ranked = sorted((entry[0], entry[1], word) for word, entry in self.scores.items() if word != keep)
+        victims = [word for _, _, word in ranked[:len(self.scores) - target]]
+        for word in victims:
+            del self.scores[word]
+        self.evictions += len(victims)
+        return victims
+
+    def stats(self):
+        """
+        Funcion para obtener el numero de palabras aprendidas, el limite y los decaimientos
+        y descartes realizados.
+        """
+        return {
+            "words": len(self.scores),
+            "max_words": self.max_words,
+            "decays": self.decays,
+            "evictions": self.evictions,
+        }
+
+    def __len__(self):
+        return len(self.scores)
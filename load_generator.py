@@ -0,0 +1,171 @@
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+
+from benchmark import make_typo, percentile
+from suggestion_service import DEFAULT_SOCKET, SuggestionClient
+
+# proporcion por defecto de cada operacion en la carga generada
+DEFAULT_MIX = {
+    "autocomplete_prefix": 0.40,
+    "get_similar_words": 0.20,
+    "get_next_words": 0.20,
+    "search": 0.15,
+    "insert": 0.05,
+}
+
+
+def parse_mix(text):
+    """
+    Funcion para leer la proporcion de operaciones con el formato "op:peso,op:peso".
+    """
+    mix = {}
+    for item in text.split(","):
+        op, weight = item.split(":")
+        mix[op.strip()] = float(weight)
+    return mix
+
+
+def make_requests(count, vocabulary, mix, rng):
+    """
+    Funcion para generar solicitudes aleatorias: palabras con frecuencias tipo Zipf (como
+    benchmark.zipf_sample), prefijos de 1 a 4 letras y palabras con un error para las
+    palabras similares.
+    """
+    # los pesos acumulados se calculan una sola vez para todas las solicitudes
+    cum_weights = list(itertools.accumulate(1 / (i + 1) for i in range(len(vocabulary))))
+
+    def sample(k):
+        return rng.choices(vocabulary, cum_weights=cum_weights, k=k)
+
+    requests = []
+    for op in rng.choices(list(mix), weights=list(mix.values()), k=count):
+        word = sample(1)[0]
+        if(op == "autocomplete_prefix"):
+            requests.append((op, {"prefix": word[:rng.randint(1, min(4, len(word)))], "k": 3}))
+        elif(op == "get_similar_words"):
+            requests.append((op, {"word": make_typo(word, rng)}))
+        elif(op == "get_next_words"):
+            requests.append((op, {"words": sample(2)}))
+        elif(op == "save_next_words"):
+            requests.append((op, {"words": sample(8)}))
+        else:
+            requests.append((op, {"word": word}))
+    return requests
+
+
+async def run_connection(args, requests, latencies, errors):
+    """
+    Funcion para enviar las solicitudes de una conexion, con args.concurrency solicitudes
+    sin respuesta a la vez.
+    """
+    client = await SuggestionClient.connect(args.socket, args.host, args.port)
+    position = 0
+
+    async def worker():
+        nonlocal position
+        while position < len(requests):
+            op, op_args = requests[position]
+            position += 1
+            start = time.perf_counter_ns()
+            try:
+                await client.call(op, **op_args)
+            except RuntimeError:
+                errors[op] = errors.get(op, 0) + 1
+            latencies.setdefault(op, []).append(time.perf_counter_ns() - start)
+
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    await client.close()
+
+
+async def run(args):
+    """
+    Funcion para ejecutar la carga completa y regresar el reporte.
+    """
+    if(args.synthetic):
+        from benchmark import synthetic_words
+        vocabulary = synthetic_words(args.vocab_size, args.seed)
+    else:
+        from wordfreq import top_n_list
+        vocabulary = top_n_list(args.language, args.vocab_size)
+    mix = parse_mix(args.mix) if args.mix else DEFAULT_MIX
+
+    # las solicitudes se generan antes de medir
+    rng = random.Random(args.seed)
+    connections = [make_requests(args.requests, vocabulary, mix, rng) for _ in range(args.connections)]
+
+    latencies = {}
+    errors = {}
+    start = time.perf_counter()
+    await asyncio.gather(*(run_connection(args, requests, latencies, errors) for requests in connections))
+    seconds = time.perf_counter() - start
+
+    client = await SuggestionClient.connect(args.socket, args.host, args.port)
+    service = await client.call("stats")
+    await client.close()
+
+    report = {"seconds": seconds, "operations": {}, "errors": errors, "service": service}
+    everything = []
+    for op, values in sorted(latencies.items()):
+        values.sort()
+        everything.extend(values)
+        report["operations"][op] = {
+            "calls": len(values),
+            "p50_ms": percentile(values, 50) / 1e6,
+            "p99_ms": percentile(values, 99) / 1e6,
+        }
+    everything.sort()
+    report["total"] = {
+        "calls": len(everything),
+        "p50_ms": percentile(everything, 50) / 1e6,
+        "p99_ms": percentile(everything, 99) / 1e6,
+        "requests_per_second": len(everything) / seconds if seconds else 0.0,
+    }
+    return report
+
+
+def print_report(report):
+    """
+    Funcion para imprimir el reporte en forma de tabla.
+    """
+    print("%-22s %8s %10s %10s" % ("operacion", "llamadas", "p50 ms", "p99 ms"))
+    for op, stats in report["operations"].items():
+        print("%-22s %8d %10.3f %10.3f" % (op, stats["calls"], stats["p50_ms"], stats["p99_ms"]))
+    total = report["total"]
+    print("%-22s %8d %10.3f %10.3f" % ("total", total["calls"], total["p50_ms"], total["p99_ms"]))
+    print("\n%.0f solicitudes/s en %.2f s, %.1f solicitudes por lote en el servicio" %
+          (total["requests_per_second"], report["seconds"], report["service"]["mean_batch_size"]))
+    if(report["errors"]):
+        print("errores: %s" % report["errors"])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generador de carga para el servicio de sugerencias")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="ruta del socket Unix del servicio")
+    parser.add_argument("--port", type=int, help="puerto TCP local del servicio, en lugar del socket Unix")
+    parser.add_argument("--host", default="127.0.0.1", help="direccion para TCP")
+    parser.add_argument("--connections", type=int, default=8, help="conexiones simultaneas")
+    parser.add_argument("--concurrency", type=int, default=4, help="solicitudes sin respuesta por conexion")
+    parser.add_argument("--requests", type=int, default=1000, help="solicitudes por conexion")
+    parser.add_argument("--mix", help='proporcion de operaciones, por ejemplo "search:0.5,get_similar_words:0.5"')
+    parser.add_argument("--language", default="en", help="idioma de las palabras de prueba")
+    parser.add_argument("--vocab-size", type=int, default=20000, help="palabras de las que se generan las solicitudes")
+    parser.add_argument("--synthetic", action="store_true", help="usar el vocabulario sintetico de benchmark.py")
+    parser.add_argument("--seed", type=int, default=0, help="semilla de las solicitudes")
+    parser.add_argument("--output", help="archivo JSON donde guardar el reporte")
+    args = parser.parse_args()
+
+    report = asyncio.run(run(args))
+    print_report(report)
+    if(args.output):
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+class NextWordModel:
+    """
+    Modelo de n-gramas para sugerir la siguiente palabra.
+
+    Las palabras se guardan una sola vez y los contextos (tuplas con las ultimas order - 1
+    palabras, o menos) usan sus identificadores numericos. Cada contexto guarda una lista
+    acotada de palabras siguientes [id, conteo, orden de aparicion] que se mantiene ordenada
+    al actualizar los conteos, por lo que obtener k sugerencias cuesta O(k).
+
+    La memoria se limita de dos formas: cada contexto guarda a lo mas max_followers palabras
+    (una palabra nueva reemplaza a la de menor conteo, como en el algoritmo space-saving) y
+    al superar max_contexts se descartan los contextos con menor conteo total.
+    """
+    # numero de veces que se han descartado contextos, sirve para invalidar caches externas
+    prunes = 0
+
+    def __init__(self, order=3, max_followers=16, max_contexts=100000):
+        self.order = order
+        self.max_followers = max_followers
+        self.max_contexts = max_contexts
+        # palabra -> id y id -> palabra
+        self.word_ids = {}
+        self.words = []
+        # identificadores liberados al descartar contextos
+        self._free_ids = []
+        # contexto (tupla de ids) -> lista ordenada de [id, conteo, orden de aparicion]
+        self.followers = {}
+        self._seq = 0
+
+    def _get_id(self, word):
+        """
+        Funcion para obtener el identificador de una palabra, asignando uno si es nueva.
+        """
+        word_id = self.word_ids.get(word)
+        if(word_id is None):
+            if(self._free_ids):
+                word_id = self._free_ids.pop()
+                self.words[word_id] = word
+            else:
+                word_id = len(self.words)
+                self.words.append(word)
+            self.word_ids[word] = word_id
+        return word_id
+
+    def add_sequence(self, words, start=1):
+        """
+        Funcion para aprender una secuencia de palabras: por cada palabra se actualizan los
+        contextos formados por las 1 a order - 1 palabras anteriores.
+
+        Parametros:
+        self : objeto tipo NextWordModel
+            Instancia de la clase NextWordModel que llama a este método.
+        words : list
+            palabras en el orden en que fueron escritas
+        start : int
+            posicion de la primera palabra que se cuenta; las anteriores solo sirven de
+            contexto, por ejemplo al continuar un texto que se procesa por partes
+        """
+        ids = [self._get_id(w.lower()) for w in words]
+
+        for i in range(max(start, 1), len(ids)):
+            for size in range(1, self.order):
+                if(i - size < 0):
+                    break
+                self._increment(tuple(ids[i - size:i]), ids[i])
+
+        if(len(self.followers) > self.max_contexts):
+            self._prune()
+
+    def _increment(self, context, follower):
+        """
+        Funcion para aumentar el conteo de una palabra siguiente en un contexto, manteniendo
+        la lista ordenada por conteo y, en empates, por orden de aparicion.
+        """
+        # se modifica una copia de la lista y se reemplaza al final, asi get_next_words puede
+        # leer desde otro hilo sin candado (las listas tienen a lo mas max_followers entradas)
+        entries = list(self.followers.get(context, ()))
+
+        for i, entry in enumerate(entries):
+            if(entry[0] == follower):
+                entry[1] += 1
+                break
+        else:
+            self._seq += 1
+            if(len(entries) < self.max_followers):
+                entries.append([follower, 1, self._seq])
+            else:
+                # la lista esta llena: la palabra nueva reemplaza a la de menor conteo
+                entries[-1] = [follower, entries[-1][1] + 1, self._seq]
+            i = len(entries) - 1
+            entry = entries[i]
+
+        # recorremos la entrada hacia el inicio mientras tenga mejor posicion
+        while i > 0:
+            previous = entries[i - 1]
+            if(entry[1] < previous[1] or (entry[1] == previous[1] and entry[2] > previous[2])):
+                break
+            entries[i] = previous
+            i -= 1
+        entries[i] = entry
+        self.followers[context] = entries
+
+    def _prune(self):
+        """
+        Funcion para descartar los contextos con menor conteo total hasta quedar en 3/4 de
+        max_contexts, y liberar los identificadores de palabras que ya no se usan.
+        """
+        self.prunes += 1
+        target = self.max_contexts * 3 // 4
+        totals = sorted((sum(entry[1] for entry in entries), context) for context, entries in self.followers.items())
+        for _, context in totals[:len(totals) - target]:
+            del self.followers[context]
+        self._free_unused_ids()
+
+    def _free_unused_ids(self):
+        """
+        Funcion para liberar los identificadores de las palabras que ya no aparecen en
+        ningun contexto ni como palabra siguiente.
+        """
+        used = set()
+        for context, entries in self.followers.items():
+            used.update(context)
+            used.update(entry[0] for entry in entries)
+        for word_id, word in enumerate(self.words):
+            if(word is not None and word_id not in used):
+                del self.word_ids[word]
+                self.words[word_id] = None
+                self._free_ids.append(word_id)
+
+    def decay(self, factor):
+        """
+        Funcion para multiplicar todos los conteos por factor y descartar las palabras
+        siguientes cuyo conteo llega a 0, junto con los contextos que quedan vacios. Las
+        secuencias que se dejaron de usar desaparecen despues de algunos decaimientos.
+
+        Parametros:
+        self : objeto tipo NextWordModel
+            Instancia de la clase NextWordModel que llama a este método.
+        factor : float
+            factor entre 0 y 1 por el que se multiplican los conteos
+        """
+        self.prunes += 1
+        for context, entries in list(self.followers.items()):
+            # las listas se reemplazan, igual que en _increment
+            kept = [[follower, int(count * factor), seq] for follower, count, seq in entries if int(count * factor) > 0]
+            if(kept):
+                kept.sort(key=lambda entry: (-entry[1], entry[2]))
+                self.followers[context] = kept
+            else:
+                del self.followers[context]
+        self._free_unused_ids()
+
+    def remove_words(self, words):
+        """
+        Funcion para olvidar las secuencias de unas palabras: se descartan los contextos que
+        las contienen y se quitan de las palabras siguientes de los demas contextos.
+
+        Parametros:
+        self : objeto tipo NextWordModel
+            Instancia de la clase NextWordModel que llama a este método.
+        words : iterable
+            palabras en minusculas
+        """
+        removed = {self.word_ids[w] for w in words if w in self.word_ids}
+        if(not removed):
+            return
+        self.prunes += 1
+        for context, entries in list(self.followers.items()):
+            if(not removed.isdisjoint(context)):
+                del self.followers[context]
+            elif(any(entry[0] in removed for entry in entries)):
+                kept = [entry for entry in entries if entry[0] not in removed]
+                if(kept):
+                    self.followers[context] = kept
+                else:
+                    del self.followers[context]
+        self._free_unused_ids()
+
+    def get_next_words(self, context, n_suggestions=5):
+        """
+        Funcion para obtener las palabras que mas frecuentemente siguen a un contexto. Se
+        usa primero el contexto mas largo disponible y se completa con contextos mas cortos
+        (backoff).
+
+        Parametros:
+        self : objeto tipo NextWordModel
+            Instancia de la clase NextWordModel que llama a este método.
+        context : str o list
+            ultima palabra escrita o lista con las ultimas palabras escritas
+        n_suggestions : int
+            numero de sugerencias a obtener
+        """
+        if(isinstance(context, str)):
+            context = [context]
+
+        ids = []
+        for w in context[-(self.order - 1):]:
+            ids.append(self.word_ids.get(w.lower()))
+
+        results = []
+        seen = set()
+        for size in range(len(ids), 0, -1):
+            key = tuple(ids[-size:])
+            # un contexto con palabras desconocidas no tiene palabras siguientes
+            if(None in key):
+                continue
+            for entry in self.followers.get(key, ()):
+                if(len(results) >= n_suggestions):
+                    return results
+                if(entry[0] not in seen):
+                    seen.add(entry[0])
+                    results.append(self.words[entry[0]])
+        return results
+
+    def __len__(self):
+        return len(self.followers)
@@ -0,0 +1,286 @@
+import heapq
+import re
+from array import array
+
+from trie_node import TOP_K_CACHE, TrieNode, rank_key, update_top
+
+# idiomas de la Trie -> idiomas del tokenizador de frases de nltk
+NLTK_LANGUAGES = {"en": "english", "es": "spanish"}
+
+# separadores de frases cuando nltk o sus datos no estan disponibles
+SENTENCE_END = re.compile(r"(?<=[.!?;])\s+|\n\s*\n")
+SPACES = re.compile(r"\s+")
+# puntuacion que no forma parte de la frase guardada
+TRAILING_PUNCTUATION = ".!?;:,\"')]» "
+LEADING_PUNCTUATION = "\"'([«¿¡ "
+
+# se recuerda si nltk no esta disponible para no intentar cargarlo en cada parte del texto
+_nltk_missing = []
+
+
+def split_sentences(text, language="en"):
+    """
+    Funcion para separar un texto en frases. Se usa el tokenizador de nltk si esta instalado
+    junto con sus datos (punkt) y en otro caso una separacion por signos de puntuacion.
+
+    Parametros:
+    text : str
+        texto a separar
+    language : str
+        idioma del texto ("en" o "es")
+    """
+    sentences = None
+    if(not _nltk_missing):
+        try:
+            from nltk.tokenize import sent_tokenize
+            sentences = sent_tokenize(text, language=NLTK_LANGUAGES.get(language, "english"))
+        except (ImportError, LookupError):
+            _nltk_missing.append(True)
+    if(sentences is None):
+        sentences = SENTENCE_END.split(text)
+
+    # nltk no separa los parrafos sin puntuacion final
+    result = []
+    for sentence in sentences:
+        result.extend(re.split(r"\n\s*\n", sentence))
+    return result
+
+
+def normalize_phrase(phrase):
+    """
+    Funcion para normalizar una frase antes de guardarla: minusculas, espacios simples y
+    sin la puntuacion del inicio y del final.
+    """
+    phrase = SPACES.sub(" ", phrase.lower())
+    return phrase.strip(TRAILING_PUNCTUATION).lstrip(LEADING_PUNCTUATION)
+
+
+class PhraseNode(TrieNode):
+    """
+    Nodo del arbol de frases. A diferencia de TrieNode cada arista guarda una cadena completa
+    (label) en lugar de un caracter, y los hijos se indexan por el primer caracter de su label.
+    """
+
+    def __init__(self, label=""):
+        super().__init__()
+        self.label = label
+
+
+class PhraseIndex:
+    """
+    Indice de frases para el autocompletado de frases completas, separado de la Trie de
+    palabras para no mezclar frases con el vocabulario (all_words).
+
+    Las frases se guardan en un arbol de prefijos comprimido (radix tree): las cadenas sin
+    ramificaciones se guardan en un solo nodo, por lo que el numero de nodos es a lo mas dos
+    veces el numero de frases aunque cada frase tenga decenas de caracteres. Igual que en la
+    Trie cada nodo guarda sus TOP_K_CACHE frases mas frecuentes, de modo que consultar un
+    prefijo cuesta lo que recorrer el prefijo.
+
+    Los textos se pueden agregar por partes (ingest) sin tenerlos completos en memoria.
+    """
+
+    def __init__(self, language="en", max_phrase_length=200):
+        self.language = language
+        self.max_phrase_length = max_phrase_length
+        self.root = PhraseNode()
+        # posicion -> texto de la frase, en orden de insercion
+        self.phrases = []
+        self.number_of_phrases = 0
+
+    def insert(self, phrase, count=1):
+        """
+        Funcion para agregar una frase al indice o aumentar su frecuencia.
+
+        Parametros:
+        self : objeto tipo PhraseIndex
+            Instancia de la clase PhraseIndex que llama a este método.
+        phrase : str
+            frase a agregar
+        count : int
+            numero de veces que se agrega la frase
+        """
+        phrase = normalize_phrase(phrase)
+        if(len(phrase) == 0 or len(phrase) > self.max_phrase_length):
+            return False
+
+        node = self.root
+        # nodos de los prefijos de la frase, para actualizar sus frases mas frecuentes
+        path = [node]
+        i = 0
+        while i < len(phrase):
+            child = node.children.get(phrase[i])
+            if(child is None):
+                # el resto de la frase queda en una sola hoja
+                child = PhraseNode(phrase[i:])
+                node.children[phrase[i]] = child
+                node = child
+                path.append(node)
+                break
+
+            label = child.label
+            common = 1
+            limit = min(len(label), len(phrase) - i)
+            while common < limit and label[common] == phrase[i + common]:
+                common += 1
+
+            if(common < len(label)):
+                # la frase se separa a la mitad de la arista: se crea un nodo intermedio
+                middle = PhraseNode(label[:common])
+                child.label = label[common:]
+                middle.children[child.label[0]] = child
+                # el subarbol del nodo intermedio es el mismo que el del hijo
+                middle.top = list(child.top)
+                node.children[phrase[i]] = middle
+                child = middle
+
+            node = child
+            path.append(node)
+            i += common
+
+        node.is_eow = True
+        if(node.freq == 0):
+            node.word_id = len(self.phrases)
+            self.phrases.append(phrase)
+            self.number_of_phrases = len(self.phrases)
+        node.freq += count
+
+        for prefix_node in path:
+            update_top(prefix_node, node)
+        return True
+
+    def ingest(self, chunks):
+        """
+        Funcion para agregar las frases de un texto recibido por partes, por ejemplo las
+        lineas de un archivo. La ultima frase de cada parte puede estar incompleta, por lo que
+        se conserva y se une con la siguiente parte.
+
+        Parametros:
+        self : objeto tipo PhraseIndex
+            Instancia de la clase PhraseIndex que llama a este método.
+        chunks : str o iterable
+            texto completo o partes del texto en orden
+
+        Regresa el numero de frases agregadas.
+        """
+        if(isinstance(chunks, str)):
+            chunks = [chunks]
+
+        inserted = 0
+        carry = ""
+        # se descarta el resto de una frase que supero la longitud maxima
+        skipping = False
+        for chunk in chunks:
+            sentences = split_sentences(carry + chunk, self.language)
+            if(not sentences):
+                continue
+            carry = sentences.pop()
+
+            for sentence in sentences:
+                if(skipping):
+                    skipping = False
+                    continue
+                inserted += self.insert(sentence)
+
+            if(len(carry) > self.max_phrase_length):
+                # una frase tan larga no se sugiere, no se acumula en memoria
+                carry = ""
+                skipping = True
+
+        if(carry and not skipping):
+            inserted += self.insert(carry)
+        return inserted
+
+    def _find(self, prefix):
+        """
+        Funcion para obtener el nodo cuyo subarbol contiene las frases que comienzan con el
+        prefijo, o None si ninguna frase comienza con el.
+        """
+        node = self.root
+        i = 0
+        while i < len(prefix):
+            child = node.children.get(prefix[i])
+            if(child is None):
+                return None
+            label = child.label
+            if(prefix.startswith(label, i)):
+                i += len(label)
+            elif(label.startswith(prefix[i:])):
+                # el prefijo termina a la mitad de la arista
+                i = len(prefix)
+            else:
+                return None
+            node = child
+        return node
+
+    def get_suggestions(self, prefix, n=5):
+        """
+        Funcion para obtener las n frases mas frecuentes que comienzan con el prefijo dado.
+
+        Parametros:
+        self : objeto tipo PhraseIndex
+            Instancia de la clase PhraseIndex que llama a este método.
+        prefix : str
+            texto escrito por el usuario
+        n : int
+            numero de frases a obtener
+        """
+        # se conserva el espacio final, indica que la palabra anterior ya esta completa
+        prefix = SPACES.sub(" ", prefix.lower()).lstrip(LEADING_PUNCTUATION)
+        if(len(prefix) == 0):
+            return []
+
+        node = self._find(prefix)
+        if(node is None):
+            return []
+
+        if(n <= TOP_K_CACHE):
+            top = node.top[:n]
+        else:
+            top = heapq.nsmallest(n, self._subtree_phrases(node), key=rank_key)
+        return [self.phrases[p.word_id] for p in top]
+
+    def get_phrase_freq(self, phrase):
+        """
+        Funcion para obtener el numero de veces que se ha agregado una frase.
+        """
+        phrase = normalize_phrase(phrase)
+        node = self._find(phrase)
+        if(node is None or not node.is_eow or self.phrases[node.word_id] != phrase):
+            return 0
+        return node.freq
+
+    def _subtree_phrases(self, node):
+        """
+        Generador de los nodos finales de frase dentro del subarbol de un nodo.
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if(node.is_eow):
+                yield node
+            stack.extend(node.children.values())
+
+    def get_state(self):
+        """
+        Obtiene el estado serializable del indice: las frases en orden de insercion y sus
+        frecuencias, sin los nodos para evitar la recursion al serializar el arbol.
+        """
+        freqs = array("I", [0] * len(self.phrases))
+        for node in self._subtree_phrases(self.root):
+            freqs[node.word_id] = node.freq
+        return {"phrases": self.phrases, "freqs": freqs}
+
+    @classmethod
+    def from_state(cls, language, state):
+        """
+        Crea un indice a partir de un estado obtenido con get_state. Las frases se agregan en
+        su orden original para conservar sus posiciones.
+        """
+        index = cls(language)
+        for phrase, freq in zip(state["phrases"], state["freqs"]):
+            index.insert(phrase, freq)
+        return index
+
+    def __len__(self):
+        return len(self.phrases)
@@ -0,0 +1,130 @@
+import collections
+import threading
+import time
+
+import dictionary_build
+
+# numero de palabras mas usadas que se cargan antes de poder usar el diccionario
+CORE_DICT_SIZE = 3000
+# palabras base cuyas conjugaciones se calculan y agregan juntas en segundo plano
+LOAD_BATCH_SIZE = 500
+
+
+class ProgressiveLoader:
+    """
+    Carga en segundo plano el resto del diccionario base de una Trie que se construyo solo
+    con sus palabras mas usadas (ver Trie con progressive=True).
+
+    El hilo de carga recorre las dict_size palabras base en orden de uso por bloques de
+    LOAD_BATCH_SIZE: calcula sus conjugaciones y agrega a la Trie las palabras que faltan,
+    con el candado lock tomado. Al terminar, el vocabulario es el mismo que el de la
+    construccion completa, aunque con otras posiciones en all_words: las palabras del
+    nucleo van primero.
+
+    Mientras dura la carga la Trie es el unico escritor: las consultas se responden con lo
+    cargado hasta el momento (son provisionales) y las modificaciones de otros hilos
+    (insert, save_next_words, insert_paragraph) se guardan con defer y se aplican en orden
+    al terminar, despues de guardar el snapshot del diccionario base. Asi las palabras
+    del usuario no se confunden con las del diccionario base ni quedan en su snapshot.
+    """
+
+    def __init__(self, trie, snapshot_path=None):
+        self.trie = trie
+        self.snapshot_path = snapshot_path
+        self.lock = threading.Lock()
+        self.loaded = threading.Event()
+        # modificaciones de otros hilos en espera: (funcion, argumentos)
+        self._pending = collections.deque()
+        self._done = False
+        self.error = None
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        """
+        Funcion para iniciar el hilo de carga.
+        """
+        self._thread.start()
+
+    def defer(self, fn, args):
+        """
+        Funcion para guardar una modificacion hasta que termine la carga. Las llamadas del
+        propio hilo de carga no se guardan.
+
+        Parametros:
+        self : objeto tipo ProgressiveLoader
+            Instancia de la clase ProgressiveLoader que llama a este método.
+        fn : function
+            metodo de la Trie
+        args : tuple
+            argumentos del metodo
+
+        Regresa True si la modificacion quedo en espera, False si se debe aplicar ya.
+        """
+        if(threading.current_thread() is self._thread):
+            return False
+        with self.lock:
+            if(self._done):
+                return False
+            self._pending.append((fn, args))
+            return True
+
+    def pending_updates(self):
+        """
+        Funcion para obtener el numero de modificaciones en espera.
+        """
+        return len(self._pending)
+
+    def wait(self, timeout=None):
+        """
+        Funcion para esperar a que termine la carga.
+
+        Regresa True si termino, False si se acabo el tiempo de espera.
+        """
+        return self.loaded.wait(timeout)
+
+    def _run(self):
+        """
+        Ciclo del hilo de carga: agrega las palabras que faltan y al terminar aplica las
+        modificaciones en espera.
+        """
+        trie = self.trie
+        start = time.perf_counter()
+        try:
+            words = dictionary_build.top_words(trie.language, trie.dict_size)
+            # vocabulario de la construccion completa hasta el bloque actual
+            seen = set()
+            for i in range(0, len(words), LOAD_BATCH_SIZE):
+                block = words[i:i + LOAD_BATCH_SIZE]
+                # un solo proceso: un pool creado desde un hilo copiaria los candados de los demas
+                forms = dictionary_build.expand_word_forms(block, workers=1)
+                batch = dictionary_build.merge_words(block, forms, seen)
+                with self.lock:
+                    trie._append_base_words(batch)
+            trie.build_timings["background"] = time.perf_counter() - start
+            print("\nSe completo la carga de %s palabras (%s)\n" %
+                  (trie.number_of_words, dictionary_build.format_timings(trie.build_timings)))
+            if(self.snapshot_path is not None):
+                trie.save_snapshot(self.snapshot_path)
+        except Exception as e:
+            # el diccionario se queda con lo cargado y no se guarda el snapshot
+            self.error = e
+            print("\nNo se pudo completar la carga del diccionario: %s\n" % e)
+        finally:
+            self._finish()
+
+    def _finish(self):
+        """
+        Funcion para marcar la carga como terminada y aplicar las modificaciones en espera,
+        en el orden en que llegaron.
+        """
+        with self.lock:
+            self._done = True
+            self.trie._loader = None
+            while self._pending:
+                fn, args = self._pending.popleft()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    # una modificacion invalida no debe detener las siguientes
+                    print("No se pudo aplicar una modificacion en espera: %s" % e)
+        self.loaded.set()
@@ -0,0 +1,187 @@
+import threading
+from collections import OrderedDict
+
+# numero maximo de resultados guardados por defecto
+QUERY_CACHE_SIZE = 4096
+
+
+class QueryCache:
+    """
+    Cache LRU acotada para los resultados de las consultas de la Trie (palabras similares,
+    autocompletado y palabras siguientes).
+
+    Cada resultado se guarda con una llave (tipo de consulta, argumentos...) y una etiqueta
+    que indica de que parte del diccionario depende, por ejemplo el prefijo "ca" en el
+    autocompletado o la longitud 5 en las palabras similares. Al modificar el diccionario
+    solo se descartan los resultados de las etiquetas afectadas (ver invalidate). Los
+    resultados son listas y se copian al guardar y al consultar, para que quien las recibe
+    pueda modificarlas.
+
+    Las consultas (get) no usan candado para que varios hilos puedan leer a la vez; put e
+    invalidate si lo usan. Cada invalidacion aumenta generation y put descarta un resultado
+    calculado antes del ultimo cambio del diccionario, para no guardar un resultado viejo
+    despues de su invalidacion.
+    """
+
+    def __init__(self, max_size=QUERY_CACHE_SIZE):
+        self.max_size = max_size
+        # llave -> (resultado, etiqueta), del menos al mas recientemente usado
+        self.entries = OrderedDict()
+        # tipo de consulta -> etiqueta -> llaves guardadas con esa etiqueta
+        self.tags = {}
+        # tipo de consulta -> [aciertos, fallos]
+        self.counters = {}
+        # numero de invalidaciones, ver put
+        self.generation = 0
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """
+        Funcion para obtener una copia del resultado guardado de una consulta, o None si no
+        esta en la cache.
+
+        Parametros:
+        self : objeto tipo QueryCache
+            Instancia de la clase QueryCache que llama a este método.
+        key : tuple
+            llave de la consulta, el primer elemento es el tipo de consulta
+        """
+        counter = self.counters.get(key[0])
+        if(counter is None):
+            counter = self.counters.setdefault(key[0], [0, 0])
+        entry = self.entries.get(key)
+        if(entry is None):
+            counter[1] += 1
+            return None
+        counter[0] += 1
+        try:
+            self.entries.move_to_end(key)
+        except KeyError:
+            # otro hilo la descarto despues de leerla, el resultado sigue siendo valido
+            pass
+        return list(entry[0])
+
+    def put(self, key, value, tag, generation=None):
+        """
+        Funcion para guardar el resultado de una consulta, descartando el menos usado si la
+        cache esta llena.
+
+        Parametros:
+        self : objeto tipo QueryCache
+            Instancia de la clase QueryCache que llama a este método.
+        key : tuple
+            llave de la consulta
+        value : list
+            resultado de la consulta
+        tag : str o int
+            parte del diccionario de la que depende el resultado
+        generation : int
+            valor de generation antes de calcular el resultado; si cambio, el resultado
+            puede ser anterior a una modificacion y no se guarda
+        """
+        with self._lock:
+            if(generation is not None and generation != self.generation):
+                return
+            if(key in self.entries):
+                self._remove(key)
+            self.entries[key] = (list(value), tag)
+            self.tags.setdefault(key[0], {}).setdefault(tag, set()).add(key)
+            while len(self.entries) > self.max_size:
+                self._remove(next(iter(self.entries)))
+
+    def invalidate(self, kind, tags):
+        """
+        Funcion para descartar todos los resultados de un tipo de consulta guardados con
+        alguna de las etiquetas dadas.
+
+        Parametros:
+        self : objeto tipo QueryCache
+            Instancia de la clase QueryCache que llama a este método.
+        kind : str
+            tipo de consulta
+        tags : iterable
+            etiquetas afectadas por un cambio del diccionario
+        """
+        with self._lock:
+            self.generation += 1
+            self._drop(kind, tags)
+
+    def invalidate_prefixes(self, kind, word):
+        """
+        Funcion para descartar los resultados de un tipo de consulta cuya etiqueta es un
+        prefijo no vacio de word.
+
+        Parametros:
+        self : objeto tipo QueryCache
+            Instancia de la clase QueryCache que llama a este método.
+        kind : str
+            tipo de consulta
+        word : str
+            palabra modificada
+        """
+        with self._lock:
+            self.generation += 1
+            if(self.tags.get(kind)):
+                self._drop(kind, [word[:end] for end in range(1, len(word) + 1)])
+
+    def invalidate_kind(self, kind):
+        """
+        Funcion para descartar todos los resultados de un tipo de consulta.
+        """
+        with self._lock:
+            self.generation += 1
+            self._drop(kind, list(self.tags.get(kind, ())))
+
+    def clear(self):
+        """
+        Funcion para descartar todos los resultados sin reiniciar los contadores.
+        """
+        with self._lock:
+            self.generation += 1
+            self.entries.clear()
+            self.tags.clear()
+
+    def _drop(self, kind, tags):
+        """
+        Funcion para quitar las llaves de las etiquetas dadas, se llama con el candado.
+        """
+        kind_tags = self.tags.get(kind)
+        if(not kind_tags):
+            return
+        entries = self.entries
+        for tag in tags:
+            keys = kind_tags.pop(tag, None)
+            if(keys is not None):
+                for key in keys:
+                    del entries[key]
+
+    def _remove(self, key):
+        """
+        Funcion para quitar una llave de la cache y de su etiqueta.
+        """
+        _, tag = self.entries.pop(key)
+        kind_tags = self.tags[key[0]]
+        keys = kind_tags[tag]
+        keys.discard(key)
+        if(not keys):
+            del kind_tags[tag]
+
+    def stats(self):
+        """
+        Funcion para obtener los aciertos, fallos y tasa de acierto de cada tipo de consulta,
+        ademas del numero de resultados guardados.
+        """
+        kinds = {}
+        for kind, (hits, misses) in list(self.counters.items()):
+            total = hits + misses
+            kinds[kind] = {"hits": hits, "misses": misses, "hit_rate": hits / total if total else 0.0}
+        return {"size": len(self.entries), "max_size": self.max_size, "queries": kinds}
+
+    def reset_stats(self):
+        """
+        Funcion para reiniciar los contadores de aciertos y fallos.
+        """
+        self.counters = {}
+
+    def __len__(self):
+        return len(self.entries)
@@ -0,0 +1,129 @@
+import os
+import pickle
+from importlib import metadata
+
+# version del formato del snapshot, incrementar cuando cambie la estructura guardada
+SNAPSHOT_VERSION = 6
+
+# librerias de las que depende el contenido del diccionario
+SOURCE_LIBRARIES = ("wordfreq", "word_forms")
+
+
+def library_versions():
+    """
+    Funcion para obtener las versiones instaladas de las librerias que generan el diccionario.
+    Si alguna cambia, el snapshot guardado deja de ser valido.
+    """
+    versions = {}
+    for lib in SOURCE_LIBRARIES:
+        try:
+            versions[lib] = metadata.version(lib)
+        except metadata.PackageNotFoundError:
+            versions[lib] = None
+    return versions
+
+
+def snapshot_path(snapshot_dir, language, dict_size, engine="dict"):
+    """
+    Funcion para obtener la ruta del snapshot de un idioma y tamaño de diccionario.
+
+    Parametros:
+    snapshot_dir : str
+        directorio donde se guardan los snapshots
+    language : str
+        idioma del diccionario
+    dict_size : int
+        numero de palabras base del diccionario
+    engine : str
+        motor de almacenamiento de la Trie
+    """
+    return os.path.join(snapshot_dir, "trie_%s_%s_%s.pkl" % (engine, language, dict_size))
+
+
+def user_snapshot_path(snapshot_dir, language, dict_size, engine="dict"):
+    """
+    Funcion para obtener la ruta del snapshot que guarda el diccionario junto con lo
+    aprendido del usuario (frecuencias, palabras agregadas y secuencias de palabras).
+
+    Parametros:
+    snapshot_dir : str
+        directorio donde se guardan los snapshots
+    language : str
+        idioma del diccionario
+    dict_size : int
+        numero de palabras base del diccionario
+    engine : str
+        motor de almacenamiento de la Trie
+    """
+    return os.path.join(snapshot_dir, "trie_%s_%s_%s_user.pkl" % (engine, language, dict_size))
+
+
+def make_header(language, dict_size, engine):
+    """
+    Funcion para generar el encabezado que identifica el contenido de un snapshot.
+    """
+    return {
+        "version": SNAPSHOT_VERSION,
+        "language": language,
+        "dict_size": dict_size,
+        "engine": engine,
+        "libraries": library_versions(),
+    }
+
+
+def save_snapshot(path, language, dict_size, engine, state):
+    """
+    Funcion para guardar el estado de la Trie en disco. Se escribe primero un archivo
+    temporal y despues se reemplaza para no dejar snapshots incompletos.
+
+    Parametros:
+    path : str
+        ruta del archivo de snapshot
+    language : str
+        idioma del diccionario
+    dict_size : int
+        numero de palabras base del diccionario
+    engine : str
+        motor de almacenamiento de la Trie
+    state : dict
+        estado serializable de la Trie
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        # el encabezado se guarda por separado para validarlo sin leer todo el estado
+        pickle.dump(make_header(language, dict_size, engine), f, protocol=pickle.HIGHEST_PROTOCOL)
+        pickle.dump(state, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def load_snapshot(path, language, dict_size, engine="dict"):
+    """
+    Funcion para cargar el estado de la Trie desde disco. Regresa None si el snapshot no
+    existe, esta dañado o fue generado con otro idioma, tamaño, motor o version de librerias.
+
+    Parametros:
+    path : str
+        ruta del archivo de snapshot
+    language : str
+        idioma esperado
+    dict_size : int
+        numero de palabras base esperado
+    engine : str
+        motor de almacenamiento esperado
+    """
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, "rb") as f:
+            header = pickle.load(f)
+            # si el encabezado no coincide es necesario reconstruir el diccionario
+            if header != make_header(language, dict_size, engine):
+                return None
+            return pickle.load(f)
+    except (OSError, EOFError, pickle.UnpicklingError, AttributeError, ValueError):
+        return None
@@ -0,0 +1,153 @@
+import heapq
+import itertools
+import queue
+import threading
+import time
+import traceback
+
+
+class SpellCheckWorker:
+    """
+    Hilo de trabajo para ejecutar la revision ortografica fuera del hilo de la interfaz.
+
+    Cada tarea tiene una llave. Si se envia una tarea con una llave que ya tiene una tarea
+    pendiente, la anterior se descarta (solo se ejecuta la mas reciente), y si su resultado
+    llega cuando ya existe una tarea mas nueva con la misma llave, el resultado se ignora.
+    Las tareas pueden esperar un retraso antes de ejecutarse para agrupar eventos seguidos
+    (debounce).
+
+    Los resultados no se entregan desde el hilo de trabajo: la interfaz llama a poll()
+    periodicamente (por ejemplo con root.after) y los callbacks se ejecutan en su hilo. Si
+    una tarea lanza una excepcion, esta se entrega a su error_callback en lugar del
+    resultado.
+    """
+
+    def __init__(self):
+        self._results = queue.Queue()
+        self._lock = threading.Lock()
+        # avisa al hilo de trabajo que llego una tarea
+        self._ready = threading.Condition(self._lock)
+        # tareas por ejecutar ordenadas por momento de ejecucion y llegada: (momento de
+        # ejecucion, generacion, llave); las entradas de tareas reemplazadas o canceladas se
+        # descartan al salir
+        self._due = []
+        # llave -> tarea pendiente (generacion, momento de ejecucion, funcion, argumentos,
+        # callback, error_callback)
+        self._pending = {}
+        # llave -> generacion de la tarea mas reciente, solo mientras esta pendiente o en
+        # ejecucion; las generaciones no se repiten entre llaves ni al volver a usar una llave
+        self._generation = {}
+        self._generations = itertools.count(1)
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, key, fn, args=(), callback=None, delay=0, error_callback=None):
+        """
+        Funcion para enviar una tarea al hilo de trabajo.
+
+        Parametros:
+        self : objeto tipo SpellCheckWorker
+            Instancia de la clase SpellCheckWorker que llama a este método.
+        key : hashable
+            llave de la tarea, una tarea nueva con la misma llave reemplaza a la anterior
+        fn : function
+            funcion a ejecutar en el hilo de trabajo
+        args : tuple
+            argumentos de la funcion
+        callback : function
+            funcion que recibe el resultado, se ejecuta en el hilo que llama a poll()
+        delay : float
+            segundos a esperar antes de ejecutar la tarea
+        error_callback : function
+            funcion que recibe la excepcion si la tarea falla, se ejecuta en el hilo que
+            llama a poll()
+        """
+        with self._ready:
+            generation = next(self._generations)
+            due = time.monotonic() + delay
+            self._generation[key] = generation
+            self._pending[key] = (generation, due, fn, args, callback, error_callback)
+            heapq.heappush(self._due, (due, generation, key))
+            self._ready.notify()
+
+    def cancel(self, key):
+        """
+        Funcion para cancelar la tarea pendiente de una llave y descartar su resultado.
+        """
+        with self._lock:
+            self._pending.pop(key, None)
+            # sin registro, el resultado de una tarea en ejecucion ya no es el mas reciente
+            self._generation.pop(key, None)
+
+    def cancel_all(self):
+        """
+        Funcion para cancelar todas las tareas pendientes y descartar sus resultados.
+        """
+        with self._lock:
+            self._generation.clear()
+            self._pending.clear()
+            self._due.clear()
+
+    def _next_job(self):
+        """
+        Funcion para esperar a la siguiente tarea que ya debe ejecutarse y quitarla de las
+        pendientes. Mientras la primera tarea no toca, el hilo duerme hasta su momento de
+        ejecucion o hasta que llegue una tarea nueva.
+
+        Regresa una tupla (llave, tarea).
+        """
+        with self._ready:
+            while True:
+                if(not self._due):
+                    self._ready.wait()
+                    continue
+                due, generation, key = self._due[0]
+                job = self._pending.get(key)
+                if(job is None or job[0] != generation):
+                    # la tarea fue reemplazada por una mas nueva con la misma llave o cancelada
+                    heapq.heappop(self._due)
+                    continue
+                wait = due - time.monotonic()
+                if(wait > 0):
+                    self._ready.wait(wait)
+                    continue
+                heapq.heappop(self._due)
+                del self._pending[key]
+                return key, job
+
+    def _run(self):
+        """
+        Ciclo del hilo de trabajo: ejecuta las tareas por momento de ejecucion y, con el
+        mismo momento, en orden de llegada.
+        """
+        while True:
+            key, job = self._next_job()
+            generation, due, fn, args, callback, error_callback = job
+
+            try:
+                result = fn(*args)
+            except Exception as e:
+                traceback.print_exc()
+                # el error tambien se entrega para liberar el registro de la llave
+                self._results.put((key, generation, error_callback, e))
+                continue
+            self._results.put((key, generation, callback, result))
+
+    def poll(self):
+        """
+        Funcion para entregar los resultados terminados a sus callbacks. Debe llamarse desde
+        el hilo de la interfaz.
+        """
+        while True:
+            try:
+                key, generation, callback, result = self._results.get_nowait()
+            except queue.Empty:
+                return
+            with self._lock:
+                # descartamos resultados de tareas que ya fueron reemplazadas o canceladas
+                latest = self._generation.get(key) == generation
+                if(latest and key not in self._pending):
+                    # no hay nada mas pendiente con esta llave, se libera su registro
+                    del self._generation[key]
+            if(latest and callback is not None):
+                callback(result)
@@ -0,0 +1,532 @@
+import argparse
+import asyncio
+import concurrent.futures
+import itertools
+import json
+import os
+import tempfile
+
+# ruta por defecto del socket Unix del servicio
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), "trie-suggestions.sock")
+
+# numero maximo de solicitudes que se resuelven juntas
+MAX_BATCH = 256
+# solicitudes en espera antes de dejar de leer de los clientes (backpressure)
+MAX_PENDING = 4096
+# solicitudes sin respuesta permitidas por conexion
+MAX_INFLIGHT = 256
+
+# limites de los argumentos de las solicitudes: distancia de edicion, numero de resultados
+# y conteo de una insercion (las frecuencias de CompactTrie son enteros sin signo de 32 bits)
+MAX_DISTANCE = 3
+MAX_RESULTS = 100
+MAX_COUNT = (1 << 32) - 1
+
+# operaciones que solo leen el diccionario y las que lo modifican
+READ_OPERATIONS = ("search", "autocomplete_prefix", "get_similar_words", "get_next_words")
+WRITE_OPERATIONS = ("insert", "save_next_words")
+
+
+class SuggestionService:
+    """
+    Servicio local de sugerencias sobre una Trie ya cargada, para que varios editores y
+    herramientas compartan un mismo diccionario.
+
+    El protocolo es JSON por lineas: cada solicitud es un objeto
+    {"id": ..., "op": ..., "args": {...}} y cada respuesta {"id": ..., "result": ...} o
+    {"id": ..., "error": "..."}. Las respuestas pueden llegar en otro orden que las
+    solicitudes, por lo que el cliente las relaciona con el id. Mientras el diccionario se
+    sigue cargando en segundo plano las respuestas llevan ademas "provisional": true.
+
+    Las solicitudes de todas las conexiones se juntan en lotes (micro-batching). Cada lote se
+    resuelve en un hilo aparte para no bloquear el ciclo de eventos: las consultas repetidas
+    se calculan una sola vez, las palabras similares se buscan juntas con
+    get_similar_words_many (con VectorizedIndex es un solo calculo) y despues se aplican las
+    modificaciones en el orden en que llegaron, igual que en Trie.process_text_batch. Mientras
+    se resuelve un lote se acumulan las solicitudes del siguiente.
+
+    Si se juntan MAX_PENDING solicitudes en espera, o MAX_INFLIGHT sin respuesta en una
+    conexion, el servicio deja de leer de los clientes hasta que se liberen (backpressure).
+    """
+
+    def __init__(self, trie, max_batch=MAX_BATCH, batch_wait=0.0, max_pending=MAX_PENDING, max_inflight=MAX_INFLIGHT):
+        self.trie = trie
+        self.max_batch = max_batch
+        self.batch_wait = batch_wait
+        self.max_pending = max_pending
+        self.max_inflight = max_inflight
+        # contadores del servicio, se consultan con la operacion "stats"
+        self.requests = 0
+        self.batches = 0
+        self.connections = 0
+        self._queue = None
+        self._server = None
+        self._batcher = None
+        # tareas que atienden las conexiones abiertas y las que todavia leen solicitudes
+        self._handlers = set()
+        self._reading = set()
+        # un solo hilo modifica y consulta la Trie
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1)
+
+    async def start(self, socket_path=None, host="127.0.0.1", port=None):
+        """
+        Funcion para empezar a recibir conexiones en un socket Unix o, si se da port, en un
+        puerto TCP local.
+
+        Parametros:
+        self : objeto tipo SuggestionService
+            Instancia de la clase SuggestionService que llama a este método.
+        socket_path : str
+            ruta del socket Unix
+        host : str
+            direccion para TCP
+        port : int
+            puerto TCP, si se da se usa en lugar del socket Unix
+        """
+        self._queue = asyncio.Queue(self.max_pending)
+        self._batcher = asyncio.create_task(self._run_batches())
+        if(port is not None):
+            self._server = await asyncio.start_server(self._handle, host, port)
+        else:
+            if(os.path.exists(socket_path)):
+                os.remove(socket_path)
+            self._server = await asyncio.start_unix_server(self._handle, socket_path)
+        return self._server
+
+    async def close(self):
+        """
+        Funcion para dejar de recibir conexiones y terminar los lotes pendientes. Las
+        conexiones abiertas dejan de leer solicitudes, pero las que ya se recibieron se
+        resuelven y se responden antes de cerrarlas; despues se detiene el ciclo de lotes.
+        """
+        if(self._server is not None):
+            self._server.close()
+        # una conexion que ya dejo de leer esta respondiendo sus ultimas solicitudes
+        for handler in self._reading:
+            handler.cancel()
+        await asyncio.gather(*self._handlers, return_exceptions=True)
+        if(self._server is not None):
+            await self._server.wait_closed()
+        if(self._batcher is not None):
+            # ya no quedan solicitudes en espera
+            self._batcher.cancel()
+            try:
+                await self._batcher
+            except asyncio.CancelledError:
+                pass
+        self._executor.shutdown(wait=True)
+
+    async def _handle(self, reader, writer):
+        """
+        Funcion para atender una conexion: lee solicitudes, las envia al lote y escribe las
+        respuestas conforme se resuelven.
+        """
+        self.connections += 1
+        handler = asyncio.current_task()
+        self._handlers.add(handler)
+        self._reading.add(handler)
+        loop = asyncio.get_running_loop()
+        responses = asyncio.Queue()
+        sender = asyncio.create_task(self._send(writer, responses))
+        inflight = asyncio.Semaphore(self.max_inflight)
+        pending = set()
+
+        def respond(future, request_id):
+            pending.discard(future)
+            inflight.release()
+            responses.put_nowait(_response(request_id, *future.result()))
+
+        try:
+            while True:
+                line = await reader.readline()
+                if(not line):
+                    break
+                try:
+                    request = json.loads(line)
+                    request_id = request.get("id")
+                    op = request["op"]
+                    args = request.get("args", {})
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    responses.put_nowait({"id": None, "error": "solicitud invalida"})
+                    continue
+
+                if(op == "stats"):
+                    responses.put_nowait({"id": request_id, "result": self.stats()})
+                    continue
+                if(op not in READ_OPERATIONS and op not in WRITE_OPERATIONS):
+                    responses.put_nowait({"id": request_id, "error": "operacion desconocida: %s" % op})
+                    continue
+
+                # con demasiadas solicitudes sin respuesta se deja de leer de la conexion
+                await inflight.acquire()
+                future = loop.create_future()
+                future.add_done_callback(lambda f, request_id=request_id: respond(f, request_id))
+                self.requests += 1
+                # si la cola esta llena se espera, lo que tambien detiene la lectura
+                await self._queue.put((op, args, future))
+                # solo se esperan las solicitudes que llegaron a la cola
+                pending.add(future)
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        except asyncio.CancelledError:
+            # close cancela la lectura; la conexion termina normalmente despues de responder
+            # las solicitudes recibidas
+            pass
+        finally:
+            self._reading.discard(handler)
+            if(pending):
+                await asyncio.gather(*pending, return_exceptions=True)
+            responses.put_nowait(None)
+            await sender
+            self.connections -= 1
+            self._handlers.discard(handler)
+
+    async def _send(self, writer, responses):
+        """
+        Funcion para escribir las respuestas de una conexion. drain espera cuando el cliente
+        no lee sus respuestas.
+        """
+        try:
+            while True:
+                response = await responses.get()
+                if(response is None):
+                    break
+                writer.write(json.dumps(response).encode() + b"\n")
+                if(responses.empty()):
+                    await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def _run_batches(self):
+        """
+        Funcion que junta las solicitudes en espera en lotes y los resuelve en el hilo de la
+        Trie, uno a la vez.
+        """
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            if(self.batch_wait > 0 and self._queue.qsize() < self.max_batch):
+                # se espera un poco para juntar mas solicitudes
+                await asyncio.sleep(self.batch_wait)
+            while len(batch) < self.max_batch and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+
+            requests = [(op, args) for op, args, _ in batch]
+            # si el diccionario termina de cargarse durante el lote sus respuestas siguen
+            # marcadas como provisionales
+            provisional = self.trie.is_provisional()
+            try:
+                results = await loop.run_in_executor(self._executor, self.run_batch, requests)
+            except Exception as e:
+                # un error inesperado no debe detener el servicio
+                results = [("error", "error interno: %s" % e)] * len(batch)
+            self.batches += 1
+            for (_, _, future), result in zip(batch, results):
+                if(not future.done()):
+                    future.set_result((result, provisional))
+
+    def run_batch(self, requests):
+        """
+        Funcion para resolver un lote de solicitudes. Las consultas ven el diccionario como
+        estaba al inicio del lote y las modificaciones se aplican despues, en orden.
+
+        Parametros:
+        self : objeto tipo SuggestionService
+            Instancia de la clase SuggestionService que llama a este método.
+        requests : list
+            tuplas (operacion, argumentos)
+
+        Regresa una lista con el resultado de cada solicitud: ("result", valor) o
+        ("error", mensaje).
+        """
+        trie = self.trie
+        results = [None] * len(requests)
+        # consulta -> posiciones del lote que la pidieron
+        queries = {}
+        # (distancia maxima, numero de resultados) -> palabras
+        similar = {}
+        writes = []
+
+        for i, (op, args) in enumerate(requests):
+            try:
+                if(op == "search"):
+                    key = (op, _str_arg(args, "word").lower())
+                elif(op == "autocomplete_prefix"):
+                    key = (op, _str_arg(args, "prefix").lower(), _int_arg(args, "k", 3, 1, MAX_RESULTS))
+                elif(op == "get_similar_words"):
+                    key = (op, _str_arg(args, "word").lower(), _int_arg(args, "max_distance", 2, 0, MAX_DISTANCE),
+                           _int_arg(args, "result_size", 5, 1, MAX_RESULTS))
+                    similar.setdefault(key[2:], set()).add(key[1])
+                elif(op == "get_next_words"):
+                    # el contexto puede ser una sola palabra
+                    if(isinstance(args.get("words"), str)):
+                        context = [args["words"]]
+                    else:
+                        context = _words_arg(args, "words")
+                    key = (op, tuple(w.lower() for w in context), _int_arg(args, "n_suggestions", 5, 1, MAX_RESULTS))
+                else:
+                    writes.append(i)
+                    continue
+            except (KeyError, ValueError, TypeError, AttributeError, OverflowError) as e:
+                results[i] = ("error", "argumentos invalidos: %s" % e)
+                continue
+            queries.setdefault(key, []).append(i)
+
+        # las palabras similares de todo el lote se buscan juntas
+        answers = {}
+        for (max_distance, result_size), words in similar.items():
+            words = sorted(words)
+            for word, found in zip(words, trie.get_similar_words_many(words, max_distance, result_size)):
+                answers[("get_similar_words", word, max_distance, result_size)] = found
+
+        # cada consulta distinta se calcula una sola vez
+        for key, positions in queries.items():
+            op = key[0]
+            if(key in answers):
+                value = answers[key]
+            elif(op == "search"):
+                value = trie.search(key[1])
+            elif(op == "autocomplete_prefix"):
+                value = trie.autocomplete_prefix(key[1], key[2])
+            else:
+                value = trie.get_next_words(list(key[1]), key[2])
+            for i in positions:
+                results[i] = ("result", value)
+
+        for i in writes:
+            op, args = requests[i]
+            try:
+                if(op == "insert"):
+                    word = _str_arg(args, "word").lower()
+                    # se valida antes de modificar la Trie, tambien contra la frecuencia acumulada
+                    count = _int_arg(args, "count", 1, 1, MAX_COUNT - trie.get_node_freq(word))
+                    trie.insert(word, count)
+                else:
+                    words = _words_arg(args, "words")
+                    trie.save_next_words(words, _int_arg(args, "start", 1, 0, len(words)))
+                results[i] = ("result", True)
+            except (KeyError, ValueError, TypeError, AttributeError, OverflowError) as e:
+                results[i] = ("error", "argumentos invalidos: %s" % e)
+
+        return results
+
+    def stats(self):
+        """
+        Funcion para obtener los contadores del servicio.
+        """
+        return {
+            "requests": self.requests,
+            "batches": self.batches,
+            "mean_batch_size": self.requests / self.batches if self.batches else 0.0,
+            "pending": self._queue.qsize() if self._queue is not None else 0,
+            "connections": self.connections,
+            "words": self.trie.number_of_words,
+            "provisional": self.trie.is_provisional(),
+        }
+
+
+def _int_arg(args, name, default, low, high):
+    """
+    Funcion para leer un argumento entero de una solicitud y verificar que este en el
+    rango [low, high].
+
+    Parametros:
+    args : dict
+        argumentos de la solicitud
+    name : str
+        nombre del argumento
+    default : int
+        valor si la solicitud no lo incluye
+    low : int
+        valor minimo permitido
+    high : int
+        valor maximo permitido
+    """
+    value = int(args.get(name, default))
+    if(value < low or value > high):
+        raise ValueError("%s debe estar entre %d y %d" % (name, low, high))
+    return value
+
+
+def _str_arg(args, name):
+    """
+    Funcion para leer un argumento de texto de una solicitud. Un valor de otro tipo (un
+    numero, una lista) se rechaza en lugar de convertirse a texto.
+
+    Parametros:
+    args : dict
+        argumentos de la solicitud
+    name : str
+        nombre del argumento
+    """
+    value = args[name]
+    if(not isinstance(value, str)):
+        raise TypeError("%s debe ser una cadena" % name)
+    return value
+
+
+def _words_arg(args, name):
+    """
+    Funcion para leer un argumento con una lista de palabras de una solicitud.
+
+    Parametros:
+    args : dict
+        argumentos de la solicitud
+    name : str
+        nombre del argumento
+    """
+    value = args[name]
+    if(not isinstance(value, list) or not all(isinstance(w, str) for w in value)):
+        raise TypeError("%s debe ser una lista de cadenas" % name)
+    return value
+
+
+def _response(request_id, result, provisional=False):
+    """
+    Funcion para armar la respuesta de una solicitud a partir de su resultado.
+    """
+    kind, value = result
+    response = {"id": request_id, kind: value}
+    if(provisional and kind == "result"):
+        response["provisional"] = True
+    return response
+
+
+class SuggestionClient:
+    """
+    Cliente asincrono del servicio. Permite enviar varias solicitudes sin esperar las
+    respuestas anteriores (cada una se relaciona con su id).
+    """
+
+    def __init__(self, reader, writer):
+        self._reader = reader
+        self._writer = writer
+        self._ids = itertools.count()
+        # id -> futuro de la respuesta
+        self._waiting = {}
+        self._receiver = asyncio.create_task(self._receive())
+
+    @classmethod
+    async def connect(cls, socket_path=DEFAULT_SOCKET, host="127.0.0.1", port=None):
+        """
+        Funcion para conectarse al servicio por socket Unix o, si se da port, por TCP.
+        """
+        if(port is not None):
+            reader, writer = await asyncio.open_connection(host, port)
+        else:
+            reader, writer = await asyncio.open_unix_connection(socket_path)
+        return cls(reader, writer)
+
+    async def _receive(self):
+        """
+        Funcion para leer las respuestas y entregarlas a quien hizo cada solicitud.
+        """
+        try:
+            while True:
+                line = await self._reader.readline()
+                if(not line):
+                    break
+                response = json.loads(line)
+                future = self._waiting.pop(response.get("id"), None)
+                if(future is not None and not future.done()):
+                    future.set_result(response)
+        finally:
+            for future in self._waiting.values():
+                if(not future.done()):
+                    future.set_exception(ConnectionError("conexion cerrada"))
+
+    async def call(self, op, **args):
+        """
+        Funcion para enviar una solicitud y esperar su resultado.
+
+        Parametros:
+        self : objeto tipo SuggestionClient
+            Instancia de la clase SuggestionClient que llama a este método.
+        op : str
+            operacion del servicio
+        args : dict
+            argumentos de la operacion
+
+        Lanza RuntimeError si el servicio responde con un error.
+        """
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._waiting[request_id] = future
+        self._writer.write(json.dumps({"id": request_id, "op": op, "args": args}).encode() + b"\n")
+        await self._writer.drain()
+        response = await future
+        if("error" in response):
+            raise RuntimeError(response["error"])
+        return response["result"]
+
+    async def close(self):
+        """
+        Funcion para cerrar la conexion.
+        """
+        self._writer.close()
+        await self._writer.wait_closed()
+        self._receiver.cancel()
+
+
+async def serve(args):
+    """
+    Funcion para cargar el diccionario y atender solicitudes hasta que se interrumpa el
+    proceso. Lo aprendido se guarda en el directorio de snapshots al terminar.
+    """
+    from dictionary_manager import DictionaryManager
+
+    dictionaries = DictionaryManager(args.dict_size, args.snapshot_dir, learned_words=args.learned_words,
+                                     progressive=args.progressive)
+    trie = dictionaries.get(args.language)
+    if(args.fuzzy == "symspell"):
+        trie.enable_symspell()
+    elif(args.fuzzy == "numpy"):
+        trie.enable_vectorized()
+
+    service = SuggestionService(trie, args.max_batch, args.batch_wait_ms / 1000, args.max_pending, args.max_inflight)
+    await service.start(args.socket, args.host, args.port)
+    where = "%s:%d" % (args.host, args.port) if args.port is not None else args.socket
+    print("servicio de sugerencias (%s, %d palabras) en %s" % (args.language, trie.number_of_words, where))
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await service.close()
+        if(args.socket and args.port is None and os.path.exists(args.socket)):
+            os.remove(args.socket)
+        dictionaries.save_all()
+
+
+def main():
+    from corpus_ingest import SNAPSHOT_DIR
+    from learned_vocabulary import LEARNED_MAX_WORDS
+
+    parser = argparse.ArgumentParser(description="Servicio local de autocompletado y sugerencias ortograficas")
+    parser.add_argument("--socket", default=DEFAULT_SOCKET, help="ruta del socket Unix")
+    parser.add_argument("--port", type=int, help="puerto TCP local, en lugar del socket Unix")
+    parser.add_argument("--host", default="127.0.0.1", help="direccion para TCP")
+    parser.add_argument("--language", default="en", help="idioma del diccionario (en o es)")
+    parser.add_argument("--dict-size", type=int, default=50000, help="numero de palabras base del diccionario")
+    parser.add_argument("--snapshot-dir", default=SNAPSHOT_DIR, help="directorio de snapshots")
+    parser.add_argument("--fuzzy", default="symspell", choices=["scalar", "symspell", "numpy"],
+                        help="forma de buscar palabras similares")
+    parser.add_argument("--learned-words", type=int, default=LEARNED_MAX_WORDS,
+                        help="numero maximo de palabras aprendidas antes de descartar las menos usadas")
+    parser.add_argument("--progressive", action="store_true",
+                        help="atender con las palabras mas usadas mientras el resto del diccionario se carga")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH, help="solicitudes maximas por lote")
+    parser.add_argument("--batch-wait-ms", type=float, default=0.0,
+                        help="espera para juntar solicitudes antes de resolver un lote")
+    parser.add_argument("--max-pending", type=int, default=MAX_PENDING, help="solicitudes en espera antes de aplicar backpressure")
+    parser.add_argument("--max-inflight", type=int, default=MAX_INFLIGHT, help="solicitudes sin respuesta por conexion")
+    args = parser.parse_args()
+
+    try:
+        asyncio.run(serve(args))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+class SymSpellIndex:
+    """
+    Indice de borrados simetricos (estilo SymSpell) para obtener sugerencias ortograficas.
+
+    Para cada palabra del diccionario se guardan todas las variantes que resultan de borrar
+    hasta max_distance caracteres de sus primeros prefix_length caracteres. Para corregir una
+    palabra se generan los mismos borrados sobre ella y cada uno se busca en el indice, de modo
+    que solo los candidatos encontrados se verifican con la distancia de Levenshtein.
+
+    El tamaño del indice crece con prefix_length y max_distance, por lo que reducir
+    prefix_length es la forma de limitar la memoria a cambio de verificar mas candidatos.
+    """
+
+    def __init__(self, max_distance=2, prefix_length=7):
+        self.max_distance = max_distance
+        self.prefix_length = prefix_length
+        # variante con borrados -> posiciones en all_words de las palabras que la generan
+        self.deletes = {}
+
+    def _generate_deletes(self, word, max_distance):
+        """
+        Funcion para obtener todas las variantes de la palabra con hasta max_distance
+        caracteres borrados, incluyendo la palabra original.
+
+        Parametros:
+        self : objeto tipo SymSpellIndex
+            Instancia de la clase SymSpellIndex que llama a este método.
+        word : str
+            palabra (o prefijo) a procesar
+        max_distance : int
+            numero maximo de caracteres a borrar
+        """
+        variants = {word}
+        level = {word}
+        for _ in range(max_distance):
+            next_level = set()
+            for variant in level:
+                for i in range(len(variant)):
+                    next_level.add(variant[:i] + variant[i + 1:])
+            # solo se expanden las variantes nuevas
+            level = next_level - variants
+            variants |= level
+        return variants
+
+    def add(self, word, word_id):
+        """
+        Funcion para agregar una palabra nueva al indice.
+
+        Parametros:
+        self : objeto tipo SymSpellIndex
+            Instancia de la clase SymSpellIndex que llama a este método.
+        word : str
+            palabra a agregar
+        word_id : int
+            posicion de la palabra en all_words
+        """
+        for variant in self._generate_deletes(word[:self.prefix_length], self.max_distance):
+            ids = self.deletes.get(variant)
+            if(ids is None):
+                self.deletes[variant] = [word_id]
+            else:
+                ids.append(word_id)
+
+    def remove(self, removed):
+        """
+        Funcion para quitar palabras del indice.
+
+        Parametros:
+        self : objeto tipo SymSpellIndex
+            Instancia de la clase SymSpellIndex que llama a este método.
+        removed : list
+            tuplas (palabra, posicion en all_words) de las palabras a quitar
+        """
+        for word, word_id in removed:
+            for variant in self._generate_deletes(word[:self.prefix_length], self.max_distance):
+                ids = self.deletes.get(variant)
+                if(ids is None or word_id not in ids):
+                    continue
+                if(len(ids) == 1):
+                    del self.deletes[variant]
+                else:
+                    self.deletes[variant] = [i for i in ids if i != word_id]
+
+    def lookup(self, word, max_distance, all_words, distance, stats=None):
+        """
+        Funcion para obtener las palabras del indice a distancia de edicion menor o igual
+        a max_distance.
+
+        Parametros:
+        self : objeto tipo SymSpellIndex
+            Instancia de la clase SymSpellIndex que llama a este método.
+        word : str
+            palabra de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion, no debe superar la del indice
+        all_words : list
+            lista de palabras de la Trie
+        distance : function
+            funcion para verificar la distancia de edicion de cada candidato
+        stats : TrieStats
+            contadores de rendimiento opcionales donde se registran los candidatos revisados
+
+        Regresa una lista de tuplas (distancia, posicion en all_words, palabra).
+        """
+        candidates = set()
+        for variant in self._generate_deletes(word[:self.prefix_length], max_distance):
+            ids = self.deletes.get(variant)
+            if(ids is not None):
+                candidates.update(ids)
+
+        matches = []
+        word_size = len(word)
+        for word_id in candidates:
+            w = all_words[word_id]
+            if(abs(len(w) - word_size) > max_distance):
+                continue
+
+            # solo se calcula la distancia de los candidatos encontrados en el indice
+            dist = distance(word, w, max_distance)
+            if(dist <= max_distance):
+                matches.append((dist, word_id, w))
+
+        if(stats is not None):
+            stats.record_fuzzy(len(candidates), len(matches))
+        return matches
+
+    def __len__(self):
+        return len(self.deletes)
@@ -0,0 +1,228 @@
+import random
+import sys
+import threading
+import traceback
+
+import pytest
+
+from benchmark import make_typo, synthetic_words
+from compact_trie import CompactTrie
+from concurrent_trie import ConcurrentTrie
+from trie import Trie
+
+VOCABULARY = synthetic_words(3000, seed=1)
+WRITES = 3000
+READERS = 4
+
+
+@pytest.fixture(autouse=True)
+def fast_switching():
+    """
+    Cambia de hilo con mucha mas frecuencia para que las lecturas se intercalen con las
+    escrituras a la mitad de cada operacion.
+    """
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-5)
+    yield
+    sys.setswitchinterval(interval)
+
+
+def make_trie(engine, fuzzy):
+    """
+    Funcion para crear una estructura con el vocabulario de prueba y el indice pedido.
+    """
+    trie = engine.from_words(VOCABULARY)
+    # pocos contextos para que next_model tambien descarte durante la prueba
+    trie.next_model.max_contexts = 500
+    if(fuzzy == "symspell"):
+        trie.enable_symspell()
+    elif(fuzzy == "numpy"):
+        pytest.importorskip("numpy")
+        trie.enable_vectorized()
+    return trie
+
+
+def make_writes(pool, rng):
+    """
+    Funcion para generar una secuencia de modificaciones: inserciones de palabras conocidas
+    y nuevas (errores de escritura) y secuencias de palabras.
+    """
+    writes = []
+    for _ in range(WRITES):
+        if(rng.random() < 0.6):
+            writes.append(("insert", (rng.choice(pool), rng.randint(1, 5))))
+        else:
+            writes.append(("save_next_words", ([rng.choice(pool) for _ in range(rng.randint(2, 6))],)))
+    return writes
+
+
+def record_applied(trie, applied):
+    """
+    Funcion para registrar las modificaciones en el orden en que ConcurrentTrie las aplica.
+    Los lectores tambien encolan modificaciones con process_text_optimized, por lo que el
+    orden final solo se conoce al aplicarlas.
+    """
+    insert = trie.insert
+    save_next_words = trie.save_next_words
+
+    def recorded_insert(word, count=1):
+        applied.append(("insert", (word, count)))
+        return insert(word, count)
+
+    def recorded_save_next_words(words, start=1):
+        applied.append(("save_next_words", (words, start)))
+        return save_next_words(words, start)
+
+    trie.insert = recorded_insert
+    trie.save_next_words = recorded_save_next_words
+
+
+def read_and_check(shared, pool, rng):
+    """
+    Funcion para ejecutar una consulta al azar y verificar que su resultado sea valido con
+    cualquier estado intermedio de la estructura.
+    """
+    word = rng.choice(pool)
+    choice = rng.random()
+    if(choice < 0.3):
+        prefix = word[:rng.randint(1, 3)]
+        result = shared.autocomplete_prefix(prefix, rng.choice([3, 12]))
+        assert all(w.startswith(prefix) for w in result)
+        assert len(set(result)) == len(result)
+    elif(choice < 0.5):
+        result = shared.get_similar_words(word)
+        assert all(shared.levenshtein_distance(word, w) <= 2 for w in result)
+    elif(choice < 0.7):
+        result = shared.get_next_words([rng.choice(pool), word])
+        assert len(set(result)) == len(result)
+        assert all(isinstance(w, str) for w in result)
+    elif(choice < 0.8):
+        result = shared.get_most_frequent_words(rng.choice([5, 20]))
+        assert len(set(result)) == len(result)
+    elif(choice < 0.9):
+        shared.process_text_optimized([rng.choice(pool) for _ in range(5)])
+    else:
+        # las palabras del vocabulario inicial nunca dejan de existir
+        assert shared.search(VOCABULARY[rng.randrange(len(VOCABULARY))])
+
+
+def assert_same_state(trie, serial, pool):
+    """
+    Funcion para verificar que dos estructuras respondan igual a todas las consultas.
+    """
+    assert trie.all_words == serial.all_words
+    assert all(trie.get_node_freq(w) == serial.get_node_freq(w) for w in trie.all_words)
+    assert trie.get_most_frequent_words(30) == serial.get_most_frequent_words(30)
+    for word in pool:
+        for k in (3, 12):
+            assert trie.autocomplete_prefix(word[:2], k) == serial.autocomplete_prefix(word[:2], k)
+        assert trie.get_similar_words(word) == serial.get_similar_words(word)
+        assert trie.get_next_words(word) == serial.get_next_words(word)
+
+
+@pytest.mark.parametrize("engine", [Trie, CompactTrie], ids=["dict", "compact"])
+@pytest.mark.parametrize("fuzzy", [None, "symspell", "numpy"], ids=["scalar", "symspell", "numpy"])
+def test_concurrent_reads_match_serial_execution(engine, fuzzy):
+    rng = random.Random(7)
+    pool = VOCABULARY[:300] + [make_typo(w, rng) for w in VOCABULARY[:200]]
+    writes = make_writes(pool, rng)
+
+    trie = make_trie(engine, fuzzy)
+    applied = []
+    record_applied(trie, applied)
+    shared = ConcurrentTrie(trie, batch_size=64)
+
+    errors = []
+    stop = threading.Event()
+
+    def reader(seed):
+        reader_rng = random.Random(seed)
+        while not stop.is_set():
+            try:
+                read_and_check(shared, pool, reader_rng)
+            except Exception:
+                errors.append(traceback.format_exc())
+                stop.set()
+
+    threads = [threading.Thread(target=reader, args=(seed,)) for seed in range(READERS)]
+    for thread in threads:
+        thread.start()
+    try:
+        for name, args in writes:
+            getattr(shared, name)(*args)
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    shared.flush()
+    assert not errors, errors[0]
+    assert shared.pending_updates() == 0
+    del trie.insert, trie.save_next_words
+
+    # la misma secuencia de modificaciones aplicada en un solo hilo
+    serial = make_trie(engine, fuzzy)
+    for name, args in applied:
+        getattr(serial, name)(*args)
+
+    assert_same_state(trie, serial, pool)
+    # sin la cache de consultas las respuestas se calculan de nuevo desde la estructura
+    trie.disable_query_cache()
+    serial.disable_query_cache()
+    assert_same_state(trie, serial, pool[:100])
+
+
+@pytest.mark.parametrize("engine", [Trie, CompactTrie], ids=["dict", "compact"])
+def test_writes_wait_for_flush(engine):
+    trie = engine.from_words(VOCABULARY)
+    shared = ConcurrentTrie(trie, batch_size=1000)
+    shared.insert("zzqx", 3)
+    shared.save_next_words(["zzqx", "hola"])
+
+    # las modificaciones se aplican con el siguiente lote
+    assert shared.pending_updates() == 2
+    assert not shared.search("zzqx")
+    assert shared.flush() == 2
+    assert shared.search("zzqx")
+    assert shared.get_node_freq("zzqx") == 3
+    assert shared.get_next_words("zzqx") == ["hola"]
+
+
+@pytest.mark.parametrize("engine", [Trie, CompactTrie], ids=["dict", "compact"])
+def test_reads_never_see_partial_top_lists(engine):
+    # muchas palabras con los mismos prefijos cuyas frecuencias cambian de orden todo el tiempo
+    words = ["ca" + a + b for a in "abcdefgh" for b in "abcdefgh"]
+    trie = engine.from_words(VOCABULARY + words)
+    # sin la cache de consultas cada lectura recorre las listas de la estructura
+    trie.disable_query_cache()
+    shared = ConcurrentTrie(trie, batch_size=16)
+    rng = random.Random(3)
+
+    errors = []
+    stop = threading.Event()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                for prefix in ("c", "ca", "caa", "cab"):
+                    result = shared.autocomplete_prefix(prefix, 12)
+                    assert len(set(result)) == len(result), result
+                result = shared.get_most_frequent_words(20)
+                assert len(set(result)) == len(result), result
+            except Exception:
+                errors.append(traceback.format_exc())
+                stop.set()
+
+    threads = [threading.Thread(target=reader) for _ in range(READERS)]
+    for thread in threads:
+        thread.start()
+    try:
+        for _ in range(20000):
+            if(stop.is_set()):
+                break
+            shared.insert(rng.choice(words), rng.randint(1, 3))
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+    shared.flush()
+    assert not errors, errors[0]
@@ -0,0 +1,103 @@
+import functools
+import random
+
+import pytest
+
+from benchmark import make_typo, synthetic_words
+from compact_trie import CompactTrie
+from trie import Trie
+
+VOCABULARY = synthetic_words(2000, seed=2)
+MAX_DISTANCE = 3
+
+
+def edit_distance(word_a, word_b):
+    """
+    Funcion para calcular la distancia de edicion con la matriz dp completa, sin limites.
+    """
+    previous = list(range(len(word_b) + 1))
+    for i, ch in enumerate(word_a, 1):
+        row = [i]
+        for j, other in enumerate(word_b, 1):
+            row.append(min(previous[j] + 1, row[j - 1] + 1, previous[j - 1] + (ch != other)))
+        previous = row
+    return previous[-1]
+
+
+@functools.lru_cache(maxsize=None)
+def distances(word):
+    """
+    Funcion para obtener (distancia, posicion, palabra) de las palabras del vocabulario de
+    prueba a distancia menor o igual a MAX_DISTANCE, revisando todo el vocabulario.
+    """
+    matches = []
+    for word_id, other in enumerate(VOCABULARY):
+        # la diferencia de longitud es una cota inferior de la distancia
+        if(abs(len(word) - len(other)) <= MAX_DISTANCE):
+            distance = edit_distance(word, other)
+            if(distance <= MAX_DISTANCE):
+                matches.append((distance, word_id, other))
+    return sorted(matches)
+
+
+def brute_force(word, max_distance, result_size):
+    """
+    Funcion para obtener las palabras similares ordenadas por distancia y despues por
+    posicion en all_words.
+    """
+    return [w for distance, _, w in distances(word) if distance <= max_distance][:result_size]
+
+
+def make_trie(engine, backend, max_distance):
+    """
+    Funcion para crear una estructura con el vocabulario de prueba y la forma de buscar
+    palabras similares pedida.
+    """
+    trie = engine.from_words(VOCABULARY)
+    trie.disable_query_cache()
+    if(backend == "walk"):
+        trie.enable_trie_walk()
+    elif(backend == "symspell"):
+        trie.enable_symspell(max_distance)
+    elif(backend == "numpy"):
+        pytest.importorskip("numpy")
+        trie.enable_vectorized(max_distance)
+    return trie
+
+
+@pytest.mark.parametrize("engine", [Trie, CompactTrie], ids=["dict", "compact"])
+@pytest.mark.parametrize("backend", ["index", "walk", "symspell", "numpy"])
+@pytest.mark.parametrize("max_distance", [1, 2, MAX_DISTANCE])
+def test_backends_match_brute_force(engine, backend, max_distance):
+    trie = make_trie(engine, backend, max_distance)
+    assert trie.all_words == VOCABULARY
+    rng = random.Random(0)
+    queries = [make_typo(make_typo(w, rng), rng) for w in rng.sample(VOCABULARY, 60)]
+    for word in queries + VOCABULARY[:20]:
+        expected = brute_force(word, max_distance, 50)
+        assert trie.get_similar_words(word, max_distance, 50) == expected, word
+
+
+@pytest.mark.parametrize("engine", [Trie, CompactTrie], ids=["dict", "compact"])
+@pytest.mark.parametrize("backend", ["index", "walk"])
+def test_length_difference_follows_max_distance(engine, backend):
+    # antes la diferencia de longitud se limitaba a 2 sin importar max_distance: con
+    # max_distance=3 una palabra con 3 caracteres de mas no aparecia aunque estuviera a
+    # distancia 3
+    trie = make_trie(engine, backend, 3)
+    trie.insert("reloj")
+    trie.insert("relojero")
+    assert trie.levenshtein_distance("reloj", "relojero", 3) == 3
+    assert "relojero" in trie.get_similar_words("reloj", max_distance=3, result_size=100)
+    assert "relojero" not in trie.get_similar_words("reloj", max_distance=2, result_size=100)
+
+
+def test_walk_survives_removed_words():
+    trie = Trie.from_words(VOCABULARY)
+    trie.enable_trie_walk()
+    trie.enable_learned_vocabulary(max_words=1)
+    trie.insert("zzqxa")
+    # la segunda palabra aprendida descarta a la primera
+    trie.insert("zzqxb")
+    assert "zzqxa" not in trie.get_similar_words("zzqxc", result_size=100)
+    assert "zzqxb" in trie.get_similar_words("zzqxc", result_size=100)
@@ -0,0 +1,57 @@
+import threading
+import time
+
+from spell_worker import SpellCheckWorker
+
+
+def wait_for(worker, done, timeout=5):
+    """
+    Funcion para entregar los resultados del hilo de trabajo hasta que done sea verdadero.
+    """
+    limit = time.monotonic() + timeout
+    while not done() and time.monotonic() < limit:
+        worker.poll()
+        time.sleep(0.001)
+    worker.poll()
+
+
+def test_debounced_jobs_do_not_delay_due_jobs():
+    worker = SpellCheckWorker()
+    calls = []
+    results = {}
+
+    # muchas teclas seguidas: cada una reemplaza a la anterior con el mismo retraso
+    for i in range(200):
+        worker.submit("word", calls.append, (i,), delay=0.2)
+    start = time.monotonic()
+    worker.submit("lines", time.monotonic, callback=lambda t: results.setdefault("lines", t))
+    wait_for(worker, lambda: "lines" in results)
+    # la revision de lineas no espera a las tareas con retraso
+    assert results["lines"] - start < 0.1
+
+    wait_for(worker, lambda: calls)
+    time.sleep(0.05)
+    # solo se ejecuta la ultima tecla
+    assert calls == [199]
+
+
+def test_jobs_run_in_arrival_order():
+    worker = SpellCheckWorker()
+    order = []
+    done = threading.Event()
+    for i in range(50):
+        worker.submit(("insert", i), order.append, (i,))
+    worker.submit("done", done.set)
+    assert done.wait(5)
+    assert order == list(range(50))
+
+
+def test_cancelled_job_does_not_run():
+    worker = SpellCheckWorker()
+    calls = []
+    done = threading.Event()
+    worker.submit("word", calls.append, ("cancelled",), delay=0.05)
+    worker.cancel("word")
+    worker.submit("done", done.set, delay=0.1)
+    assert done.wait(5)
+    assert calls == []
@@ -0,0 +1,63 @@
+import asyncio
+import time
+
+import pytest
+
+from compact_trie import CompactTrie
+from suggestion_service import SuggestionClient, SuggestionService
+from trie import Trie
+
+
+@pytest.mark.parametrize("engine", [Trie, CompactTrie], ids=["dict", "compact"])
+def test_rejects_arguments_that_are_not_strings(engine):
+    trie = engine.from_words(["hola", "mundo", "holanda"])
+    service = SuggestionService(trie)
+    requests = [
+        ("insert", {"word": 5}),
+        ("search", {"word": None}),
+        ("autocomplete_prefix", {"prefix": ["h"]}),
+        ("get_similar_words", {"word": 3.5}),
+        ("get_next_words", {"words": [1, 2]}),
+        ("save_next_words", {"words": "hola mundo"}),
+        ("save_next_words", {"words": ["hola", 7]}),
+        ("get_next_words", {"words": "hola"}),
+        ("insert", {"word": "nuevo"}),
+    ]
+    results = service.run_batch(requests)
+    service._executor.shutdown()
+
+    assert all(kind == "error" for kind, _ in results[:7])
+    assert results[7:] == [("result", []), ("result", True)]
+    assert not trie.search("5")
+    assert trie.get_next_words("hola") == []
+    assert trie.search("nuevo")
+
+
+def test_close_answers_pending_requests(tmp_path):
+    errors = []
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.set_exception_handler(lambda loop, context: errors.append(context))
+        service = SuggestionService(Trie.from_words(["hola", "mundo"]))
+        run_batch = service.run_batch
+
+        def slow_batch(requests):
+            # el lote sigue resolviendose cuando se cierra el servicio
+            time.sleep(0.2)
+            return run_batch(requests)
+
+        service.run_batch = slow_batch
+        path = str(tmp_path / "service.sock")
+        await service.start(path)
+        client = await SuggestionClient.connect(path)
+        calls = [asyncio.create_task(client.call("search", word=w)) for w in ("hola", "adios")]
+        await asyncio.sleep(0.05)
+
+        await service.close()
+        results = await asyncio.wait_for(asyncio.gather(*calls), 5)
+        await client.close()
+        return results
+
+    assert asyncio.run(run()) == [True, False]
+    assert errors == []
@@ -1,52 +1,461 @@
-from wordfreq import top_n_list
-from word_forms.word_forms import get_word_forms
+import contextlib
+import gc
+import heapq
+import math
+import multiprocessing
+import os
 import re 
-
-class TrieNode:
-    def __init__(self):
-        self.children = {}
-        self.is_eow = False
-        self.freq = 0  # contador de uso
+import threading
+import time
+from array import array
+
+import dictionary_build
+import snapshot
+from instrumentation import TrieStats
+from learned_vocabulary import LEARNED_DECAY_EVERY, LEARNED_DECAY_FACTOR, LEARNED_MAX_WORDS, LearnedVocabulary
+from ngram_model import NextWordModel
+from phrase_index import PhraseIndex
+from progressive_loader import CORE_DICT_SIZE, ProgressiveLoader
+from query_cache import QUERY_CACHE_SIZE, QueryCache
+from symspell import SymSpellIndex
+from trie_node import TOP_K_CACHE, TrieNode, rank_key, update_top
+from vocabulary_index import VocabularyIndex
+
+# longitud maxima de palabra para la distancia de levenshtein con vectores de bits
+MAX_BIT_PARALLEL = 64
+
+# longitud minima de una palabra para intentar separarla en varias palabras
+SEGMENT_MIN_LENGTH = 4
+# costo maximo promedio por caracter de una separacion aceptada, las palabras mal escritas
+# solo se pueden separar en palabras poco frecuentes o muy cortas y quedan por encima
+SEGMENT_MAX_COST = 2.0
+# costo adicional por cada palabra de una separacion, favorece separaciones con menos partes
+SEGMENT_PART_COST = 1.0
 
 class Trie:
-    def __init__(self, language = "en", dict_size = 50000):
-        self.root = TrieNode()
+    # nombre del motor de almacenamiento, se guarda en el snapshot
+    ENGINE = "dict"
+    # operaciones publicas cuya latencia se mide con enable_stats
+    INSTRUMENTED_OPERATIONS = (
+        "insert", "search", "starts_with", "autocomplete_prefix", "get_similar_words",
+        "get_next_words", "get_most_frequent_words", "get_phrase_suggestions",
+        "process_text_optimized", "classify_words",
+    )
+
+    def __init__(self, language = "en", dict_size = 50000, snapshot_dir = None, build_workers = None,
+                 progressive = False, core_size = CORE_DICT_SIZE):
+        self._init_empty(language, dict_size)
+
+        # intentar cargar la estructura desde un snapshot previamente guardado en disco
+        path = None
+        if(snapshot_dir is not None):
+            path = snapshot.snapshot_path(snapshot_dir, language, dict_size, self.ENGINE)
+            state = snapshot.load_snapshot(path, language, dict_size, self.ENGINE)
+            if(state is not None):
+                self._restore_state(state)
+                print("\nSe han cargado un total de %s palabras desde %s\n" % (self.number_of_words, path))
+                return
+
+        if(progressive and core_size < dict_size):
+            # solo se cargan las palabras mas usadas, el resto llega en segundo plano
+            self._build_core(core_size)
+            print("\nSe han agregado %s palabras a Trie (%s), el resto se carga en segundo plano\n" %
+                  (self.number_of_words, dictionary_build.format_timings(self.build_timings)))
+            self._loader = ProgressiveLoader(self, path)
+            self._loader.start()
+            return
+
+        self._build_dictionary(dict_size, build_workers)
+
+        print("\nSe han agregado un total de %s palabras a Trie (%s)\n" %
+              (self.number_of_words, dictionary_build.format_timings(self.build_timings)))
+
+        # guardar el snapshot para que el siguiente arranque no reconstruya el diccionario
+        if(path is not None):
+            self.save_snapshot(path)
+
+    def _init_empty(self, language, dict_size):
+        """
+        Inicializa una estructura vacia sin descargar el diccionario.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            language: idioma del diccionario
+            dict_size: numero de palabras base del diccionario
+        """
+        self._init_storage()
         self.all_words = []  # lista para recorrer fácilmente
         self.all_words_set = set()
-        self.next_words = {}
+        # las primeras base_words posiciones de all_words son el diccionario base
+        self.base_words = 0
+        # posiciones de palabras aprendidas que se descartaron, se reutilizan al insertar
+        self._free_ids = []
+        # limite de memoria de las palabras aprendidas, None si no hay limite
+        self.learned = None
+        self.next_model = NextWordModel()
+        # frases completas para el autocompletado de frases, separadas del vocabulario
+        self.phrases = PhraseIndex(language)
         self.language = language
+        self.dict_size = dict_size
+        self.number_of_words = 0
+        # aumenta cada vez que se agrega una palabra nueva, sirve para invalidar caches externas
+        self.vocab_version = 0
+        # palabras agrupadas por longitud, genera los candidatos de las palabras similares
+        self.vocab_index = VocabularyIndex()
+        # distancia maxima de las palabras similares guardadas en la cache de consultas
+        self._similar_distance = 2
+        # indice opcional de borrados simetricos para las sugerencias ortograficas
+        self.fuzzy_index = None
+        # si es True, sin fuzzy_index las palabras similares se buscan recorriendo la estructura
+        self.trie_walk = False
+        # heap de frecuencias (se crea en la primera consulta) y nodos que cambiaron desde entonces
+        self._freq_heap = None
+        self._freq_dirty = set()
+        # el heap se modifica tambien al consultarlo, por lo que se protege con un candado
+        self._heap_lock = threading.Lock()
+        # contadores de rendimiento, None mientras la medicion esta apagada
+        self._stats = None
+        # segundos de cada etapa de la construccion del diccionario base (ver _build_dictionary)
+        self.build_timings = None
+        # carga en segundo plano del resto del diccionario, None si no hay carga en curso
+        self._loader = None
+        # resultados recientes de las consultas, None si la cache esta apagada
+        self.query_cache = QueryCache()
+        # ultima palabra comparada con levenshtein_distance y sus mascaras de caracteres
+        self._peq_cache = None
+
+    @classmethod
+    def from_state(cls, language, dict_size, state):
+        """
+        Crea una estructura a partir de un estado obtenido con _get_state, sin reconstruir
+        el diccionario.
 
-        # descargar lista de la palabras mas usadas
-        words = top_n_list(language, dict_size)  # 50k best English words
-        
+        Parametros:
+            cls: clase de la estructura (Trie o un motor derivado)
+            language: idioma del diccionario
+            dict_size: numero de palabras base del diccionario
+            state: estado serializado de la estructura
+        """
+        trie = cls.__new__(cls)
+        trie._init_empty(language, dict_size)
+        trie._restore_state(state)
+        return trie
+
+    @classmethod
+    def from_words(cls, words, language="en"):
+        """
+        Crea una estructura con una lista de palabras propia en lugar del diccionario del
+        idioma, por ejemplo para pruebas de rendimiento sin descargar nada.
+
+        Parametros:
+            cls: clase de la estructura (Trie o un motor derivado)
+            words: palabras a insertar, en orden
+            language: idioma de las palabras
+        """
+        trie = cls.__new__(cls)
+        trie._init_empty(language, len(words))
         for w in words:
-            # verificar que la palabra no este en la lista de todas las palabras
-            if(w not in self.all_words_set):
-                # insertar palabra
-                self.insert(w)
-                # obtener conjugaciones de la palabra w
-                forms = get_word_forms(w)
-                for n in forms:
-                    # verificar si existen conjugaciones de la palbra
-                    if(len(forms[n]) > 0):
-                        for conjugation in forms[n]:
-                            # verificar que elemento no se encuentre en la lista de todas las palabras
-                            if(conjugation not in self.all_words_set):
-                                self.insert(conjugation)
-
-        print("\nSe han agregado un total de %s palabras a Trie\n" % self.number_of_words)
-
-    def insert(self, word):
+            trie.insert(w)
+        trie.base_words = len(trie.all_words)
+        return trie
+
+    def _init_storage(self):
+        """
+        Inicializa el almacenamiento de los nodos. Cada nodo es un objeto TrieNode
+        con un diccionario de hijos.
+        """
+        self.root = TrieNode()
+
+    def _build_dictionary(self, dict_size, workers=None):
+        """
+        Construye el diccionario base a partir de las palabras mas usadas del idioma
+        y sus conjugaciones. Las conjugaciones se calculan con un pool de procesos, se
+        quitan los repetidos de una sola vez y las palabras se cargan juntas con
+        _load_words. Los segundos de cada etapa quedan en build_timings.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            dict_size: numero de palabras base a descargar
+            workers: numero de procesos para las conjugaciones, por defecto el numero de CPUs
+        """
+        words, timings = dictionary_build.build_vocabulary(self.language, dict_size, workers)
+
+        start = time.perf_counter()
+        self._load_words(words)
+        timings["insert"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._rebuild_vocab_index(self.vocab_index.anchor)
+        timings["indexes"] = time.perf_counter() - start
+        self.build_timings = timings
+
+    def _build_core(self, core_size):
+        """
+        Construye el nucleo del diccionario para la carga progresiva: las core_size palabras
+        mas usadas, sin conjugaciones, para no esperar a que se carguen word_forms y el nltk.
+        ProgressiveLoader agrega despues las conjugaciones y el resto de las palabras.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            core_size: numero de palabras base del nucleo
+        """
+        timings = {}
+        start = time.perf_counter()
+        words = dictionary_build.top_words(self.language, core_size)
+        timings["download"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._load_words(dictionary_build.merge_words(words, [()] * len(words)))
+        timings["insert"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        self._rebuild_vocab_index(self.vocab_index.anchor)
+        timings["indexes"] = time.perf_counter() - start
+        self.build_timings = timings
+
+    def _append_base_words(self, words):
+        """
+        Agrega palabras al diccionario base despues de cargarlo, cada una con frecuencia 1,
+        con insert para actualizar las listas de palabras mas frecuentes y los indices.
+        Las palabras que ya estan se ignoran. Se usa en la carga progresiva, cuando la
+        estructura no tiene posiciones libres ni palabras aprendidas.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            words: palabras en minusculas sin repetidos
+        """
+        words = [word for word in words if word not in self.all_words_set]
+        # las posiciones nuevas se cuentan como diccionario base antes de insertarlas para
+        # que no se registren como palabras aprendidas
+        self.base_words = len(self.all_words) + len(words)
+        # el metodo de la clase, para no contar la carga en la medicion de enable_stats
+        insert = type(self).insert
+        for word in words:
+            insert(self, word)
+
+    def is_provisional(self):
+        """
+        Funcion para saber si el diccionario base se sigue cargando en segundo plano. Mientras
+        tanto las consultas solo ven las palabras cargadas hasta el momento y las
+        modificaciones se aplican al terminar (ver ProgressiveLoader).
+        """
+        return self._loader is not None
+
+    def wait_loaded(self, timeout=None):
+        """
+        Funcion para esperar a que termine la carga en segundo plano del diccionario base.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            timeout: segundos maximos de espera, None para esperar sin limite
+
+        Regresa True si el diccionario esta completo.
+        """
+        loader = self._loader
+        if(loader is None):
+            return True
+        return loader.wait(timeout)
+
+    def _loading_lock(self):
+        """
+        Regresa el candado de la carga en segundo plano, para reconstruir los indices sin que
+        se agreguen palabras a la mitad, o un contexto vacio si no hay carga en curso.
+        """
+        loader = self._loader
+        if(loader is None):
+            return contextlib.nullcontext()
+        return loader.lock
+
+    def _load_words(self, words):
+        """
+        Carga una lista de palabras distintas en la estructura vacia, cada una con
+        frecuencia 1 y con su posicion de la lista como word_id (el mismo resultado que
+        insertarlas en orden). Los nodos se crean recorriendo las palabras en orden
+        alfabetico: cada palabra comparte con la anterior el camino de su prefijo comun,
+        por lo que solo se crean los nodos nuevos, y las listas de palabras mas frecuentes
+        se calculan una sola vez al final. Los indices auxiliares se reconstruyen aparte.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            words: palabras en minusculas sin repetidos
+        """
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            # nodos del camino de la palabra anterior, path[i] corresponde a su prefijo de i letras
+            path = [self.root]
+            previous = ""
+            for word_id in sorted(range(len(words)), key=words.__getitem__):
+                word = words[word_id]
+                common = 0
+                limit = min(len(word), len(previous))
+                while common < limit and word[common] == previous[common]:
+                    common += 1
+                del path[common + 1:]
+
+                node = path[-1]
+                for char in word[common:]:
+                    child = TrieNode()
+                    node.children[char] = child
+                    path.append(child)
+                    node = child
+                node.word_id = word_id
+                node.freq = 1
+                node.is_eow = True
+                previous = word
+            self._rebuild_top_cache()
+        finally:
+            if(gc_enabled):
+                gc.enable()
+
+        self.all_words = list(words)
+        self.all_words_set = set(words)
+        self.number_of_words = len(self.all_words_set)
+        self.base_words = len(self.all_words)
+        self.vocab_version += 1
+
+    def save_snapshot(self, path):
+        """
+        Guarda la estructura completa (nodos, frecuencias, all_words y next_model) en disco
+        para poder recargarla sin reconstruir el diccionario.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            path: ruta del archivo de snapshot
+        """
+        snapshot.save_snapshot(path, self.language, self.dict_size, self.ENGINE, self._get_state())
+
+    def _get_state(self):
+        """
+        Obtiene el estado serializable de la estructura. Los nodos se guardan en preorden
+        como tres secuencias planas (etiqueta, numero de hijos y frecuencia) para evitar
+        la recursion al serializar arboles profundos.
+        """
+        labels = []
+        child_counts = array("I")
+        freqs = array("I")
+        word_ids = array("i")
+
+        # recorrido en preorden con pila explicita
+        stack = [("", self.root)]
+        while stack:
+            ch, node = stack.pop()
+            labels.append(ch)
+            child_counts.append(len(node.children))
+            freqs.append(node.freq if node.is_eow else 0)
+            word_ids.append(node.word_id)
+            # se agregan en orden inverso para visitar los hijos en su orden original
+            for item in reversed(list(node.children.items())):
+                stack.append(item)
+
+        return {
+            "labels": "".join(labels),
+            "child_counts": child_counts,
+            "freqs": freqs,
+            "word_ids": word_ids,
+            "all_words": self.all_words,
+            "base_words": self.base_words,
+            "free_ids": self._free_ids,
+            "next_model": self.next_model,
+            "phrases": self.phrases.get_state(),
+        }
+
+    def _restore_state(self, state):
+        """
+        Reconstruye la estructura a partir de un estado obtenido con _get_state.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            state: diccionario con el estado serializado
+        """
+        labels = state["labels"]
+        child_counts = state["child_counts"]
+        freqs = state["freqs"]
+        word_ids = state["word_ids"]
+
+        # el recolector de basura no aporta nada al crear muchos nodos sin ciclos y si agrega tiempo
+        gc_enabled = gc.isenabled()
+        gc.disable()
+        try:
+            self._restore_nodes(labels, child_counts, freqs, word_ids)
+            self._rebuild_top_cache()
+        finally:
+            if(gc_enabled):
+                gc.enable()
+
+        self._restore_words(state)
+        self.next_model = state["next_model"]
+        self.phrases = PhraseIndex.from_state(self.language, state["phrases"])
+        self._rebuild_vocab_index(self.vocab_index.anchor)
+
+    def _restore_words(self, state):
+        """
+        Recupera all_words y las posiciones libres de un estado obtenido con _get_state.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            state: diccionario con el estado serializado
+        """
+        self.all_words = state["all_words"]
+        self.base_words = state["base_words"]
+        self._free_ids = state["free_ids"]
+        # una posicion libre conserva la palabra descartada hasta que se reutiliza
+        free = set(self._free_ids)
+        self.all_words_set = {w for word_id, w in enumerate(self.all_words) if word_id not in free}
+        self.number_of_words = len(self.all_words_set)
+
+    def _restore_nodes(self, labels, child_counts, freqs, word_ids):
+        """
+        Reconstruye los nodos de la estructura a partir de su recorrido en preorden.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            labels: caracteres de cada nodo (sin la raiz)
+            child_counts: numero de hijos de cada nodo
+            freqs: frecuencia de cada nodo, 0 si no es final de palabra
+            word_ids: posicion en all_words de la palabra de cada nodo
+        """
+        self.root = TrieNode()
+        # pilas con los nodos abiertos y el numero de hijos que les faltan por leer
+        open_nodes = [self.root]
+        pending = [child_counts[0]]
+
+        # las etiquetas se guardan sin el caracter de la raiz
+        for ch, count, freq, word_id in zip(labels, child_counts[1:], freqs[1:], word_ids[1:]):
+            # descartamos los nodos que ya no tienen hijos pendientes
+            while pending[-1] == 0:
+                open_nodes.pop()
+                pending.pop()
+            pending[-1] -= 1
+
+            node = TrieNode()
+            if(freq > 0):
+                node.is_eow = True
+                node.freq = freq
+                node.word_id = word_id
+            open_nodes[-1].children[ch] = node
+
+            # solo los nodos con hijos se quedan abiertos
+            if(count > 0):
+                open_nodes.append(node)
+                pending.append(count)
+
+    def insert(self, word, count=1):
         """
         Operacion para insertar una palabra en la estructura Trie.
 
         Parametros:
             self: Instancia de la clase Trie
             word: palabra o frase a insertar
+            count: numero de veces que se agrega la palabra
         """
+        if(self._loader is not None and self._loader.defer(self.insert, (word, count))):
+            return
         # empezamos desde la raiz del arbol
         node = self.root
         word = word.lower()
+        # nodos de los prefijos de la palabra, para actualizar sus palabras mas frecuentes
+        path = [node]
         
         # iteramos en cada caracter de la palabra
         for char in word:
@@ -55,19 +464,464 @@ class Trie:
                 node.children[char] = TrieNode()
             
             node = node.children[char]
-
-        # indicamos que es el final del nodo
-        node.is_eow = True
+            path.append(node)
 
         if(node.freq == 0):
             # agregamos la palabra a la lista de nuestras palabras usadas
-            self.all_words.append(word)
-            self.all_words_set.add(word)
+            node.word_id = self._new_word_id(word)
 
         # incrementamos la frecuencia de uso de la palabra
-        node.freq += 1
+        node.freq += count
+        # indicamos que es el final del nodo, despues de asignar su posicion para que una
+        # lectura desde otro hilo nunca vea una palabra sin word_id
+        node.is_eow = True
+
+        if(self._freq_heap is not None):
+            # la palabra se agrega al heap de frecuencias en la siguiente consulta
+            with self._heap_lock:
+                self._freq_dirty.add(node)
+
+        # actualizamos las palabras mas frecuentes de cada prefijo
+        for prefix_node in path:
+            update_top(prefix_node, node)
+
+        self._invalidate_prefixes(word)
+        if(self.learned is not None and node.word_id >= self.base_words):
+            self._learn(word, count)
+
+    def _new_word_id(self, word):
+        """
+        Agrega una palabra nueva a all_words, en una posicion libre si hay alguna, y
+        actualiza los indices auxiliares.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            word: palabra nueva en minusculas
+
+        Regresa la posicion de la palabra en all_words.
+        """
+        if(self._free_ids):
+            word_id = self._free_ids.pop()
+            self.all_words[word_id] = word
+        else:
+            word_id = len(self.all_words)
+            self.all_words.append(word)
+        self.all_words_set.add(word)
         #actualizamos el numero de palabras
-        self.number_of_words = len(self.all_words)
+        self.number_of_words = len(self.all_words_set)
+        self._word_added(word, word_id)
+        return word_id
+
+    def _remove_word(self, word):
+        """
+        Quita una palabra aprendida de los nodos: deja de ser final de palabra, se borran
+        los nodos que quedan sin hijos y se recalculan las palabras mas frecuentes de sus
+        prefijos. Las palabras del diccionario base no se quitan.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            word: palabra en minusculas
+
+        Regresa la posicion que tenia la palabra en all_words, o None si no se quito.
+        """
+        node = self.root
+        path = [node]
+        for char in word:
+            node = node.children.get(char)
+            if(node is None):
+                return None
+            path.append(node)
+        if(not node.is_eow or node.word_id < self.base_words):
+            return None
+
+        # el nodo conserva su word_id para que una lectura desde otro hilo que ya lo
+        # obtuvo de una lista de palabras mas frecuentes no falle
+        node.is_eow = False
+        node.freq = 0
+
+        # borramos los nodos sin hijos desde el final de la palabra
+        depth = len(word)
+        while depth > 0 and not path[depth].children and not path[depth].is_eow:
+            del path[depth - 1].children[word[depth - 1]]
+            depth -= 1
+
+        for prefix_node in reversed(path[:depth + 1]):
+            prefix_node.top = self._node_top(prefix_node)
+        return node.word_id
+
+    def _rebuild_top_cache(self):
+        """
+        Recalcula la lista de palabras mas frecuentes de todos los nodos, de las hojas
+        hacia la raiz, a partir de las listas de sus hijos.
+        """
+        # recorrido en preorden, al invertirlo cada hijo queda antes que su padre
+        order = []
+        stack = [self.root]
+        while stack:
+            node = stack.pop()
+            order.append(node)
+            stack.extend(node.children.values())
+
+        for node in reversed(order):
+            children = node.children
+            if(not node.is_eow and len(children) == 1):
+                # un solo hijo: el nodo tiene exactamente las mismas palabras
+                for child in children.values():
+                    node.top = child.top[:]
+                continue
+
+            node.top = self._node_top(node)
+
+    def _node_top(self, node):
+        """
+        Calcula la lista de palabras mas frecuentes de un nodo a partir de las listas de
+        sus hijos.
+        """
+        if(node.is_eow):
+            candidates = [node]
+        else:
+            candidates = []
+        for child in list(node.children.values()):
+            candidates.extend(child.top)
+
+        if(len(candidates) > 1):
+            candidates.sort(key=rank_key)
+        return candidates[:TOP_K_CACHE]
+
+    def _word_added(self, word, word_id):
+        """
+        Actualiza los indices auxiliares cuando se agrega una palabra nueva a la estructura.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            word: palabra agregada
+            word_id: posicion de la palabra en all_words
+        """
+        self.vocab_version += 1
+        self.vocab_index.add(word, word_id)
+        if(self.fuzzy_index is not None):
+            self.fuzzy_index.add(word, word_id)
+        if(self.query_cache is not None):
+            # la palabra puede aparecer en las palabras similares de consultas cuya longitud
+            # difiera a lo mas en la distancia maxima usada
+            distance = self._similar_distance
+            self.query_cache.invalidate("similar_words", range(len(word) - distance, len(word) + distance + 1))
+
+    def _rebuild_vocab_index(self, anchor=None):
+        """
+        Reconstruye el indice de vocabulario con las palabras actuales.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            anchor: None, "first" o "last", ver VocabularyIndex
+        """
+        index = VocabularyIndex(anchor)
+        for word_id, word in self._live_words():
+            index.add(word, word_id)
+        self.vocab_index = index
+
+    def _live_words(self):
+        """
+        Generador de tuplas (posicion, palabra) de all_words sin las posiciones libres.
+        """
+        if(not self._free_ids):
+            return enumerate(self.all_words)
+        free = set(self._free_ids)
+        return ((word_id, word) for word_id, word in enumerate(self.all_words) if word_id not in free)
+
+    def partition_vocabulary(self, anchor=None):
+        """
+        Cambia la forma en que el indice de vocabulario separa las palabras de cada longitud.
+        Con anchor = "first" o "last" las palabras similares solo se buscan entre las que
+        comparten el primer o el ultimo caracter con la palabra de entrada: es mas rapido
+        pero no encuentra los errores en esa posicion. Solo afecta a get_similar_words sin
+        indice de busqueda (enable_symspell o enable_vectorized) ni recorrido de la
+        estructura (enable_trie_walk).
+
+        Parametros:
+            self: Instancia de la clase Trie
+            anchor: None (solo longitud, por defecto), "first" o "last"
+        """
+        with self._loading_lock():
+            self._rebuild_vocab_index(anchor)
+        if(self.query_cache is not None):
+            self.query_cache.invalidate_kind("similar_words")
+
+    def _invalidate_prefixes(self, word):
+        """
+        Descarta de la cache de consultas los autocompletados de los prefijos de una palabra
+        cuya frecuencia cambio.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            word: palabra insertada en minusculas
+        """
+        if(self.query_cache is not None):
+            self.query_cache.invalidate_prefixes("autocomplete", word)
+
+    def enable_learned_vocabulary(self, max_words=LEARNED_MAX_WORDS, decay_factor=LEARNED_DECAY_FACTOR,
+                                  decay_every=LEARNED_DECAY_EVERY, decay_seconds=None):
+        """
+        Limita la memoria de las palabras aprendidas (las que se insertan despues de cargar
+        el diccionario base). Sus usos decaen con el tiempo o con el numero de inserciones
+        y al superar max_words se descartan las menos usadas, junto con sus secuencias en
+        next_model; las secuencias tambien decaen y las que llegan a 0 se descartan. Las
+        palabras del diccionario base nunca se descartan. Ver LearnedVocabulary.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            max_words: numero maximo de palabras aprendidas
+            decay_factor: factor por el que se multiplican los usos en cada decaimiento
+            decay_every: numero de usos de palabras aprendidas entre dos decaimientos
+            decay_seconds: si se da, segundos entre dos decaimientos en lugar de decay_every
+        """
+        learned = LearnedVocabulary(max_words, decay_factor, decay_every, decay_seconds)
+        # las palabras aprendidas existentes empiezan con su frecuencia como puntaje
+        for word_id, word in self._live_words():
+            if(word_id >= self.base_words):
+                learned.scores[word] = [self.get_node_freq(word), 0]
+        self.learned = learned
+        if(learned.over_budget()):
+            self._evict_words(learned.victims())
+
+    def disable_learned_vocabulary(self):
+        """
+        Quita el limite de memoria de las palabras aprendidas.
+        """
+        self.learned = None
+
+    def learned_vocabulary_stats(self):
+        """
+        Funcion para obtener el numero de palabras aprendidas, el limite y los decaimientos
+        y descartes realizados, o None si no hay limite. Ver LearnedVocabulary.stats.
+        """
+        if(self.learned is None):
+            return None
+        return self.learned.stats()
+
+    def _learn(self, word, count):
+        """
+        Registra el uso de una palabra aprendida, aplica el decaimiento si corresponde y
+        descarta las palabras menos usadas si se supera el limite.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            word: palabra aprendida en minusculas
+            count: numero de usos
+        """
+        learned = self.learned
+        if(learned.record(word, count)):
+            self.next_model.decay(learned.decay())
+            if(self.query_cache is not None):
+                self.query_cache.invalidate_kind("next_words")
+        if(learned.over_budget()):
+            # la palabra que se acaba de insertar no se descarta
+            self._evict_words(learned.victims(keep=word))
+
+    def _evict_words(self, words):
+        """
+        Descarta palabras aprendidas de la estructura, de los indices de busqueda, de las
+        secuencias de next_model y de la cache de consultas. Sus posiciones en all_words
+        quedan libres para las siguientes palabras nuevas.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            words: palabras en minusculas
+        """
+        removed = []
+        for word in words:
+            word_id = self._remove_word(word)
+            if(word_id is not None):
+                removed.append((word, word_id))
+        if(not removed):
+            return
+
+        self.vocab_index.remove(removed)
+        if(self.fuzzy_index is not None):
+            self.fuzzy_index.remove(removed)
+        for word, word_id in removed:
+            self.all_words_set.discard(word)
+            self._free_ids.append(word_id)
+        self.number_of_words = len(self.all_words_set)
+        # el heap de frecuencias se reconstruye en la siguiente consulta: sus entradas
+        # viejas podrian empatar con las de las palabras que reutilicen estas posiciones
+        with self._heap_lock:
+            self._freq_heap = None
+            self._freq_dirty.clear()
+        self.next_model.remove_words([word for word, _ in removed])
+        self.vocab_version += 1
+        if(self.query_cache is not None):
+            self.query_cache.clear()
+
+    def enable_query_cache(self, max_size=QUERY_CACHE_SIZE):
+        """
+        Activa la cache de resultados de get_similar_words, autocomplete_prefix y
+        get_next_words (activa por defecto). Los cambios del diccionario solo descartan los
+        resultados afectados: insert los autocompletados de los prefijos de la palabra y, si
+        la palabra es nueva, las palabras similares de las longitudes cercanas; y
+        save_next_words las palabras siguientes de los contextos que cambiaron.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            max_size: numero maximo de resultados guardados
+        """
+        self.query_cache = QueryCache(max_size)
+
+    def disable_query_cache(self):
+        """
+        Apaga la cache de resultados de consultas y descarta su contenido.
+        """
+        self.query_cache = None
+
+    def query_cache_stats(self):
+        """
+        Funcion para obtener los aciertos y fallos de la cache de consultas por tipo de
+        consulta, o None si la cache esta apagada. Ver QueryCache.stats para el formato.
+        """
+        if(self.query_cache is None):
+            return None
+        return self.query_cache.stats()
+
+    def _cache_get(self, key):
+        """
+        Funcion para obtener el resultado guardado de una consulta o None, registrando el
+        acierto o fallo en los contadores de rendimiento si la medicion esta encendida.
+
+        Regresa una tupla (resultado, generacion de la cache antes de calcularlo); la
+        generacion se pasa a _cache_put.
+        """
+        cache = self.query_cache
+        if(cache is None):
+            return None, None
+        generation = cache.generation
+        value = cache.get(key)
+        if(self._stats is not None):
+            self._stats.record_cache(key[0], int(value is not None), int(value is None))
+        return value, generation
+
+    def _cache_put(self, key, value, tag, generation):
+        """
+        Guarda el resultado de una consulta si la cache esta encendida y el diccionario no
+        cambio desde que se consulto la cache (generation).
+        """
+        cache = self.query_cache
+        if(cache is not None):
+            cache.put(key, value, tag, generation)
+
+    def enable_symspell(self, max_distance=2, prefix_length=7):
+        """
+        Construye un indice de borrados simetricos con las palabras actuales para que
+        get_similar_words solo verifique los candidatos encontrados en el indice. El indice
+        se actualiza al insertar palabras nuevas.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            max_distance: distancia maxima soportada por el indice
+            prefix_length: numero de caracteres iniciales indexados, limita la memoria del indice
+        """
+        index = SymSpellIndex(max_distance, prefix_length)
+        with self._loading_lock():
+            for word_id, word in self._live_words():
+                index.add(word, word_id)
+            self.fuzzy_index = index
+
+    def disable_symspell(self):
+        """
+        Elimina el indice de borrados simetricos y regresa al indice de vocabulario.
+        """
+        self.fuzzy_index = None
+
+    def enable_vectorized(self, max_distance=2):
+        """
+        Construye un indice con las palabras agrupadas por longitud para calcular las
+        distancias de edicion con NumPy (ver VectorizedIndex). Requiere tener instalado
+        NumPy. El indice se actualiza al insertar palabras nuevas.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            max_distance: distancia maxima soportada por el indice
+        """
+        from vectorized_index import VectorizedIndex
+
+        index = VectorizedIndex(max_distance)
+        with self._loading_lock():
+            for word_id, word in self._live_words():
+                index.add(word, word_id)
+            self.fuzzy_index = index
+
+    def disable_vectorized(self):
+        """
+        Elimina el indice de NumPy y regresa al indice de vocabulario.
+        """
+        self.fuzzy_index = None
+
+    def enable_trie_walk(self):
+        """
+        Busca las palabras similares recorriendo la propia estructura (ver _fuzzy_matches) en
+        lugar del indice de vocabulario, cuando no hay un indice de busqueda que cubra la
+        distancia pedida. No necesita memoria adicional, pero con vocabularios grandes es mas
+        lento que el indice (ver benchmark.py --fuzzy-backends walk). Los resultados son los
+        mismos, por lo que la cache de consultas se conserva.
+        """
+        self.trie_walk = True
+
+    def disable_trie_walk(self):
+        """
+        Regresa al indice de vocabulario para buscar las palabras similares.
+        """
+        self.trie_walk = False
+
+    def enable_stats(self):
+        """
+        Activa la medicion de rendimiento: numero de llamadas y latencias de cada operacion,
+        candidatos revisados al buscar palabras similares y aciertos de las caches. Las
+        operaciones se envuelven solo en esta instancia, por lo que con la medicion apagada
+        los metodos no tienen ningun costo adicional.
+        """
+        if(self._stats is not None):
+            return
+        self._stats = TrieStats()
+        for name in self.INSTRUMENTED_OPERATIONS:
+            setattr(self, name, self._stats.wrap(name, getattr(self, name)))
+
+    def disable_stats(self):
+        """
+        Apaga la medicion de rendimiento y descarta los contadores.
+        """
+        for name in self.INSTRUMENTED_OPERATIONS:
+            # se quitan los metodos envueltos de la instancia y vuelven a usarse los de la clase
+            self.__dict__.pop(name, None)
+        self._stats = None
+
+    def stats(self):
+        """
+        Funcion para obtener los contadores de rendimiento, o None si la medicion esta apagada.
+        Ver TrieStats.snapshot para el formato.
+        """
+        if(self._stats is None):
+            return None
+        return self._stats.snapshot()
+
+    def reset_stats(self):
+        """
+        Reinicia los contadores de rendimiento sin apagar la medicion.
+        """
+        if(self._stats is not None):
+            self._stats.reset()
+
+    def record_cache(self, cache, hits, misses=0):
+        """
+        Registra aciertos y fallos de una cache externa (por ejemplo la cache de
+        clasificaciones del editor). No hace nada si la medicion esta apagada.
+
+        Parametros:
+            self: Instancia de la clase Trie
+            cache: nombre de la cache
+            hits: consultas resueltas por la cache
+            misses: consultas que la cache no pudo resolver
+        """
+        if(self._stats is not None):
+            self._stats.record_cache(cache, hits, misses)
 
     def search(self, word):
         """
@@ -101,71 +955,130 @@ class Trie:
     def levenshtein_distance(self, word_a, word_b, max_distance=2):
         """
         Calcula la distancia de levenshtein entre dos palabras.
-        Utiliza programacion dinamica para obtener el edit distance.
+
+        Se usa el algoritmo de vectores de bits de Myers (en la version de Hyyrö para la
+        distancia entre palabras completas): cada columna de la matriz dp se representa con
+        las diferencias entre celdas vecinas guardadas en los bits de un entero, por lo que
+        una columna completa se calcula con unas cuantas operaciones de bits. Las palabras de
+        mas de MAX_BIT_PARALLEL caracteres usan la matriz dp tradicional.
+
+        El resultado es el mismo que el del calculo con la matriz dp: 99 si la longitud de las
+        palabras difiere en mas de max_distance o si alguna fila de la matriz (sin contar la primera
+        columna) tiene todos sus valores mayores a max_distance; en otro caso la distancia.
 
         Parametros:
             self:   Instancia de la clase Trie
             word_a: palabra 'A'
             word_b: palabra 'B'
+            max_distance: distancia a partir de la cual se descarta la palabra
         """
         size_word_a = len(word_a)
         size_word_b = len(word_b)
-        diff_word_size = abs(size_word_a - size_word_b) 
-        
-        # evitar procesamiento si la longitud de ambas palabras es mayor a 2 caracteres
-        if(diff_word_size > 2):
+
+        # la diferencia de longitud es una cota inferior de la distancia
+        if(abs(size_word_a - size_word_b) > max_distance):
             return 99
-        
-        dp_filas = size_word_a + 1
-        dp_columnas = size_word_b + 1
-
-        # creamos matriz dp llena de ceros (dp_filas x dp_columnas) 
-        dp = [[0] * (dp_columnas) for _ in range(dp_filas)]
-
-        # inicializamos primera columna
-        for i in range(dp_filas):
-            dp[i][0] = i
-
-        # inicializamos primera filar
-        for i in range(dp_columnas):
-            dp[0][i] = i
-
-        for i in range(1, dp_filas):
-            fila_min = 999999
-            for j in range(1, dp_columnas):
-                # calculamos el costo de quitar un caracter
-                delete_cost = dp[i-1][j] + 1
-                # calculamos el costo de insertar un caracter
-                insert_cost = dp[i][j-1] + 1
-
-                if(word_a[i-1] == word_b[j-1]):
-                    subst_cost = dp[i-1][j-1]
+        if(size_word_a == 0):
+            return size_word_b
+        if(size_word_b == 0):
+            return 99
+        if(size_word_a > MAX_BIT_PARALLEL):
+            return self._levenshtein_dp(word_a, word_b, max_distance)
+
+        # mascara de posiciones de cada caracter en word_a, se reutiliza mientras word_a no
+        # cambie (por ejemplo al comparar una palabra contra todos sus candidatos)
+        cached = self._peq_cache
+        if(cached is not None and cached[0] == word_a):
+            peq = cached[1]
+        else:
+            peq = {}
+            bit = 1
+            for ch in word_a:
+                peq[ch] = peq.get(ch, 0) | bit
+                bit <<= 1
+            self._peq_cache = (word_a, peq)
+
+        mask = (1 << size_word_a) - 1
+        last_bit = 1 << (size_word_a - 1)
+        # diferencias verticales positivas y negativas de la columna actual (la columna 0
+        # vale 0, 1, 2, ... por lo que todas las diferencias son +1)
+        vp = mask
+        vn = 0
+        # valor de la ultima fila en la columna actual y el menor visto desde la columna 1
+        score = size_word_a
+        row_min = 99
+        remaining = size_word_b
+
+        for ch in word_b:
+            eq = peq.get(ch, 0)
+            xv = eq | vn
+            xh = (((eq & vp) + vp) ^ vp) | eq
+            hp = vn | (~(xh | vp) & mask)
+            hn = vp & xh
+
+            if(hp & last_bit):
+                score += 1
+            elif(hn & last_bit):
+                score -= 1
+            if(score < row_min):
+                row_min = score
+
+            remaining -= 1
+            # la ultima fila baja a lo mas 1 por columna: si ya no puede llegar a max_distance
+            # ninguna columna lo hara y la matriz dp tambien se habria detenido
+            if(row_min > max_distance and score - remaining > max_distance):
+                return 99
+
+            # la primera fila vale 0, 1, 2, ... por lo que su diferencia horizontal es +1
+            hp = ((hp << 1) | 1) & mask
+            hn = (hn << 1) & mask
+            vp = hn | (~(xv | hp) & mask)
+            vn = hp & xv
+
+        # el menor valor de cada fila no disminuye al bajar en la matriz, por lo que basta
+        # revisar la ultima fila para saber si la matriz dp se habria detenido antes
+        if(row_min > max_distance):
+            return 99
+        return score
+
+    def _levenshtein_dp(self, word_a, word_b, max_distance=2):
+        """
+        Calcula la distancia de levenshtein con programacion dinamica, guardando solo la fila
+        anterior de la matriz. Se usa para palabras que no caben en los vectores de bits.
+
+        Parametros:
+            self:   Instancia de la clase Trie
+            word_a: palabra 'A'
+            word_b: palabra 'B'
+            max_distance: distancia a partir de la cual se descarta la palabra
+        """
+        previous = list(range(len(word_b) + 1))
+
+        for i in range(1, len(word_a) + 1):
+            current = [i]
+            ch = word_a[i - 1]
+            for j in range(1, len(word_b) + 1):
+                # costo de quitar, insertar o sustituir un caracter
+                delete_cost = previous[j] + 1
+                insert_cost = current[j - 1] + 1
+                if(ch == word_b[j - 1]):
+                    subst_cost = previous[j - 1]
                 else:
-                    subst_cost = dp[i-1][j-1] + 1
+                    subst_cost = previous[j - 1] + 1
 
-                # evaluamos el de menor costo
                 min_cost = delete_cost
-                
-                # validamos si el costo de insertarlo es menor
                 if(min_cost > insert_cost):
                     min_cost = insert_cost
-
-                # validamos si el costo de sustituirlo es menor
                 if(min_cost > subst_cost):
                     min_cost = subst_cost
+                current.append(min_cost)
 
-                # guardamos la solucion de menor costo
-                dp[i][j] = min_cost
-                
-                # se guarda la distancia mas pequeña encontraada en la fila
-                if min_cost < fila_min:
-                    fila_min = min_cost
-
-            if(fila_min > max_distance):
+            # se descarta si ningun valor de la fila (sin la primera columna) es suficientemente pequeño
+            if(min(current[1:]) > max_distance):
                 return 99
+            previous = current
 
-        return dp[size_word_a][size_word_b]
-
+        return previous[-1]
 
     def get_similar_words(self, word, max_distance=2, result_size=5):
         """
@@ -173,8 +1086,9 @@ class Trie:
         con la palabra de entrada. 
             
         Se calcula la distancia de Levenshtein (edit distance) entre la palabra
-        de entrada y cada palabra almacenada en la estructura, y se devuelven
-        aquellas cuyo valor de distancia sea menor a la distancia maxima.
+        de entrada y las palabras almacenadas en la estructura, y se devuelven
+        aquellas cuyo valor de distancia sea menor a la distancia maxima. Las
+        palabras con la misma distancia conservan el orden de all_words.
 
         Parametros:
         self : objeto tipo Trie
@@ -184,44 +1098,286 @@ class Trie:
         max_distance : int, opcional (por defecto=2)
             Distancia máxima de edición permitida para considerar palabras similares
         """
-        similar_words = []
-        results = []
         word = word.lower()
-        
-        # iteramos entre las palabras almacenadas 
-        for w in self.all_words:
-            if((abs(len(w) - len(word))) > max_distance):
+        key = ("similar_words", word, max_distance, result_size)
+        cached, generation = self._cache_get(key)
+        if(cached is not None):
+            return cached
+        if(max_distance > self._similar_distance):
+            self._similar_distance = max_distance
+
+        if(self.fuzzy_index is not None and max_distance <= self.fuzzy_index.max_distance):
+            # solo se verifican los candidatos que comparten algun borrado con la palabra
+            similar_words = self.fuzzy_index.lookup(word, max_distance, self.all_words, self.levenshtein_distance, self._stats)
+        elif(self.trie_walk):
+            # los prefijos compartidos se comparan una sola vez
+            similar_words = self._fuzzy_matches(word, max_distance)
+        else:
+            # solo se verifican las palabras de longitud cercana con caracteres compatibles
+            similar_words = self.vocab_index.lookup(word, max_distance, self.all_words, self.levenshtein_distance, self._stats)
+
+        # ordenamos por menor distancia y despues por posicion en all_words
+        similar_words.sort()
+
+        result = [w for _, _, w in similar_words[:result_size]]
+        self._cache_put(key, result, len(word), generation)
+        return result
+
+    def get_similar_words_many(self, words, max_distance=2, result_size=5):
+        """
+        Funcion para obtener las palabras similares de una lista de palabras. Si el indice
+        de busqueda permite resolver varias consultas juntas (VectorizedIndex) se hace un
+        solo calculo, en otro caso se llama a get_similar_words por cada palabra.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        words : list
+            palabras de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion
+        result_size : int
+            numero maximo de sugerencias por palabra
+
+        Regresa una lista con las sugerencias de cada palabra, en el mismo orden.
+        """
+        index = self.fuzzy_index
+        if(index is None or not hasattr(index, "lookup_many") or max_distance > index.max_distance):
+            return [self.get_similar_words(word, max_distance, result_size) for word in words]
+
+        words = [w.lower() for w in words]
+        keys = [("similar_words", w, max_distance, result_size) for w in words]
+        if(max_distance > self._similar_distance):
+            self._similar_distance = max_distance
+        cached = [self._cache_get(key) for key in keys]
+        results = [result for result, _ in cached]
+        # solo se calculan juntas las palabras que no estan en la cache
+        pending = [i for i, result in enumerate(results) if result is None]
+        matches = index.lookup_many([words[i] for i in pending], max_distance, self.all_words, self._stats)
+        for i, similar_words in zip(pending, matches):
+            similar_words.sort()
+            results[i] = [w for _, _, w in similar_words[:result_size]]
+            self._cache_put(keys[i], results[i], len(words[i]), cached[i][1])
+        return results
+
+    def _fuzzy_matches(self, word, max_distance):
+        """
+        Funcion para obtener todas las palabras a distancia de edicion menor o igual a
+        max_distance recorriendo la propia estructura Trie.
+
+        Cada nivel del arbol calcula una sola fila de la matriz dp a partir de la fila
+        de su padre, por lo que los prefijos compartidos se calculan una sola vez. Si el
+        menor valor de la fila supera max_distance, ninguna palabra del subarbol puede
+        estar a menor distancia y se descarta el subarbol completo.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        word : str
+            palabra de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion
+
+        Regresa una lista de tuplas (distancia, posicion en all_words, palabra).
+        """
+        matches = []
+        word_size = len(word)
+        columns = range(1, word_size + 1)
+
+        # la fila inicial corresponde al prefijo vacio
+        first_row = list(range(word_size + 1))
+        # los hijos se copian con list() (una sola operacion) porque otro hilo puede agregar
+        # hijos mientras se recorren
+        stack = [(child, ch, 1, first_row) for ch, child in list(self.root.children.items())]
+        # nodos revisados, para las estadisticas de rendimiento
+        visited = 0
+
+        while stack:
+            node, ch, depth, prev_row = stack.pop()
+            visited += 1
+
+            # calculamos la fila del nodo actual a partir de la fila del padre
+            row = [depth]
+            for j in columns:
+                # costo de quitar un caracter
+                delete_cost = prev_row[j] + 1
+                # costo de insertar un caracter
+                insert_cost = row[j - 1] + 1
+                # costo de sustituirlo
+                if(word[j - 1] == ch):
+                    subst_cost = prev_row[j - 1]
+                else:
+                    subst_cost = prev_row[j - 1] + 1
+
+                min_cost = delete_cost
+                if(min_cost > insert_cost):
+                    min_cost = insert_cost
+                if(min_cost > subst_cost):
+                    min_cost = subst_cost
+                row.append(min_cost)
+
+            # la distancia ya limita la diferencia de longitud a max_distance, igual que en
+            # levenshtein_distance
+            dist = row[word_size]
+            if(node.is_eow and dist <= max_distance):
+                matches.append((dist, node.word_id, self.all_words[node.word_id]))
+
+            # podamos el subarbol si ninguna palabra puede quedar dentro de la distancia
+            if(min(row) <= max_distance):
+                for child_ch, child in list(node.children.items()):
+                    stack.append((child, child_ch, depth + 1, row))
+
+        if(self._stats is not None):
+            self._stats.record_fuzzy(visited, len(matches))
+        return matches
+
+    def _word_prefixes(self, word, start):
+        """
+        Generador de las palabras del diccionario que empiezan en la posicion start de word,
+        con un solo recorrido de la estructura.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        word : str
+            texto en minusculas
+        start : int
+            posicion donde empiezan las palabras
+
+        Regresa tuplas (posicion final, frecuencia, posicion en all_words).
+        """
+        node = self.root
+        for end in range(start + 1, len(word) + 1):
+            node = node.children.get(word[end - 1])
+            if(node is None):
+                return
+            if(node.is_eow):
+                yield end, node.freq, node.word_id
+
+    def segment_word(self, word):
+        """
+        Funcion para separar un texto con palabras pegadas (por ejemplo "climatechange") en
+        las palabras del diccionario mas probables.
+
+        Se usa programacion dinamica sobre las posiciones del texto: desde cada posicion
+        alcanzable se recorre la estructura una vez para encontrar todas las palabras que
+        empiezan ahi, y se guarda la separacion de menor costo que llega a cada posicion. El
+        costo de una palabra es log((posicion en all_words + 2) / frecuencia), que favorece
+        las palabras comunes del diccionario base y las que el usuario usa mas, mas un costo fijo
+        por palabra.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        word : str
+            texto en minusculas sin espacios
+
+        Regresa la lista de palabras, o None si el texto no se puede separar en al menos
+        dos palabras o la mejor separacion es poco probable.
+        """
+        size = len(word)
+        if(size < SEGMENT_MIN_LENGTH):
+            return None
+
+        # best[i]: menor costo para separar word[:i], back[i]: inicio de la ultima palabra
+        best = [math.inf] * (size + 1)
+        back = [0] * (size + 1)
+        best[0] = 0.0
+        for start in range(size):
+            if(best[start] == math.inf):
                 continue
-            
-            # calculamos el edit distance entre la palabra de entrada y la encontrada en la estructura trie
-            dist = self.levenshtein_distance(word, w, max_distance)
+            for end, freq, word_id in self._word_prefixes(word, start):
+                cost = best[start] + max(math.log((word_id + 2) / freq), 0.0) + SEGMENT_PART_COST
+                if(cost < best[end]):
+                    best[end] = cost
+                    back[end] = start
+
+        if(best[size] > SEGMENT_MAX_COST * size):
+            return None
+
+        parts = []
+        end = size
+        while end > 0:
+            parts.append(word[back[end]:end])
+            end = back[end]
+        if(len(parts) < 2):
+            return None
+        parts.reverse()
+        return parts
+
+    def get_corrections(self, word, max_distance=2, result_size=5):
+        """
+        Funcion para obtener las sugerencias de correccion de una palabra desconocida: las
+        palabras similares y, si parece que son varias palabras pegadas, su separacion.
 
-            if(dist <= max_distance):
-                similar_words.append((w, dist))
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        word : str
+            palabra de entrada
+        max_distance : int
+            distancia maxima de edicion de las palabras similares
+        result_size : int
+            numero maximo de sugerencias
+        """
+        word = word.lower()
+        sim_word = self.get_similar_words(word, max_distance, result_size)
+        return self._add_segmentation(word, sim_word)[:result_size]
 
-        # ordenamos por menor distancia
-        similar_words.sort(key=lambda x: x[1])
-        
-        for w, _ in similar_words:
-            results.append(w)
-            
-        return results[:result_size]
+    def _add_segmentation(self, word, sim_word):
+        """
+        Funcion para agregar al inicio de las sugerencias de una palabra desconocida su
+        separacion en palabras del diccionario, cuando ninguna sugerencia esta a una sola
+        edicion de distancia (en ese caso lo mas probable es un error de escritura).
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        word : str
+            palabra desconocida en minusculas
+        sim_word : list
+            palabras similares ordenadas por distancia
+        """
+        if(len(sim_word) > 0 and self.levenshtein_distance(word, sim_word[0]) <= 1):
+            return sim_word
+        parts = self.segment_word(word)
+        if(parts is None):
+            return sim_word
+        return [" ".join(parts)] + sim_word
 
     def insert_paragraph(self, text):
         """
-        Funcion para insertar un texto entero a la estructura de trie. Separa las frases en tokens y las inserta
-        a la estructura de trie.
+        Funcion para insertar un texto entero al indice de frases. Separa el texto en frases y
+        aumenta la frecuencia de cada una, sin agregarlas al vocabulario de palabras.
 
         Parametros:
         self : objeto tipo Trie
             Instancia de la clase Trie que llama a este método.
-        text : cadena de texto que contiene un parrafo que se desea insertar a la estructura trie
+        text : str o iterable
+            texto con uno o varios parrafos, o partes de un texto en orden (por ejemplo las
+            lineas de un archivo abierto)
         """
-        # separar las palabras del texto en diferentes tokens
-        tokens_frases = sent_tokenize(text, language="spanish")
+        if(self._loader is not None):
+            # las partes se copian porque pueden venir de un archivo que se cierra antes
+            parts = text if isinstance(text, str) else list(text)
+            if(self._loader.defer(self.insert_paragraph, (parts,))):
+                return None
+            text = parts
+        return self.phrases.ingest(text)
+
+    def get_phrase_suggestions(self, prefix, n_suggestions=5):
+        """
+        Funcion para obtener las frases mas frecuentes que comienzan con el texto escrito.
 
-        for element in tokens_frases:
-            self.insert(element)
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        prefix : str
+            inicio de la frase escrito por el usuario
+        n_suggestions : int
+            numero de frases a obtener
+        """
+        return self.phrases.get_suggestions(prefix, n_suggestions)
 
     def get_node_freq(self, word):
         """
@@ -250,30 +1406,89 @@ class Trie:
 
     def get_most_frequent_words(self, top_n=10):
         """
-        Funcion para obtener las palabras utilizadas con mayor frecuencia.
+        Funcion para obtener las palabras utilizadas con mayor frecuencia. Si top_n no supera
+        TOP_K_CACHE se usa la lista de palabras mas frecuentes de la raiz, en otro caso se
+        consulta el heap de frecuencias.
 
         Parametros:
         self : objeto tipo Trie
             Instancia de la clase Trie que llama a este método.
-        word : str
-            palabra a buscar
-        len : int
-            longitud de palabras iniciales a buscar
+        top_n : int
+            numero de palabras a obtener
+
+        Regresa una lista de tuplas (palabra, frecuencia).
         """
-        word_freq = {}
+        if(self._stats is not None):
+            self._stats.record_cache("most_frequent_top", int(top_n <= TOP_K_CACHE), int(top_n > TOP_K_CACHE))
 
-        #iteramos entre todas las palabras agregadas a la trie
-        for word in self.all_words:
-            #obtenemos su frecuencia
-            freq = self.get_node_freq(word)
-            word_freq[word] = freq
-        
-        # Ordenar por frecuencia de forma descendente
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        # limitamos el numero de palabras
-        sorted_words = sorted_words[:top_n]
-        
-        return sorted_words
+        if(top_n <= TOP_K_CACHE):
+            return [(self.all_words[n.word_id], n.freq) for n in self.root.top[:top_n]]
+
+        return self._most_frequent_from_heap(top_n)
+
+    def _node_rank(self, node):
+        """
+        Llave de ordenamiento (-frecuencia, posicion en all_words) de un nodo final de palabra.
+        """
+        return rank_key(node)
+
+    def _word_nodes(self):
+        """
+        Generador de todos los nodos finales de palabra de la estructura.
+        """
+        return self.__subtree_words(self.root)
+
+    def _most_frequent_from_heap(self, top_n):
+        """
+        Funcion para obtener las top_n palabras mas frecuentes con un heap que se mantiene
+        entre consultas. Las entradas con una frecuencia que ya no corresponde al nodo se
+        descartan al salir del heap, y los nodos que cambiaron desde la ultima consulta se
+        agregan con su nueva frecuencia, por lo que cada consulta cuesta O((top_n + cambios) log V).
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        top_n : int
+            numero de palabras a obtener
+        """
+        with self._heap_lock:
+            return self.__most_frequent_from_heap(top_n)
+
+    def __most_frequent_from_heap(self, top_n):
+        """
+        Version sin candado de _most_frequent_from_heap.
+        """
+        heap = self._freq_heap
+        # se reconstruye si no existe o si acumulo demasiadas entradas obsoletas
+        if(heap is None or len(heap) > 2 * self.number_of_words + 64):
+            heap = [self._node_rank(node) + (node,) for node in self._word_nodes()]
+            heapq.heapify(heap)
+            self._freq_heap = heap
+        else:
+            for node in self._freq_dirty:
+                heapq.heappush(heap, self._node_rank(node) + (node,))
+        self._freq_dirty.clear()
+
+        results = []
+        valid_entries = []
+        while heap and len(results) < top_n:
+            entry = heapq.heappop(heap)
+            neg_freq, word_id, node = entry
+            # descartamos entradas obsoletas
+            if(self._node_rank(node) != (neg_freq, word_id)):
+                continue
+            # un insert de otro hilo cambia la frecuencia antes de marcar el nodo, por lo que
+            # el nodo puede quedar dos veces con la misma frecuencia: descartamos la copia
+            if(valid_entries and valid_entries[-1] == entry):
+                continue
+            valid_entries.append(entry)
+            results.append((self.all_words[word_id], -neg_freq))
+
+        # regresamos las entradas validas al heap
+        for entry in valid_entries:
+            heapq.heappush(heap, entry)
+
+        return results
     
     def starts_with(self, word, len=4):
         """
@@ -303,47 +1518,43 @@ class Trie:
 
         return True
     
-    def __dfs(self, node, prefix, results, max_lim=3):
+    def autocomplete_prefix(self, prefix, k=3):
         """
-        Funcion para realizar busqueda por profundidad DFS para 
+        Funcion para obtener las k palabras mas frecuentes que comienzan con el prefijo dado.
+        Cada nodo guarda sus TOP_K_CACHE palabras mas frecuentes, por lo que el costo no
+        depende del tamaño del subarbol mientras k no supere ese valor.
 
         Parametros:
         self : objeto tipo Trie
             Instancia de la clase Trie que llama a este método.
-        node : TrieNode
-            Nodo de la clase Trie
         prefix : str
-            conjunto de letras al inicio de la palabra
-        results: list
-            resultados encontrados que incluyan el prefijo
+            prefijo a completar.
+        k : int
+            numero de sugerencias a obtener
         """
-        # agregar el prefijo a los resultados si estamos al final de la palabra
-        if node.is_eow:
-            results.append(prefix)
+        if(len(prefix) == 0):
+            return []
 
-        for ch, child_node in node.children.items():
-            # limitamos la cantidad de resultados a max_lim
-            if(len(results) >= max_lim):
-                return
-            # empleamos recursion y vamos recorriendo los nodos subsecuentes hasta encontrar el final de la palabra
-            self.__dfs(child_node, prefix + ch, results)
-    
-    def autocomplete_prefix(self, prefix):
+        key = ("autocomplete", prefix, k)
+        cached, generation = self._cache_get(key)
+        if(cached is None):
+            cached = self._autocomplete(prefix, k)
+            self._cache_put(key, cached, prefix, generation)
+        return cached
+
+    def _autocomplete(self, prefix, k):
         """
-        Funcion para obtener sugerencias que mas se aproximen a una palabra de un prefijo dado. 
+        Funcion para calcular el autocompletado de un prefijo no vacio sin usar la cache de
+        consultas. Cada motor de almacenamiento la implementa con su propio recorrido.
 
         Parametros:
         self : objeto tipo Trie
             Instancia de la clase Trie que llama a este método.
         prefix : str
-            lista de palabras a procesar.
-        len : int
-            longitud de palabras iniciales a buscar
+            prefijo a completar.
+        k : int
+            numero de sugerencias a obtener
         """
-        if(len(prefix) == 0):
-            return []
-        
-        results = []
         # empezamos desde la raiz del arbol        
         node = self.root
 
@@ -355,11 +1566,35 @@ class Trie:
             # asignamos el nodo como el hijo del anterior
             node = node.children[ch]
 
-        # busqueda por profundidad (DFS)
-        self.__dfs(node, prefix, results)
-        return results
+        if(self._stats is not None):
+            self._stats.record_cache("autocomplete_top", int(k <= TOP_K_CACHE), int(k > TOP_K_CACHE))
 
-    def save_next_words(self, words):
+        if(k <= TOP_K_CACHE):
+            top = node.top[:k]
+        else:
+            # la lista del nodo no alcanza, se recorren todas las palabras del subarbol
+            top = heapq.nsmallest(k, self.__subtree_words(node), key=rank_key)
+
+        return [self.all_words[n.word_id] for n in top]
+
+    def __subtree_words(self, node):
+        """
+        Generador de los nodos finales de palabra dentro del subarbol de un nodo.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        node : TrieNode
+            Nodo de la clase Trie
+        """
+        stack = [node]
+        while stack:
+            node = stack.pop()
+            if node.is_eow:
+                yield node
+            stack.extend(node.children.values())
+
+    def save_next_words(self, words, start=1):
         """
         Funcion para guardar el orden de la secuencia de palabras a almacenar en la Trie.
 
@@ -368,55 +1603,50 @@ class Trie:
             Instancia de la clase Trie que llama a este método.
         words : str
             palabra a procesar
+        start : int
+            posicion de la primera palabra que se cuenta, las anteriores solo son contexto
         """       
-        word_size = len(words) - 1
-
-        for i in range(word_size):
-            # convertir las palabras a minusculas para poder procesarlas
-            word_1 = words[i].lower()
-            word_2 = words[i + 1].lower()
-
-            # inicializamos si no esta en las palabras siguiente 
-            if(word_1 not in self.next_words):
-                self.next_words[word_1] = {}
-
-            # inicializamos si no esta en las palabras siguiente de word 1
-            if(word_2 not in self.next_words[word_1]):
-                self.next_words[word_1][word_2] = 0
-
-            self.next_words[word_1][word_2] += 1
+        if(self._loader is not None and self._loader.defer(self.save_next_words, (list(words), start))):
+            return
+        prunes = self.next_model.prunes
+        self.next_model.add_sequence(words, start)
+
+        cache = self.query_cache
+        if(cache is not None):
+            if(self.next_model.prunes != prunes):
+                # se descartaron contextos, cualquier resultado puede haber cambiado
+                cache.invalidate_kind("next_words")
+            else:
+                # solo cambian los contextos que terminan en una palabra seguida por otra
+                cache.invalidate("next_words", [words[i - 1].lower() for i in range(max(start, 1), len(words))])
     
     def get_next_words(self, word, n_suggestions=5):
         """
-        Funcion para obtener las palabras siguientes de una frase dada.
+        Funcion para obtener las palabras siguientes de una frase dada. Si se da una lista
+        con las ultimas palabras escritas se usa el contexto de dos palabras (trigramas) y
+        se completa con las sugerencias de la ultima palabra.
 
         Parametros:
         self : objeto tipo Trie
             Instancia de la clase Trie que llama a este método.
-        word : str
-            palabra a procesar
-        len : int
-            longitud de palabras iniciales a buscar
+        word : str o list
+            ultima palabra escrita o lista con las ultimas palabras escritas
+        n_suggestions : int
+            numero de sugerencias a obtener
         """
-        # pasamos la palabra a minusculas para procesarla
-        word = word.lower()
-        results = []
-
-        # verificamos que la palabra se encuentre en las siguientes palabras
-        if word not in self.next_words:
-            return []
-
-        # obtenemos las posibles siguientes palabras 
-        next_words = self.next_words[word].items()
-
-        # ordenamos de forma acendente 
-        next_word_freq = sorted(next_words, key=lambda x: x[1], reverse=True)
-        next_word_freq = next_word_freq[:n_suggestions]
-
-        for w, _ in next_word_freq:
-            results.append(w)
+        if(isinstance(word, str)):
+            context = (word.lower(),)
+        else:
+            context = tuple(w.lower() for w in word[-(self.next_model.order - 1):])
+        if(len(context) == 0):
+            return self.next_model.get_next_words(word, n_suggestions)
 
-        return results
+        key = ("next_words", context, n_suggestions)
+        cached, generation = self._cache_get(key)
+        if(cached is None):
+            cached = self.next_model.get_next_words(list(context), n_suggestions)
+            self._cache_put(key, cached, context[-1], generation)
+        return cached
 
     def process_text_optimized(self, words_list, suggestion_size = 3):
         """
@@ -426,54 +1656,214 @@ class Trie:
         si existe la palabra, si hay una palabra parecida o no existe y necesita 
         ser agregada.
 
+        Cada palabra distinta se clasifica una sola vez con classify_words, que busca juntas
+        las palabras similares de todas (con VectorizedIndex es un solo calculo); despues se
+        aumentan las frecuencias de las palabras encontradas en el orden del texto.
+
+        Todas las palabras se clasifican con el vocabulario y las frecuencias que habia antes
+        del texto. Las sugerencias de autocomplete_prefix y la separacion de palabras pegadas
+        dependen de las frecuencias, por lo que pueden diferir de procesar el texto palabra
+        por palabra, donde cada palabra ve las inserciones de las anteriores.
+
         Parametros:
         self : objeto tipo Trie
             Instancia de la clase Trie que llama a este método.
         words_list : list
             lista de palabras a procesar.
-        len : int
-            longitud de palabras iniciales a buscar
+        suggestion_size : int
+            numero maximo de sugerencias por palabra
+        """
+        words_lower = [word.lower() for word in words_list]
+        # se clasifica todo el texto antes de insertar, con las frecuencias anteriores al texto
+        verdicts = self.classify_words(words_lower, suggestion_size, workers=1)
+        found_words, similar_words, unfound_words = self.split_verdicts(words_lower, verdicts)
+
+        # insertamos las palabras encontradas para aumentar su frecuencia de uso
+        for word in found_words:
+            self.insert(word)
+
+        # almacenamos la secuencia de palabras
+        self.save_next_words(words_list)
+
+        return found_words, similar_words, unfound_words
+
+    def process_text_batch(self, words_list, suggestion_size = 3, workers = 1, min_parallel = 64):
+        """
+        Version por lotes de process_text_optimized para textos grandes. Cada palabra distinta
+        se clasifica una sola vez y las busquedas de palabras similares (la parte mas costosa)
+        se pueden repartir en un pool de procesos (workers) que comparten una copia de solo
+        lectura del diccionario. Los resultados se regresan en el orden de entrada con el mismo formato
+        (found, similar, unfound).
+
+        Todas las palabras se clasifican con el estado del diccionario al inicio de la
+        llamada; despues se actualizan las frecuencias en el orden de entrada y se guarda la
+        secuencia de palabras, por lo que el resultado no depende del numero de procesos.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        words_list : list
+            lista de palabras a procesar.
+        suggestion_size : int
+            numero maximo de sugerencias por palabra
+        workers : int
+            numero de procesos, None para usar todas las CPUs. Con 1 (por defecto) no se
+            crea el pool
+        min_parallel : int
+            numero minimo de palabras desconocidas para usar el pool de procesos
+        """
+        words_lower = [word.lower() for word in words_list]
+        # cada palabra distinta se clasifica una sola vez
+        verdicts = self.classify_words(words_lower, suggestion_size, workers, min_parallel)
+        found_words, similar_words, unfound_words = self.split_verdicts(words_lower, verdicts)
+
+        # actualizamos las frecuencias y la secuencia de palabras en el orden de entrada
+        for word in found_words:
+            self.insert(word)
+        self.save_next_words(words_list)
+
+        return found_words, similar_words, unfound_words
+
+    def split_verdicts(self, words, verdicts):
+        """
+        Funcion para armar las listas (found, similar, unfound) en el orden de entrada a
+        partir de las clasificaciones de classify_words.
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        words : list
+            palabras en minusculas en el orden del texto
+        verdicts : dict
+            clasificacion de cada palabra distinta
         """
         found_words = []
         similar_words = []
         unfound_words = []
+        for word in words:
+            verdict, sim_word = verdicts[word]
+            if(verdict == "found"):
+                found_words.append(word)
+            elif(verdict == "similar"):
+                similar_words.append((word, sim_word))
+            else:
+                unfound_words.append(word)
+        return found_words, similar_words, unfound_words
+
+    def classify_words(self, words, suggestion_size = 3, workers = 1, min_parallel = 64):
+        """
+        Funcion para clasificar palabras con las mismas reglas que process_text_optimized
+        pero sin modificar la estructura (no actualiza frecuencias ni la secuencia de palabras).
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        words : list
+            palabras en minusculas a clasificar.
+        suggestion_size : int
+            numero maximo de sugerencias por palabra
+        workers : int
+            numero de procesos para las busquedas de palabras similares, None para usar
+            todas las CPUs. Con 1 (por defecto) no se crea el pool
+        min_parallel : int
+            numero minimo de palabras desconocidas para usar el pool de procesos
+
+        Regresa un diccionario palabra -> (clasificacion, sugerencias), donde la clasificacion
+        es "found", "similar" o "unfound".
+        """
+        verdicts = {}
+        fuzzy_words = []
 
-        for word in words_list:
-            # convertimos la palabra a minusculas
-            word = word.lower()
-            # primero buscamos si la palabra existe con busqueda rapida
+        for word in dict.fromkeys(words):
             if(self.search(word)):
-                # insertamos la palabra en nuestra estructura para aumentar su frecuencia de uso
-                self.insert(word)
-                # agregar a lista de palabras encontradas
-                found_words.append(word)
+                verdicts[word] = ("found", None)
             elif(self.starts_with(word, 2)):
                 autocomplete = self.autocomplete_prefix(word)
                 if(len(autocomplete) > 0):
-                    similar_words.append((word, autocomplete))
-                    print(similar_words)      
+                    verdicts[word] = ("similar", autocomplete)
                 else:
-                    # asumimos que la palabra esta mal escrita y buscamos la que mas se aproxime
-                    # obtenemos palabras similares
-                    sim_word = self.get_similar_words(word, max_distance=2)
-                    # reducir el nuemero de sugerencias
-                    sim_word = sim_word[:suggestion_size]
-
-                    # verficar que por lo menos haya una sugerencia
-                    if(len(sim_word) > 0):
-                        # agregar a palabras similares
-                        similar_words.append((word, sim_word))
-                    else:
-                        # agregar a palabras no encontradas si sim_word esta vacio
-                        unfound_words.append(word)
+                    # se resuelven despues, posiblemente en paralelo
+                    fuzzy_words.append(word)
             else:
-                # agregar a lista de palabras no encontradas
-                unfound_words.append(word)   
+                verdicts[word] = ("unfound", None)
 
-        # almacenamos la secuencia de palabras
-        self.save_next_words(words_list)
+        for word, sim_word in zip(fuzzy_words, self._similar_words_batch(fuzzy_words, workers, min_parallel)):
+            sim_word = self._add_segmentation(word, sim_word)[:suggestion_size]
+            if(len(sim_word) > 0):
+                verdicts[word] = ("similar", sim_word)
+            else:
+                verdicts[word] = ("unfound", None)
 
-        return found_words, similar_words, unfound_words
+        return verdicts
+
+    def _similar_words_batch(self, words, workers, min_parallel):
+        """
+        Funcion para obtener las palabras similares de una lista de palabras, usando un pool
+        de procesos si la lista es suficientemente grande.
+
+        Los procesos solo se crean con fork si se llama desde el hilo principal sin otros
+        hilos: un proceso creado con fork hereda tomados los candados que otro hilo tenia en
+        ese momento (la cache de consultas, el heap de frecuencias) y se bloquea al usarlos.
+        En otro caso se usa spawn y cada proceso reconstruye el diccionario desde su estado;
+        como spawn vuelve a importar el programa principal, este debe protegerse con
+        if __name__ == "__main__".
+
+        Parametros:
+        self : objeto tipo Trie
+            Instancia de la clase Trie que llama a este método.
+        words : list
+            palabras desconocidas en minusculas
+        workers : int
+            numero de procesos
+        min_parallel : int
+            numero minimo de palabras para usar el pool de procesos
+        """
+        if(workers is None):
+            workers = os.cpu_count() or 1
+
+        if(workers <= 1 or len(words) < min_parallel or hasattr(self.fuzzy_index, "lookup_many")):
+            # el indice de NumPy ya resuelve todas las palabras en un solo calculo
+            return self.get_similar_words_many(words, max_distance=2)
+
+        global _shared_trie
+        chunksize = len(words) // (workers * 4) + 1
+
+        only_thread = threading.current_thread() is threading.main_thread() and threading.active_count() == 1
+        if(only_thread and "fork" in multiprocessing.get_all_start_methods()):
+            # con fork los procesos heredan el diccionario sin copiarlo ni serializarlo
+            _shared_trie = self
+            try:
+                with multiprocessing.get_context("fork").Pool(workers) as pool:
+                    return pool.map(_similar_words_worker, words, chunksize)
+            finally:
+                _shared_trie = None
+
+        # con otros hilos o en otras plataformas cada proceso reconstruye el diccionario desde
+        # su estado plano
+        initargs = (type(self), self.language, self.dict_size, self._get_state(), self.fuzzy_index, self.vocab_index.anchor,
+                    self.trie_walk)
+        with multiprocessing.get_context("spawn").Pool(workers, _init_similar_words_worker, initargs) as pool:
+            return pool.map(_similar_words_worker, words, chunksize)
+
+# diccionario de solo lectura que usan los procesos de process_text_batch
+_shared_trie = None
+
+def _init_similar_words_worker(trie_class, language, dict_size, state, fuzzy_index, anchor, trie_walk):
+    """
+    Inicializa un proceso del pool reconstruyendo el diccionario a partir de su estado.
+    """
+    global _shared_trie
+    _shared_trie = trie_class.from_state(language, dict_size, state)
+    _shared_trie.fuzzy_index = fuzzy_index
+    _shared_trie.trie_walk = trie_walk
+    if(anchor is not None):
+        _shared_trie.partition_vocabulary(anchor)
+
+def _similar_words_worker(word):
+    """
+    Obtiene las palabras similares de una palabra dentro de un proceso del pool.
+    """
+    return _shared_trie.get_similar_words(word, max_distance=2)
 
 def example():
     trie = Trie()
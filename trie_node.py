@@ -0,0 +1,57 @@
+# numero de palabras mas frecuentes que guarda cada nodo para el autocompletado
+TOP_K_CACHE = 10
+
+class TrieNode:
+    def __init__(self):
+        self.children = {}
+        self.is_eow = False
+        self.freq = 0  # contador de uso
+        self.word_id = -1  # posicion de la palabra en all_words
+        self.top = []  # nodos finales mas frecuentes del subarbol
+
+def rank_key(node):
+    """
+    Llave para ordenar nodos finales de palabra: mayor frecuencia primero y en caso de
+    empate el orden de insercion en all_words.
+    """
+    return (-node.freq, node.word_id)
+
+def update_top(node, word_node, max_size=TOP_K_CACHE):
+    """
+    Funcion para actualizar la lista de palabras mas frecuentes de un nodo despues de que
+    aumento la frecuencia de word_node. Como las frecuencias solo aumentan, una palabra que
+    no esta en la lista solo puede entrar cuando su propia frecuencia cambia.
+
+    Parametros:
+    node : TrieNode
+        nodo cuya lista se actualiza (un prefijo de la palabra)
+    word_node : TrieNode
+        nodo final de la palabra cuya frecuencia aumento
+    max_size : int
+        numero maximo de palabras en la lista
+    """
+    # se modifica una copia y se reemplaza al final, asi una lectura desde otro hilo siempre
+    # ve una lista completa
+    top = node.top
+    key = rank_key(word_node)
+    if(word_node in top):
+        i = top.index(word_node)
+        if(i == 0 or not key < rank_key(top[i - 1])):
+            # la palabra ya esta en la lista y conserva su posicion
+            return
+        top = list(top)
+    elif(len(top) < max_size):
+        top = top + [word_node]
+        i = len(top) - 1
+    elif(key < rank_key(top[-1])):
+        top = top[:-1] + [word_node]
+        i = len(top) - 1
+    else:
+        return
+
+    # recorremos la palabra hacia el inicio mientras tenga mejor posicion
+    while i > 0 and key < rank_key(top[i - 1]):
+        top[i] = top[i - 1]
+        i -= 1
+    top[i] = word_node
+    node.top = top
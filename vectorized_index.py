@@ -0,0 +1,253 @@
+import numpy as np
+
+from vocabulary_index import VocabularyIndex, char_signature
+
+# numero maximo de pares (consulta, palabra) que se procesan juntos, limita la memoria
+MAX_PAIRS = 1 << 18
+
+if(hasattr(np, "bitwise_count")):
+    _popcount = np.bitwise_count
+else:
+    # NumPy anterior a 2.0: bits encendidos de cada byte con una tabla
+    _BYTE_BITS = np.array([bin(i).count("1") for i in range(256)], dtype=np.uint8)
+
+    def _popcount(values):
+        return _BYTE_BITS[values[..., None].view(np.uint8)].sum(axis=-1, dtype=np.uint8)
+
+
+class VectorizedIndex:
+    """
+    Indice para filtrar candidatos y calcular distancias de edicion con NumPy en lugar de
+    ciclos de Python.
+
+    Las palabras se guardan en un VocabularyIndex (grupos por longitud y firmas de
+    caracteres) y cada consulta aplica los mismos filtros que el camino escalar, pero con
+    operaciones sobre arreglos: la cota de las firmas se calcula para todo un grupo a la vez
+    y la distancia de los candidatos que quedan se obtiene calculando la matriz dp fila por
+    fila para todos los pares a la vez: cada fila se obtiene con operaciones sobre arreglos y
+    el costo de insercion con un minimo acumulado, y los pares cuya fila ya supera la
+    distancia maxima se descartan en cada paso.
+
+    Los arreglos de NumPy de cada grupo (posiciones, firmas y codigos de caracteres) son
+    copias que se crean en la primera consulta que usa el grupo y se actualizan cuando el
+    grupo cambia, por lo que add y remove solo modifican el VocabularyIndex.
+
+    Tiene la misma interfaz que SymSpellIndex (add y lookup) para usarse como fuzzy_index de
+    la Trie, y ademas lookup_many para resolver muchas consultas en un mismo calculo.
+    """
+
+    def __init__(self, max_distance=2):
+        self.max_distance = max_distance
+        self.vocabulary = VocabularyIndex()
+        # longitud -> (grupo de VocabularyIndex, palabras copiadas, posiciones, firmas, codigos)
+        self._arrays = {}
+
+    def __getstate__(self):
+        # las copias de NumPy se vuelven a crear en el otro proceso
+        state = self.__dict__.copy()
+        state["_arrays"] = {}
+        return state
+
+    def add(self, word, word_id):
+        """
+        Funcion para agregar una palabra nueva al indice. Los arreglos de su longitud se
+        actualizan en la siguiente consulta que los use.
+
+        Parametros:
+        self : objeto tipo VectorizedIndex
+            Instancia de la clase VectorizedIndex que llama a este método.
+        word : str
+            palabra a agregar
+        word_id : int
+            posicion de la palabra en all_words
+        """
+        self.vocabulary.add(word, word_id)
+
+    def remove(self, removed):
+        """
+        Funcion para quitar palabras del indice. VocabularyIndex reemplaza los grupos
+        afectados, por lo que sus arreglos se vuelven a crear en la siguiente consulta.
+
+        Parametros:
+        self : objeto tipo VectorizedIndex
+            Instancia de la clase VectorizedIndex que llama a este método.
+        removed : list
+            tuplas (palabra, posicion en all_words) de las palabras a quitar
+        """
+        self.vocabulary.remove(removed)
+
+    def _bucket(self, size, all_words):
+        """
+        Funcion para obtener los arreglos (posiciones, firmas, codigos) de las palabras de
+        una longitud, o None si no hay ninguna. Si al grupo solo se le agregaron palabras
+        se copian las nuevas; si se reemplazo (por remove) se copia completo.
+        """
+        ids = self.vocabulary.buckets.get((size, ""))
+        if(ids is None or len(ids) == 0):
+            return None
+        cached = self._arrays.get(size)
+        count = len(ids)
+        if(cached is not None and cached[0] is ids and cached[1] == count):
+            return cached[2:]
+
+        if(cached is not None and cached[0] is ids):
+            start = cached[1]
+            old_ids, old_signatures, old_codes = cached[2:]
+        else:
+            start = 0
+            old_ids = old_signatures = old_codes = None
+        new_ids = np.array(ids[start:count], dtype=np.int64)
+        signatures = self.vocabulary.signatures
+        new_signatures = np.array([signatures[word_id] for word_id in new_ids.tolist()], dtype=np.uint64)
+        new_codes = np.array([[ord(ch) for ch in all_words[word_id]] for word_id in new_ids.tolist()],
+                             dtype=np.uint32).reshape(len(new_ids), size)
+        if(old_ids is not None):
+            new_ids = np.concatenate((old_ids, new_ids))
+            new_signatures = np.concatenate((old_signatures, new_signatures))
+            new_codes = np.concatenate((old_codes, new_codes))
+        # se publica con una sola asignacion, otra consulta ve la copia anterior o la nueva
+        self._arrays[size] = (ids, count, new_ids, new_signatures, new_codes)
+        return new_ids, new_signatures, new_codes
+
+    def lookup(self, word, max_distance, all_words, distance=None, stats=None):
+        """
+        Funcion para obtener las palabras del indice a distancia de edicion menor o igual
+        a max_distance.
+
+        Parametros:
+        self : objeto tipo VectorizedIndex
+            Instancia de la clase VectorizedIndex que llama a este método.
+        word : str
+            palabra de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion
+        all_words : list
+            lista de palabras de la Trie
+        distance : function
+            no se usa, se recibe por compatibilidad con SymSpellIndex
+        stats : TrieStats
+            contadores de rendimiento opcionales
+
+        Regresa una lista de tuplas (distancia, posicion en all_words, palabra).
+        """
+        return self.lookup_many([word], max_distance, all_words, stats)[0]
+
+    def lookup_many(self, words, max_distance, all_words, stats=None):
+        """
+        Funcion para obtener las palabras similares de varias consultas. Las consultas de la
+        misma longitud se filtran y se comparan juntas contra cada grupo de palabras.
+
+        Parametros:
+        self : objeto tipo VectorizedIndex
+            Instancia de la clase VectorizedIndex que llama a este método.
+        words : list
+            palabras de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion
+        all_words : list
+            lista de palabras de la Trie
+        stats : TrieStats
+            contadores de rendimiento opcionales
+
+        Regresa una lista con las coincidencias (distancia, posicion, palabra) de cada consulta.
+        """
+        results = [[] for _ in words]
+        candidates = [0] * len(words)
+
+        by_size = {}
+        for i, word in enumerate(words):
+            by_size.setdefault(len(word), []).append(i)
+
+        for size, query_ids in by_size.items():
+            queries = np.array([[ord(ch) for ch in words[i]] for i in query_ids], dtype=np.uint32).reshape(len(query_ids), size)
+            query_signatures = np.array([char_signature(words[i]) for i in query_ids], dtype=np.uint64)
+
+            # la diferencia de longitud es una cota inferior de la distancia
+            for other_size in range(max(1, size - max_distance), size + max_distance + 1):
+                bucket = self._bucket(other_size, all_words)
+                if(bucket is None):
+                    continue
+                ids, signatures, codes = bucket
+
+                # se procesan bloques de consultas para no superar MAX_PAIRS pares a la vez
+                step = max(1, MAX_PAIRS // len(ids))
+                for start in range(0, len(query_ids), step):
+                    block = query_signatures[start:start + step, None]
+                    # caracteres que le faltan a cada lado, igual que VocabularyIndex.candidates
+                    keep = ((_popcount(block & ~signatures) <= max_distance) &
+                            (_popcount(signatures & ~block) <= max_distance))
+                    query_index, word_index = np.nonzero(keep)
+                    if(len(query_index) == 0):
+                        continue
+                    query_index += start
+                    for q, count in zip(*np.unique(query_index, return_counts=True)):
+                        candidates[query_ids[q]] += int(count)
+
+                    pair_queries, pair_words, dist = _bounded_distances(queries, codes, query_index, word_index, max_distance)
+                    for q, w, d in zip(pair_queries.tolist(), ids[pair_words].tolist(), dist.tolist()):
+                        results[query_ids[q]].append((d, w, all_words[w]))
+
+        if(stats is not None):
+            for count, matches in zip(candidates, results):
+                stats.record_fuzzy(count, len(matches))
+        return results
+
+    def __len__(self):
+        return len(self.vocabulary)
+
+
+def _bounded_distances(queries, codes, query_index, word_index, max_distance):
+    """
+    Funcion para calcular la distancia de edicion de cada par (consulta, palabra) cuando es
+    menor o igual a max_distance. Todas las consultas tienen la misma longitud y todas las
+    palabras tambien.
+
+    Parametros:
+    queries : numpy.ndarray
+        codigos de las consultas (una fila por consulta)
+    codes : numpy.ndarray
+        codigos de las palabras del grupo (una fila por palabra)
+    query_index : numpy.ndarray
+        consulta de cada par
+    word_index : numpy.ndarray
+        palabra de cada par
+    max_distance : int
+        distancia maxima de edicion
+
+    Regresa tres arreglos con la consulta, la palabra y la distancia de los pares que quedan
+    dentro de la distancia maxima.
+    """
+    query_size = queries.shape[1]
+    word_size = codes.shape[1]
+    # desplazamiento de cada columna, para el minimo acumulado del costo de insercion
+    offsets = np.arange(word_size + 1, dtype=np.int16)
+    # fila inicial de la matriz dp (prefijo vacio de la consulta)
+    previous = np.broadcast_to(offsets, (len(query_index), word_size + 1))
+    word_codes = codes[word_index]
+
+    for i in range(query_size):
+        query_chars = queries[query_index, i]
+        # sustitucion (o coincidencia) y borrado desde la fila anterior
+        mismatch = (word_codes != query_chars[:, None]).astype(np.int16)
+        current = np.empty((len(query_index), word_size + 1), dtype=np.int16)
+        current[:, 0] = i + 1
+        np.minimum(previous[:, :-1] + mismatch, previous[:, 1:] + 1, out=current[:, 1:])
+        # insercion: row[j] = min(row[j], row[j - 1] + 1) equivale a un minimo acumulado de row[k] - k
+        current -= offsets
+        np.minimum.accumulate(current, axis=1, out=current)
+        current += offsets
+
+        # se descartan los pares cuya fila (sin la primera columna) ya supera la distancia
+        alive = current[:, 1:].min(axis=1) <= max_distance
+        if(not alive.all()):
+            current = current[alive]
+            query_index = query_index[alive]
+            word_index = word_index[alive]
+            word_codes = word_codes[alive]
+        previous = current
+        if(len(query_index) == 0):
+            break
+
+    dist = previous[:, word_size]
+    keep = dist <= max_distance
+    return query_index[keep], word_index[keep], dist[keep]
@@ -0,0 +1,177 @@
+from array import array
+
+# posiciones de la palabra que se pueden usar para separar los grupos de cada longitud
+ANCHORS = (None, "first", "last")
+
+
+def char_signature(word):
+    """
+    Funcion para obtener la firma de caracteres de una palabra: un entero de 64 bits con un
+    bit encendido por cada caracter distinto (ord(ch) % 64). Caracteres distintos pueden
+    compartir bit, lo que solo hace menos precisa la cota de VocabularyIndex.candidates.
+
+    Parametros:
+    word : str
+        palabra en minusculas
+    """
+    signature = 0
+    for ch in word:
+        signature |= 1 << (ord(ch) & 63)
+    return signature
+
+
+class VocabularyIndex:
+    """
+    Indice del vocabulario de la Trie separado por longitud para generar los candidatos de
+    las busquedas de palabras similares.
+
+    Las palabras se guardan en grupos por longitud, de modo que una consulta con distancia
+    maxima d solo recorre los grupos de longitud len(word) - d a len(word) + d. Ademas se
+    guarda la firma de caracteres de cada palabra (ver char_signature): cada caracter de una
+    palabra que no aparece en la otra necesita al menos una edicion y cada edicion quita a lo
+    mas un caracter de cada lado, por lo que los candidatos con mas de max_distance bits que
+    no estan en la firma de la consulta (o al reves) se descartan sin calcular su distancia.
+    Los grupos y las firmas solo se extienden al agregar palabras, por lo que una consulta
+    desde otro hilo ve el indice anterior o el nuevo.
+
+    Con anchor = "first" o "last" cada longitud se separa tambien por el primer o el ultimo
+    caracter y una consulta solo recorre los grupos con el mismo caracter que la palabra.
+    Es mas rapido pero deja de encontrar las palabras con un error en esa posicion.
+
+    Tiene la misma interfaz que SymSpellIndex (add y lookup) y no tiene distancia maxima.
+    """
+
+    def __init__(self, anchor=None):
+        if(anchor not in ANCHORS):
+            raise ValueError("anchor debe ser uno de %s" % (ANCHORS,))
+        self.anchor = anchor
+        # (longitud, caracter de anclaje o "") -> posiciones en all_words
+        self.buckets = {}
+        # firma de caracteres de cada palabra, por posicion en all_words
+        self.signatures = array("Q")
+
+    def _anchor_key(self, word):
+        """
+        Funcion para obtener el caracter con el que se separan los grupos de una longitud.
+        """
+        if(self.anchor is None or len(word) == 0):
+            return ""
+        if(self.anchor == "first"):
+            return word[0]
+        return word[-1]
+
+    def add(self, word, word_id):
+        """
+        Funcion para agregar una palabra nueva al indice.
+
+        Parametros:
+        self : objeto tipo VocabularyIndex
+            Instancia de la clase VocabularyIndex que llama a este método.
+        word : str
+            palabra a agregar
+        word_id : int
+            posicion de la palabra en all_words
+        """
+        signatures = self.signatures
+        if(word_id >= len(signatures)):
+            signatures.extend([0] * (word_id + 1 - len(signatures)))
+        # la firma se guarda antes de publicar la posicion en su grupo
+        signatures[word_id] = char_signature(word)
+        key = (len(word), self._anchor_key(word))
+        ids = self.buckets.get(key)
+        if(ids is None):
+            self.buckets[key] = array("l", [word_id])
+        else:
+            ids.append(word_id)
+
+    def remove(self, removed):
+        """
+        Funcion para quitar palabras del indice. Cada grupo afectado se reemplaza por una
+        copia sin las palabras, asi una consulta desde otro hilo ve el grupo completo.
+
+        Parametros:
+        self : objeto tipo VocabularyIndex
+            Instancia de la clase VocabularyIndex que llama a este método.
+        removed : list
+            tuplas (palabra, posicion en all_words) de las palabras a quitar
+        """
+        by_key = {}
+        for word, word_id in removed:
+            by_key.setdefault((len(word), self._anchor_key(word)), set()).add(word_id)
+        for key, word_ids in by_key.items():
+            ids = self.buckets.get(key)
+            if(ids is not None):
+                self.buckets[key] = array("l", [i for i in ids if i not in word_ids])
+
+    def candidates(self, word, max_distance):
+        """
+        Funcion para obtener las posiciones de las palabras que pueden estar a distancia de
+        edicion menor o igual a max_distance: las de los grupos con longitud cercana cuya
+        firma de caracteres no descarta la distancia.
+
+        Parametros:
+        self : objeto tipo VocabularyIndex
+            Instancia de la clase VocabularyIndex que llama a este método.
+        word : str
+            palabra de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion
+
+        Regresa una tupla (posiciones candidatas, numero de palabras recorridas).
+        """
+        signature = char_signature(word)
+        signatures = self.signatures
+        anchor_key = self._anchor_key(word)
+        size = len(word)
+        found = []
+        scanned = 0
+        for other_size in range(max(size - max_distance, 0), size + max_distance + 1):
+            if(other_size == 0):
+                continue
+            ids = self.buckets.get((other_size, anchor_key))
+            if(ids is None):
+                continue
+            scanned += len(ids)
+            # bits de la consulta que no tiene la palabra y bits de la palabra que no tiene
+            # la consulta, cada uno es una cota inferior de la distancia
+            for word_id in ids:
+                other = signatures[word_id]
+                if((signature & ~other).bit_count() <= max_distance and (other & ~signature).bit_count() <= max_distance):
+                    found.append(word_id)
+        return found, scanned
+
+    def lookup(self, word, max_distance, all_words, distance, stats=None):
+        """
+        Funcion para obtener las palabras del indice a distancia de edicion menor o igual
+        a max_distance.
+
+        Parametros:
+        self : objeto tipo VocabularyIndex
+            Instancia de la clase VocabularyIndex que llama a este método.
+        word : str
+            palabra de entrada en minusculas
+        max_distance : int
+            distancia maxima de edicion
+        all_words : list
+            lista de palabras de la Trie
+        distance : function
+            funcion para verificar la distancia de edicion de cada candidato
+        stats : TrieStats
+            contadores de rendimiento opcionales donde se registran los candidatos revisados
+
+        Regresa una lista de tuplas (distancia, posicion en all_words, palabra).
+        """
+        found, _ = self.candidates(word, max_distance)
+        matches = []
+        for word_id in found:
+            w = all_words[word_id]
+            dist = distance(word, w, max_distance)
+            if(dist <= max_distance):
+                matches.append((dist, word_id, w))
+
+        if(stats is not None):
+            stats.record_fuzzy(len(found), len(matches))
+        return matches
+
+    def __len__(self):
+        return sum(len(ids) for ids in self.buckets.values())